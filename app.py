@@ -1,72 +1,143 @@
 import streamlit as st
-from langchain_groq import ChatGroq
-from langchain_community.utilities import SQLDatabase
-from langchain_community.agent_toolkits import SQLDatabaseToolkit
-from langchain_community.agent_toolkits import create_sql_agent
 from dotenv import load_dotenv
+import io
 import os
+import sys
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
 
 
 load_dotenv()
 
-def init_groq():
-    """Initialize Groq client"""
-    return ChatGroq(
-        model_name="llama3-70b-8192",
-        groq_api_key=os.getenv("GROQ_API_KEY"),
-        temperature=0.0
-    )
-
-def init_db():
-    """Initialize SQL Database connection"""
-    return SQLDatabase.from_uri(
-        os.getenv("DATABASE_URL"),
-        schema=os.getenv("DB_SCHEMA", "info")
-    )
+# Share the backend's pooled connection layer and compiled workflow
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "zax_backend"))
+from db_pool import CancelScope, QueryCancelled
+from batch_runner import percentile
+
+@st.cache_resource(show_spinner="Starting the query engine...")
+def load_backend():
+    """
+    Process-wide backend shared by every session and rerun: the LLM client and
+    connection pools (config), the compiled graph with its SQL/result/example
+    caches (workflow via streaming) and the schema index. Built once, on the
+    first run; `startup_s` is what that cold start cost.
+    """
+    started = time.perf_counter()
+    import metrics
+    from config import get_pool
+    from db_schema_utils import get_schema_index
+    from streaming import stream_events
+    from tools import write_csv
+    from workflow import get_app
+    # Compile the graph and reflect the catalog now so the first question doesn't pay for them
+    get_app()
+    get_schema_index()
+    return SimpleNamespace(pool=get_pool(), metrics=metrics, stream_events=stream_events, write_csv=write_csv,
+                           startup_s=time.perf_counter() - started)
+
+@st.cache_resource
+def latency_log():
+    """Request latencies for this process: the first (cold) request and a window of warm ones."""
+    return SimpleNamespace(lock=threading.Lock(), first=None, warm=deque(maxlen=500))
+
+def record_latency(seconds):
+    log = latency_log()
+    with log.lock:
+        if log.first is None:
+            log.first = seconds
+        else:
+            log.warm.append(seconds)
+
+def latency_summary(backend):
+    log = latency_log()
+    with log.lock:
+        warm = list(log.warm)
+        summary = {"startup_s": round(backend.startup_s, 3), "first_request_s": log.first, "warm_requests": len(warm)}
+    if warm:
+        summary.update(warm_p50_s=percentile(warm, 50), warm_p95_s=percentile(warm, 95))
+    return summary
+
+backend = load_backend()
+
+def export_csv(sql):
+    """Full result of `sql` as CSV, streamed past the in-memory row budget"""
+    buffer = io.StringIO()
+    backend.write_csv(sql, buffer)
+    return buffer.getvalue()
 
 def generate_response(user_query):
-    """Process user query and generate response"""
+    """Run the question through the workflow, rendering each stage as it finishes"""
+    status = st.status("Processing...", expanded=False)
+    sql_box = st.empty()
+    rows_box = st.empty()
+    answer_box = st.empty()
+    answer = ""
+    first_byte = None
+    # A new question abandons the previous one: its in-flight statement is cancelled
+    previous = st.session_state.get("cancel_scope")
+    if previous is not None:
+        previous.cancel()
+    scope = st.session_state["cancel_scope"] = CancelScope()
     try:
-        llm = init_groq()
-        db = init_db()
-
-        toolkit = SQLDatabaseToolkit(db=db, llm=llm)
-        tools = toolkit.get_tools()  
-        
-        agent = create_sql_agent(
-            llm=llm,
-            toolkit=toolkit,
-            tools=tools,
-            verbose=True
-        )
-        
-        response = agent.invoke({
-            "input": f"Generate SQL query for: {user_query}. Use only the provided tools."
-        })
-        
-        return response['output']
-        
+        with scope:
+            for event in backend.stream_events({"user_input": user_query, "last_query_result": None, "last_sql": ""}):
+                kind = event["event"]
+                if kind == "stage_start":
+                    status.update(label=f"Running {event['stage']}...")
+                elif kind == "stage_end":
+                    status.write(f"{event['stage']}: {event['ms']:.0f} ms")
+                elif kind == "sql":
+                    first_byte = first_byte or event["t"]
+                    sql_box.code(event["sql"], language="postgresql")
+                elif kind == "rows":
+                    result = event["result"]
+                    if result.ok:
+                        rows_box.dataframe(result.to_dict())
+                    else:
+                        rows_box.error(result.error)
+                elif kind == "token":
+                    answer += event["text"]
+                    answer_box.markdown(answer)
+                elif kind == "done":
+                    answer_box.markdown(event["answer"])
+                    result = event["result"]
+                    if result is not None and result.truncated:
+                        about = "about " if result.total_estimated else ""
+                        st.caption(f"Showing the first {result.row_count} of {about}{result.total_rows} rows.")
+                        st.download_button("Download all rows (CSV)", data=lambda sql=event["sql"]: export_csv(sql),
+                                           file_name="result.csv", mime="text/csv", on_click="ignore")
+                    label = f"Done in {event['t']:.2f}s"
+                    if first_byte is not None:
+                        label += f" (SQL after {first_byte:.2f}s)"
+                    status.update(label=label, state="complete")
+                    record_latency(event["t"])
+    except QueryCancelled:
+        status.update(label="Cancelled", state="error")
     except Exception as e:
-        return f"Error: {str(e)}"
+        status.update(label="Failed", state="error")
+        st.error(f"Error: {str(e)}")
 
 # Streamlit UI
 st.title("🦙 Groq SQL Query Assistant")
 st.write("Ask natural language questions about your database!")
 
+with st.sidebar.expander("Connection pool"):
+    st.json(backend.pool.stats())
+
+with st.sidebar.expander("Latency (cold vs warm)"):
+    st.json(latency_summary(backend))
+
+if backend.metrics.enabled():
+    with st.sidebar.expander("Metrics"):
+        st.code(backend.metrics.registry.prometheus_text(), language="text")
+
 user_input = st.text_input("Enter your question:", 
                          placeholder="e.g., yo, before write a question always check the available tables")
 
 if st.button("Generate Query"):
     if user_input:
-        with st.spinner("Processing..."):
-            response = generate_response(user_input)
-            
-            # Display results
-            st.subheader("Generated SQL Query")
-            st.code(response, language="postgresql")
-            
-            # Add results table if needed
-            # result = db.run(response)
-            # st.write(result)
+        generate_response(user_input)
     else:
-        st.warning("Please enter a question")
\ No newline at end of file
+        st.warning("Please enter a question")
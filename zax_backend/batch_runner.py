@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import csv
+import json
+import math
+import random
+import statistics
+import sys
+import time
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from metrics import record_retry, trace_request
+import debug_trace
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def read_questions(path):
+    """
+    Yield {"id", "question"} items from a JSONL or CSV file. The question is
+    read from a "question" (or "user_input") field; "id" defaults to the
+    1-based row number. Rows are read lazily so huge files stream through.
+    """
+    with open(path, newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for number, row in enumerate(rows, 1):
+            question = (row.get("question") or row.get("user_input") or "").strip()
+            if question:
+                yield {"id": row.get("id") or number, "question": question}
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def _status_code(exc):
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(exc):
+    """Provider rate limits, transient 5xx and timeouts are retried; everything else fails the question."""
+    return _status_code(exc) in RETRYABLE_STATUS or isinstance(exc, (asyncio.TimeoutError, TimeoutError))
+
+
+def backoff_delay(attempt, exc=None, base=1.0, cap=60.0):
+    """Exponential backoff with full jitter, never shorter than the provider's Retry-After."""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        delay = max(delay, float(headers.get("retry-after", 0)))
+    except (TypeError, ValueError):
+        pass
+    return delay
+
+
+async def run_one(graph, item, max_retries=3, limiter=None, bypass_cache=False):
+    """Answer one question, retrying retryable failures; returns the output record."""
+    with debug_trace.request(item["id"]), trace_request(item["id"]):
+        return await _run_one(graph, item, max_retries, limiter, bypass_cache)
+
+
+async def _run_one(graph, item, max_retries, limiter, bypass_cache):
+    start = time.perf_counter()
+    record = {"id": item["id"], "question": item["question"]}
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            await limiter.aacquire()
+        try:
+            state = await graph.ainvoke({
+                "user_input": item["question"],
+                "last_query_result": None,
+                "last_sql": "",
+                "bypass_cache": bypass_cache
+            })
+        except Exception as e:
+            if attempt < max_retries and is_retryable(e):
+                record_retry("batch")
+                await asyncio.sleep(backoff_delay(attempt, e))
+                continue
+            record.update(error=f"{type(e).__name__}: {e}")
+        else:
+            messages = state.get("messages") or []
+            record.update(
+                sql=state.get("last_sql", ""),
+                answer=messages[-1].content if messages else "",
+                error=None,
+                **_result_fields(state.get("last_query_result"))
+            )
+        record.update(attempts=attempt + 1, latency_s=time.perf_counter() - start)
+        return record
+
+
+def _result_fields(result):
+    # Columnar QueryResult -> JSON-friendly fields; row data is only materialised here
+    if result is None:
+        return {"columns": [], "rows": [], "query_error": None}
+    return {
+        "columns": list(result.columns),
+        "rows": [list(row) for row in result.rows()],
+        "query_error": result.error,
+    }
+
+
+# Record fields summarize reads; run_batch keeps only these for the whole batch
+SUMMARY_FIELDS = ("latency_s", "error", "attempts")
+
+
+def summarize(records, wall_s):
+    latencies = [r["latency_s"] for r in records]
+    summary = {
+        "questions": len(records),
+        "ok": sum(1 for r in records if not r["error"]),
+        "failed": sum(1 for r in records if r["error"]),
+        "retries": sum(r["attempts"] - 1 for r in records),
+        "wall_s": wall_s,
+        "throughput_qps": len(records) / wall_s if wall_s > 0 else 0.0,
+    }
+    if latencies:
+        summary.update(
+            latency_mean_s=statistics.mean(latencies),
+            latency_p50_s=percentile(latencies, 50),
+            latency_p95_s=percentile(latencies, 95),
+            latency_p99_s=percentile(latencies, 99),
+            latency_max_s=max(latencies),
+        )
+    return summary
+
+
+async def run_batch(questions, graph, concurrency=4, rate=0.0, max_retries=3, on_result=None, bypass_cache=False):
+    """
+    Run `questions` through `graph.ainvoke` with at most `concurrency` in
+    flight, starting at most `rate` questions per second (0 = unlimited).
+    Each record is handed to `on_result` as soon as it completes; the
+    throughput/latency summary is returned at the end.
+    """
+    limiter = InMemoryRateLimiter(requests_per_second=rate, max_bucket_size=concurrency) if rate > 0 else None
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    records = []
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            record = await run_one(graph, item, max_retries=max_retries, limiter=limiter, bypass_cache=bypass_cache)
+            # Only what summarize reads is kept; the rows go to on_result and are released
+            records.append({k: record[k] for k in SUMMARY_FIELDS})
+            if on_result is not None:
+                on_result(record)
+
+    start = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        for item in questions:
+            await queue.put(item)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+    return summarize(records, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a file of questions through the workflow graph.")
+    parser.add_argument("input", help="JSONL or CSV file with a 'question' field (optional 'id')")
+    parser.add_argument("--output", help="JSONL file for the results (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=4, help="questions in flight at once")
+    parser.add_argument("--rate", type=float, default=0.0, help="max questions started per second (0 = unlimited)")
+    parser.add_argument("--max-retries", type=int, default=3, help="retries for rate-limited/transient failures")
+    parser.add_argument("--bypass-cache", action="store_true", help="skip the query result cache")
+    args = parser.parse_args()
+
+    # Imported here so the helpers above stay importable without a database
+    from workflow import app
+
+    out = open(args.output, "w") if args.output else sys.stdout
+
+    def write(record):
+        out.write(json.dumps(record, default=str) + "\n")
+        out.flush()
+
+    try:
+        summary = asyncio.run(run_batch(
+            read_questions(args.input), app,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            max_retries=args.max_retries,
+            on_result=write,
+            bypass_cache=args.bypass_cache
+        ))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
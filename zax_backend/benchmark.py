@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from batch_runner import percentile, summarize
+
+
+def stage_breakdown(traces):
+    """Per-stage latency ({kind}:{name} -> count/mean/p50/p95/p99 in ms) over the spans of all traces."""
+    durations = {}
+    for trace in traces:
+        for span in trace["spans"]:
+            durations.setdefault(f"{span['kind']}:{span['name']}", []).append(span["ms"])
+    return {
+        stage: {
+            "count": len(values),
+            "mean_ms": statistics.mean(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+        }
+        for stage, values in sorted(durations.items())
+    }
+
+
+def _inputs(question):
+    return {"user_input": question, "last_query_result": None, "last_sql": "", "bypass_cache": True}
+
+
+def _trace_dict(trace):
+    return trace.to_dict() if trace is not None else {"spans": []}
+
+
+def _record(number, question, state, error, started):
+    record = {"id": number, "question": question, "attempts": 1, "latency_s": time.perf_counter() - started}
+    result = (state or {}).get("last_query_result")
+    record["error"] = error or (result.error if result is not None and not result.ok else None)
+    return record
+
+
+def run_sync(app, questions, concurrency, trace_request, reset):
+    """Run each question through app.invoke on `concurrency` threads; returns (records, traces)."""
+    def one(number, question):
+        reset()
+        started = time.perf_counter()
+        with trace_request(number) as trace:
+            try:
+                state, error = app.invoke(_inputs(question)), None
+            except Exception as e:
+                state, error = None, f"{type(e).__name__}: {e}"
+        return _record(number, question, state, error, started), _trace_dict(trace)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(len(questions)), questions))
+    return [r for r, _ in results], [t for _, t in results]
+
+
+async def run_async(app, questions, concurrency, trace_request, reset):
+    """Run each question through app.ainvoke with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(number, question):
+        async with semaphore:
+            reset()
+            started = time.perf_counter()
+            with trace_request(number) as trace:
+                try:
+                    state, error = await app.ainvoke(_inputs(question)), None
+                except Exception as e:
+                    state, error = None, f"{type(e).__name__}: {e}"
+            return _record(number, question, state, error, started), _trace_dict(trace)
+
+    results = await asyncio.gather(*(one(n, q) for n, q in enumerate(questions)))
+    return [r for r, _ in results], [t for _, t in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline end-to-end benchmark: the compiled graph against a local Postgres loaded with "
+                    "synthetic data, with the LLM replaced by a deterministic replay model."
+    )
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"),
+                        help="local Postgres to benchmark against (default: DATABASE_URL)")
+    parser.add_argument("--schema", default=os.getenv("DB_SCHEMA", "info"))
+    parser.add_argument("--load", action="store_true", help="(re)load the synthetic tables before running")
+    parser.add_argument("--scale", type=float, default=1.0, help="synthetic data scale (1.0 = 10k orders)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=100, help="questions to run (cycled from the script)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="simulated latency per LLM call")
+    parser.add_argument("--script", help="replay script JSONL (question/sql/fixed_sql); default: built-in set")
+    parser.add_argument("--mode", choices=["async", "sync"], default="async")
+    parser.add_argument("--warm", action="store_true", help="keep the question->SQL cache between requests")
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("a local Postgres is required: pass --database-url or set DATABASE_URL")
+
+    if args.load:
+        from sqlalchemy import create_engine
+        from synthetic_data import load
+        engine = create_engine(args.database_url)
+        conn = engine.raw_connection()
+        try:
+            load(conn, schema=args.schema, scale=args.scale, seed=args.seed)
+        finally:
+            conn.close()
+            engine.dispose()
+
+    # The replay model and metrics are selected through config, read on import below
+    os.environ.update(
+        DATABASE_URL=args.database_url, DB_SCHEMA=args.schema, LLM_BACKEND="replay",
+        REPLAY_LATENCY_MS=str(args.llm_latency_ms), METRICS_ENABLED="true",
+    )
+    if args.script:
+        os.environ["REPLAY_SCRIPT_PATH"] = args.script
+    # Cold start: client/pool setup, graph compilation and schema reflection, then one request
+    started = time.perf_counter()
+    from metrics import registry, trace_request
+    from replay_llm import DEFAULT_SCRIPT, load_script
+    from workflow import app, question_cache
+    from db_schema_utils import get_schema_index
+    get_schema_index()
+    cold_start = {"startup_s": time.perf_counter() - started}
+
+    script = load_script(args.script) if args.script else DEFAULT_SCRIPT
+    questions = [script[i % len(script)]["question"] for i in range(args.requests)]
+    reset = (lambda: None) if args.warm else question_cache.invalidate
+    first, _ = run_sync(app, questions[:1], 1, trace_request, reset)
+    cold_start["first_request_s"] = first[0]["latency_s"]
+    registry.reset()
+
+    started = time.perf_counter()
+    if args.mode == "async":
+        records, traces = asyncio.run(run_async(app, questions, args.concurrency, trace_request, reset))
+    else:
+        records, traces = run_sync(app, questions, args.concurrency, trace_request, reset)
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "database_url"},
+        "cold_start": cold_start,
+        "summary": summarize(records, time.perf_counter() - started),
+        "stages": stage_breakdown(traces),
+        "llm_tokens": {kind: registry.counter("zax_llm_tokens_total", kind=kind) for kind in ("prompt", "completion")},
+        "retries": registry.counter("zax_retries_total", kind="correction"),
+    }
+    text = json.dumps(report, indent=2, default=str)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    failed = [r for r in records if r["error"]]
+    if failed:
+        print(f"{len(failed)} request(s) failed, e.g. {failed[0]['error']}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
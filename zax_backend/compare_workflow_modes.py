@@ -0,0 +1,67 @@
+import argparse
+import statistics
+import time
+import workflow
+from batch_runner import percentile
+from config import EXAMPLE_STORE_MAX_ENTRIES
+from example_store import ExampleStore
+from prompts import SEED_EXAMPLES
+from workflow import build_workflow, question_cache
+
+QUESTIONS = [
+    "List products with stock level below 50",
+    "Show the average rating of suppliers by country",
+    "List the top 3 customers by total amount spent",
+    "List sales representatives and the number of orders they handled in their first year",
+]
+
+def run_question(app, question):
+    # Measure the pipeline, not the caches: both modes start from the seed examples and an empty SQL cache
+    question_cache.invalidate()
+    workflow.example_store = ExampleStore(SEED_EXAMPLES, max_entries=EXAMPLE_STORE_MAX_ENTRIES)
+    start = time.perf_counter()
+    app.invoke({"user_input": question, "last_query_result": None, "last_sql": "", "bypass_cache": True})
+    return time.perf_counter() - start
+
+def run_modes(apps, questions, rounds):
+    """Time every question in every mode, alternating which mode goes first."""
+    latencies = {name: [] for name in apps}
+    names = list(apps)
+    turn = 0
+    for _ in range(rounds):
+        for question in questions:
+            order = names if turn % 2 == 0 else names[::-1]
+            turn += 1
+            for name in order:
+                latencies[name].append(run_question(apps[name], question))
+    return latencies
+
+def summarize(name, latencies):
+    return (f"{name:<6} n={len(latencies):<4} mean={statistics.mean(latencies):7.3f}s  "
+            f"p50={percentile(latencies, 50):7.3f}s  p95={percentile(latencies, 95):7.3f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare end-to-end latency of the fast and full workflow graphs.")
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the question list per mode")
+    parser.add_argument("--question", action="append", help="question to run (repeatable); defaults to a built-in set")
+    args = parser.parse_args()
+    questions = args.question or QUESTIONS
+
+    apps = {name: build_workflow(fast_path=fast_path).compile() for name, fast_path in (("full", False), ("fast", True))}
+    store = workflow.example_store
+    try:
+        # Untimed warm-up so neither mode pays the pool, schema index and catalog cold start
+        for app in apps.values():
+            for question in questions:
+                run_question(app, question)
+        results = run_modes(apps, questions, args.rounds)
+    finally:
+        workflow.example_store = store
+
+    print(summarize("full", results["full"]))
+    print(summarize("fast", results["fast"]))
+    saved = statistics.mean(results["full"]) - statistics.mean(results["fast"])
+    print(f"fast path saves {saved:.3f}s per question on average")
+
+if __name__ == "__main__":
+    main()
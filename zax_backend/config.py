@@ -1,8 +1,9 @@
 import os
 import warnings
 from dotenv import load_dotenv
-from langchain_community.utilities import SQLDatabase
-from langchain_groq import ChatGroq
+from lazy import Lazy
+import metrics
+import debug_trace
 
 # Suppress warnings globally
 warnings.filterwarnings("ignore")
@@ -13,8 +14,172 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 DB_SCHEMA = os.getenv("DB_SCHEMA", "info")
 
-if not DATABASE_URL:
-    raise EnvironmentError("DATABASE_URL not set in environment.")
+# Schema catalog cache: full reload after TTL, DDL-signature check every interval (seconds)
+SCHEMA_CACHE_TTL = float(os.getenv("SCHEMA_CACHE_TTL", "300"))
+SCHEMA_CHECK_INTERVAL = float(os.getenv("SCHEMA_CHECK_INTERVAL", "5"))
 
-db = SQLDatabase.from_uri(DATABASE_URL, schema=DB_SCHEMA)
-llm = ChatGroq(model="llama3-70b-8192", temperature=0.0)
\ No newline at end of file
+# Persisted selector index (tables, columns, FK join graph) for fast warm starts
+CACHE_DIR = os.getenv("ZAX_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+SCHEMA_INDEX_PATH = os.getenv("SCHEMA_INDEX_PATH", os.path.join(CACHE_DIR, f"schema_index_{DB_SCHEMA}.json"))
+
+# Question -> SQL cache (entries, seconds; SQL_CACHE_PATH enables on-disk persistence)
+SQL_CACHE_MAX_ENTRIES = int(os.getenv("SQL_CACHE_MAX_ENTRIES", "1000"))
+SQL_CACHE_TTL = float(os.getenv("SQL_CACHE_TTL", "86400"))
+SQL_CACHE_PATH = os.getenv("SQL_CACHE_PATH") or None
+
+# Query result cache (bytes, seconds); max staleness bounds the lag of the freshness signal
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_MAX_STALENESS = float(os.getenv("RESULT_CACHE_MAX_STALENESS", "300"))
+RESULT_CACHE_CHECK_INTERVAL = float(os.getenv("RESULT_CACHE_CHECK_INTERVAL", "1"))
+
+# Result budget: rows are fetched through server-side cursors in chunks of
+# RESULT_FETCH_ROWS and kept up to RESULT_MAX_ROWS rows / RESULT_MAX_BYTES bytes;
+# the answer prompt only sees the first ANSWER_SAMPLE_ROWS plus the exact row count.
+RESULT_MAX_ROWS = int(os.getenv("RESULT_MAX_ROWS", "10000"))
+RESULT_MAX_BYTES = int(os.getenv("RESULT_MAX_BYTES", str(16 * 1024 * 1024)))
+RESULT_FETCH_ROWS = int(os.getenv("RESULT_FETCH_ROWS", "1000"))
+ANSWER_SAMPLE_ROWS = int(os.getenv("ANSWER_SAMPLE_ROWS", "50"))
+
+# Generated queries: per-statement timeout (0 = pool default) and the EXPLAIN cost
+# governor, which rejects plans above GOVERNOR_MAX_COST and injects
+# LIMIT GOVERNOR_LIMIT_ROWS into plans estimated above GOVERNOR_MAX_ROWS rows.
+QUERY_TIMEOUT_MS = int(os.getenv("QUERY_TIMEOUT_MS", "15000"))
+GOVERNOR_ENABLED = os.getenv("GOVERNOR_ENABLED", "true").lower() in ("1", "true", "yes")
+GOVERNOR_MAX_COST = float(os.getenv("GOVERNOR_MAX_COST", "1000000"))
+GOVERNOR_MAX_ROWS = float(os.getenv("GOVERNOR_MAX_ROWS", "100000"))
+GOVERNOR_LIMIT_ROWS = int(os.getenv("GOVERNOR_LIMIT_ROWS", str(RESULT_MAX_ROWS)))
+
+# Candidate generation: SQL_CANDIDATES queries are generated concurrently (1 =
+# off); candidate 0 is the regular generation, the others are sampled at
+# SQL_CANDIDATE_TEMPERATURE. The cheapest valid one runs; the rest get
+# SQL_CANDIDATE_GRACE_S after the first valid candidate before being dropped.
+SQL_CANDIDATES = int(os.getenv("SQL_CANDIDATES", "1"))
+SQL_CANDIDATE_TEMPERATURE = float(os.getenv("SQL_CANDIDATE_TEMPERATURE", "0.7"))
+SQL_CANDIDATE_GRACE_S = float(os.getenv("SQL_CANDIDATE_GRACE_S", "0.5"))
+
+# Generation prompt schema: columns ranked by relevance (keys and join columns
+# always kept) up to SCHEMA_TOKEN_BUDGET estimated tokens (0 = every column);
+# SCHEMA_COMPACT renders one line per table. Correction retries get the full schema.
+SCHEMA_TOKEN_BUDGET = int(os.getenv("SCHEMA_TOKEN_BUDGET", "2000"))
+SCHEMA_COMPACT = os.getenv("SCHEMA_COMPACT", "false").lower() in ("1", "true", "yes")
+
+# Few-shot examples: the FEW_SHOT_K most similar ones within FEW_SHOT_TOKEN_BUDGET
+# estimated tokens (0 = no limit). Successful question/SQL pairs are added to the
+# store (up to EXAMPLE_STORE_MAX_ENTRIES; EXAMPLE_STORE_PATH persists them).
+FEW_SHOT_K = int(os.getenv("FEW_SHOT_K", "3"))
+FEW_SHOT_TOKEN_BUDGET = int(os.getenv("FEW_SHOT_TOKEN_BUDGET", "600"))
+EXAMPLE_STORE_MAX_ENTRIES = int(os.getenv("EXAMPLE_STORE_MAX_ENTRIES", "500"))
+EXAMPLE_STORE_PATH = os.getenv("EXAMPLE_STORE_PATH") or None
+
+# Offline validation of generated SQL against the schema index before it reaches the database
+SQL_VALIDATION_ENABLED = os.getenv("SQL_VALIDATION_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Lean graph: selector + cached schema straight into SQL generation.
+# Set WORKFLOW_FAST_PATH=false for the list_tables / model_get_schema tool round trip.
+WORKFLOW_FAST_PATH = os.getenv("WORKFLOW_FAST_PATH", "true").lower() in ("1", "true", "yes")
+
+# Shared connection pool (sizes in connections, timeouts in seconds unless noted)
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+# LLM provider limits: token bucket refilled at LLM_REQUESTS_PER_SECOND (0 disables)
+# holding up to LLM_MAX_BURST requests; 429s are retried with backoff by the client.
+LLM_REQUESTS_PER_SECOND = float(os.getenv("LLM_REQUESTS_PER_SECOND", "0"))
+LLM_MAX_BURST = int(os.getenv("LLM_MAX_BURST", "1"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# LLM_BACKEND=replay swaps Groq for the deterministic ReplayChatModel (offline
+# benchmarks): canned SQL from REPLAY_SCRIPT_PATH (JSONL; default: the built-in
+# script for the synthetic schema), REPLAY_LATENCY_MS per call.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq").lower()
+REPLAY_SCRIPT_PATH = os.getenv("REPLAY_SCRIPT_PATH") or None
+REPLAY_LATENCY_MS = float(os.getenv("REPLAY_LATENCY_MS", "0"))
+
+# Instrumentation (off by default): per-node/tool/LLM/DB latency histograms,
+# token, retry and cache counters, served as Prometheus text on METRICS_PORT
+# (0 = no endpoint); with TRACE_DIR set, each request's spans go to <id>.json.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+TRACE_DIR = os.getenv("TRACE_DIR") or None
+metrics.configure(enabled=METRICS_ENABLED, trace_dir=TRACE_DIR, port=METRICS_PORT)
+
+# Structured debug tracing of the request path (JSON lines on stdout, or appended
+# to DEBUG_TRACE_PATH). Below DEBUG_TRACE_LEVEL nothing is formatted; DEBUG/INFO
+# events are kept for a DEBUG_TRACE_SAMPLE_RATE fraction of requests.
+DEBUG_TRACE_LEVEL = os.getenv("DEBUG_TRACE_LEVEL", "warn")
+DEBUG_TRACE_SAMPLE_RATE = float(os.getenv("DEBUG_TRACE_SAMPLE_RATE", "1"))
+DEBUG_TRACE_PATH = os.getenv("DEBUG_TRACE_PATH") or None
+debug_trace.configure(level=DEBUG_TRACE_LEVEL, sample_rate=DEBUG_TRACE_SAMPLE_RATE, path=DEBUG_TRACE_PATH)
+
+# Heavyweight objects are built on first use, not at import: importing the
+# backend needs neither a reachable database nor an LLM client. Use the get_*
+# accessors; `config.pool`, `config.db`, ... still work through __getattr__.
+def _pool_options():
+    if not DATABASE_URL:
+        raise EnvironmentError("DATABASE_URL not set in environment.")
+    return dict(
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        timeout=DB_POOL_TIMEOUT,
+        recycle=DB_POOL_RECYCLE,
+        statement_timeout_ms=DB_STATEMENT_TIMEOUT_MS,
+        search_path=DB_SCHEMA
+    )
+
+def _build_pool():
+    from db_pool import ConnectionPool
+    pool = ConnectionPool(DATABASE_URL, **_pool_options())
+    pool.warm()
+    return pool
+
+def _build_async_pool():
+    # asyncpg pool for the async graph path (app.ainvoke); its connections are created lazily per event loop
+    from db_pool import AsyncConnectionPool
+    return AsyncConnectionPool(DATABASE_URL, **_pool_options())
+
+def _build_db():
+    from langchain_community.utilities import SQLDatabase
+    return SQLDatabase(get_pool().engine, schema=DB_SCHEMA)
+
+def _build_llm():
+    rate_limiter = None
+    if LLM_REQUESTS_PER_SECOND > 0:
+        from langchain_core.rate_limiters import InMemoryRateLimiter
+        rate_limiter = InMemoryRateLimiter(requests_per_second=LLM_REQUESTS_PER_SECOND, max_bucket_size=LLM_MAX_BURST)
+    if LLM_BACKEND == "replay":
+        from replay_llm import ReplayChatModel
+        llm = ReplayChatModel.from_file(REPLAY_SCRIPT_PATH, latency_ms=REPLAY_LATENCY_MS)
+        llm.rate_limiter = rate_limiter
+        return llm
+    from langchain_groq import ChatGroq
+    return ChatGroq(model="llama3-70b-8192", temperature=0.0, rate_limiter=rate_limiter, max_retries=LLM_MAX_RETRIES)
+
+_pool = Lazy(_build_pool)
+_async_pool = Lazy(_build_async_pool)
+_db = Lazy(_build_db)
+_llm = Lazy(_build_llm)
+
+def get_pool():
+    """Shared SQLAlchemy connection pool (created and warmed on first use)."""
+    return _pool.get()
+
+def get_async_pool():
+    return _async_pool.get()
+
+def get_db():
+    """LangChain SQLDatabase over the shared pool, for the SQL toolkit."""
+    return _db.get()
+
+def get_llm():
+    return _llm.get()
+
+_ACCESSORS = {"pool": get_pool, "async_pool": get_async_pool, "db": get_db, "llm": get_llm}
+
+def __getattr__(name):
+    if name in _ACCESSORS:
+        return _ACCESSORS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,303 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+import asyncpg
+import debug_trace
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+def quote_search_path(search_path):
+    """`search_path` ("info" or "info, public") with every schema name quoted as an identifier."""
+    names = []
+    for name in search_path.split(","):
+        name = name.strip()
+        if not (len(name) > 1 and name.startswith('"') and name.endswith('"')):
+            name = '"' + name.replace('"', '""') + '"'
+        names.append(name)
+    return ",".join(names)
+
+
+class PoolStats:
+    """Thread-safe counters for checkout wait time and pool utilisation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+
+    def checked_out(self):
+        with self._lock:
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def checked_in(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def snapshot(self, min_size, max_size):
+        with self._lock:
+            checkouts = self.checkouts
+            return {
+                "min_size": min_size,
+                "max_size": max_size,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "utilisation": self.in_use / max_size,
+                "checkouts": checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (self.total_wait / checkouts * 1000) if checkouts else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+class QueryCancelled(Exception):
+    """The request owning this work was cancelled."""
+
+
+current_cancel_scope = ContextVar("current_cancel_scope", default=None)
+
+
+class CancelScope:
+    """
+    Tracks the pooled connections a request is using so that another thread
+    can abort its in-flight statements (psycopg2 `connection.cancel()`, the
+    server-side cancel request). Enter it around the request; `cancel()` may
+    be called from any thread. Async requests are cancelled by cancelling
+    their task instead: asyncpg then cancels the running query itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._tokens = []
+        self.cancelled = False
+
+    def __enter__(self):
+        self._tokens.append(current_cancel_scope.set(self))
+        return self
+
+    def __exit__(self, *exc):
+        current_cancel_scope.reset(self._tokens.pop())
+        return False
+
+    def attach(self, conn):
+        with self._lock:
+            if self.cancelled:
+                raise QueryCancelled()
+            self._connections.add(conn)
+
+    def detach(self, conn):
+        with self._lock:
+            self._connections.discard(conn)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            connections = list(self._connections)
+        for conn in connections:
+            cancel = getattr(conn, "cancel", None) or getattr(conn, "interrupt", None)
+            try:
+                cancel()
+            except Exception as e:
+                debug_trace.warn("db", "cancel_failed", lambda: {"error": str(e)})
+
+
+def raise_if_cancelled():
+    """Raise QueryCancelled when the current request has been cancelled."""
+    scope = current_cancel_scope.get()
+    if scope is not None and scope.cancelled:
+        raise QueryCancelled()
+
+
+class _TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection."""
+
+    stats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.stats is not None:
+            self.stats.record_wait(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class ConnectionPool:
+    """
+    The single pooled connection layer shared by SQLDatabase, the schema
+    catalog and query execution.
+
+    `min_size` connections are kept open (and pre-opened by `warm()`), bursts
+    may grow the pool to `max_size`. Connections are pinged before checkout,
+    recycled after `recycle` seconds and run every statement under
+    `statement_timeout_ms` (0 disables the timeout) and, when given, with
+    `search_path` set on every connection.
+    """
+
+    def __init__(self, url, min_size=2, max_size=10, timeout=30.0, recycle=1800,
+                 statement_timeout_ms=0, search_path=None):
+        if min_size < 1 or max_size < min_size:
+            raise ValueError("Pool sizes must satisfy 1 <= min_size <= max_size.")
+        self.min_size = min_size
+        self.max_size = max_size
+        options = []
+        if statement_timeout_ms:
+            options.append(f"-c statement_timeout={int(statement_timeout_ms)}")
+        if search_path:
+            options.append(f"-c search_path={quote_search_path(search_path)}")
+        connect_args = {"options": " ".join(options)} if options else {}
+        self.engine = create_engine(
+            url,
+            poolclass=_TimedQueuePool,
+            pool_size=min_size,
+            max_overflow=max_size - min_size,
+            pool_timeout=timeout,
+            pool_recycle=recycle,
+            pool_pre_ping=True,
+            connect_args=connect_args,
+        )
+        self._stats = PoolStats()
+        self.engine.pool.stats = self._stats
+        event.listen(self.engine, "checkout", lambda *args: self._stats.checked_out())
+        event.listen(self.engine, "checkin", lambda *args: self._stats.checked_in())
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a raw DB-API (psycopg2) connection and return it to the pool
+        afterwards. Inside a CancelScope the connection is registered so the
+        scope can cancel its running statement.
+        """
+        scope = current_cancel_scope.get()
+        conn = self.engine.raw_connection()
+        try:
+            if scope is not None:
+                scope.attach(conn.dbapi_connection)
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if scope is not None:
+                scope.detach(conn.dbapi_connection)
+            conn.close()
+
+    @property
+    def errors(self):
+        """The DB-API driver's base exception class (e.g. psycopg2.Error)."""
+        return self.engine.dialect.dbapi.Error
+
+    def warm(self):
+        """Open `min_size` connections up front so the first requests skip the handshake."""
+        conns = [self.engine.raw_connection() for _ in range(self.min_size)]
+        for conn in conns:
+            conn.close()
+
+    def stats(self):
+        """Snapshot of pool size, utilisation and checkout wait times."""
+        stats = self._stats.snapshot(self.min_size, self.max_size)
+        stats["open"] = self.engine.pool.checkedin() + stats["in_use"]
+        return stats
+
+    def close(self):
+        self.engine.dispose()
+
+
+class AsyncConnectionPool:
+    """
+    asyncpg counterpart of ConnectionPool for the async workflow path, with the
+    same sizing, statement timeout and stats. asyncpg pools belong to one
+    event loop, so a pool is created lazily per running loop.
+    """
+
+    def __init__(self, url, min_size=2, max_size=10, timeout=30.0, recycle=1800,
+                 statement_timeout_ms=0, search_path=None):
+        if min_size < 1 or max_size < min_size:
+            raise ValueError("Pool sizes must satisfy 1 <= min_size <= max_size.")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        # asyncpg wants a plain postgresql:// DSN, not SQLAlchemy's driver suffix
+        self.dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.server_settings = {}
+        if statement_timeout_ms:
+            self.server_settings["statement_timeout"] = str(int(statement_timeout_ms))
+        if search_path:
+            self.server_settings["search_path"] = quote_search_path(search_path)
+        self._pools = weakref.WeakKeyDictionary()
+        self._stats = PoolStats()
+
+    async def _pool(self):
+        loop = asyncio.get_running_loop()
+        task = self._pools.get(loop)
+        if task is None:
+            task = self._pools[loop] = asyncio.ensure_future(asyncpg.create_pool(
+                self.dsn,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                max_inactive_connection_lifetime=self.recycle,
+                server_settings=self.server_settings,
+            ))
+        try:
+            return await task
+        except Exception:
+            # A failed creation is not cached: the next request on this loop tries again
+            if task.done() and self._pools.get(loop) is task:
+                del self._pools[loop]
+            raise
+
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow an asyncpg connection from this loop's pool."""
+        pool = await self._pool()
+        start = time.perf_counter()
+        try:
+            conn = await pool.acquire(timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self._stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self._stats.record_wait(time.perf_counter() - start)
+        self._stats.checked_out()
+        try:
+            yield conn
+        finally:
+            self._stats.checked_in()
+            await pool.release(conn)
+
+    def stats(self):
+        return self._stats.snapshot(self.min_size, self.max_size)
+
+    async def close(self):
+        """Close the pool of the running loop."""
+        task = self._pools.pop(asyncio.get_running_loop(), None)
+        if task is not None:
+            await (await task).close()
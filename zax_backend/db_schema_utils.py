@@ -1,41 +1,98 @@
-import psycopg2
-from config import DATABASE_URL, DB_SCHEMA
+import threading
+import debug_trace
+from config import DB_SCHEMA, SCHEMA_CACHE_TTL, SCHEMA_CHECK_INTERVAL, SCHEMA_INDEX_PATH, get_pool, get_async_pool
+from schema_catalog import SchemaCatalog
+from schema_index import SchemaIndex
+import table_selector
 
-def fetch_schema_text(schema=None, only_tables=None):
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+_index = None
+_index_lock = threading.Lock()
+
+def get_schema_catalog(schema=None):
+    """Return the process-wide SchemaCatalog for `schema` (defaults to DB_SCHEMA)."""
     schema = schema or DB_SCHEMA
-    import re
-    conn = psycopg2.connect(DATABASE_URL)
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT table_name, column_name, data_type
-            FROM information_schema.columns
-            WHERE table_schema = %s
-            ORDER BY table_name, ordinal_position
-        """, (schema,))
-        rows = cur.fetchall()
-    conn.close()
-
-    from collections import defaultdict
-    tables = defaultdict(list)
-    for table, col, dtype in rows:
-        if only_tables is None or table in only_tables:
-            tables[table].append(f"{col} {dtype}")
-
-    # --- DEBUG PRINTS ---
-    if only_tables:
-        print("[DEBUG] fetch_schema_text: Filtering for tables:", only_tables)
-        print("[DEBUG] fetch_schema_text: Available tables after filtering:", list(tables.keys()))
-    else:
-        print("[DEBUG] fetch_schema_text: No filtering, using all tables.")
-
-    schema_strings = []
-    if only_tables:
-        for table in only_tables:
-            if table in tables:
-                cols = ",\n    ".join(tables[table])
-                schema_strings.append(f"CREATE TABLE {schema}.{table} (\n    {cols}\n);")
-    else:
-        for table, columns in tables.items():
-            cols = ",\n    ".join(columns)
-            schema_strings.append(f"CREATE TABLE {schema}.{table} (\n    {cols}\n);")
-    return "\n\n".join(schema_strings)
\ No newline at end of file
+    with _catalogs_lock:
+        catalog = _catalogs.get(schema)
+        if catalog is None:
+            catalog = SchemaCatalog(
+                get_pool().connection, schema,
+                ttl=SCHEMA_CACHE_TTL,
+                check_interval=SCHEMA_CHECK_INTERVAL,
+                aconnect=get_async_pool().connection
+            )
+            _catalogs[schema] = catalog
+    return catalog
+
+def invalidate_schema_cache(schema=None):
+    """Force the next fetch_schema_text call to reload the catalog."""
+    get_schema_catalog(schema).invalidate()
+
+def _load_stored_index(catalog, live_signature):
+    stored = SchemaIndex.load(SCHEMA_INDEX_PATH)
+    if stored is not None and stored.schema == catalog.schema and stored.version == live_signature:
+        catalog.seed(stored.table_columns, stored.foreign_keys, stored.version)
+        return stored
+    return None
+
+def _install_index(catalog, snapshot):
+    global _index
+    tables, foreign_keys, version = snapshot
+    if _index is None or _index.version != version:
+        _index = SchemaIndex(tables, foreign_keys, schema=catalog.schema, version=version)
+        try:
+            _index.save(SCHEMA_INDEX_PATH)
+        except OSError as e:
+            debug_trace.warn("schema", "persist_index_failed", lambda: {"error": str(e)})
+    if table_selector.get_schema_index() is not _index:
+        table_selector.set_schema_index(_index)
+    return _index
+
+def get_schema_index():
+    """
+    Return the selector index for DB_SCHEMA, derived from the live catalog.
+
+    On a cold process the persisted index is reused when its DDL signature
+    still matches the database, which also seeds the schema catalog and skips
+    the information_schema scan. Otherwise the index is rebuilt from the
+    catalog and written back to SCHEMA_INDEX_PATH. The result is installed as
+    the table selector's active index.
+    """
+    global _index
+    catalog = get_schema_catalog()
+    with _index_lock:
+        if _index is None:
+            _index = _load_stored_index(catalog, catalog.fetch_signature())
+        return _install_index(catalog, catalog.snapshot())
+
+async def aget_schema_index():
+    """Async get_schema_index: catalog checks and reloads go through asyncpg."""
+    global _index
+    catalog = get_schema_catalog()
+    if _index is None:
+        stored = _load_stored_index(catalog, await catalog.afetch_signature())
+        with _index_lock:
+            _index = _index or stored
+    snapshot = await catalog.asnapshot()
+    with _index_lock:
+        return _install_index(catalog, snapshot)
+
+def _debug_filtering(catalog_tables, only_tables):
+    debug_trace.debug("schema", "fetch_schema_text", lambda: {
+        "only_tables": only_tables,
+        "available": [t for t in catalog_tables if t in only_tables] if only_tables else "all"
+    })
+
+def fetch_schema_text(schema=None, only_tables=None):
+    catalog = get_schema_catalog(schema)
+    text = catalog.render(only_tables)
+    _debug_filtering(catalog.tables(), only_tables)
+    return text
+
+async def afetch_schema_text(schema=None, only_tables=None):
+    catalog = get_schema_catalog(schema)
+    text = await catalog.arender(only_tables)
+    tables, _, _ = await catalog.asnapshot()
+    _debug_filtering(tables, only_tables)
+    return text
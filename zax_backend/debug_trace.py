@@ -0,0 +1,180 @@
+import atexit
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Structured debug tracing for the request path. Call sites pass a component,
+# an event name and a payload; a callable payload is only called when the
+# event is actually emitted, and records are turned into JSON lines on the
+# sink's background thread, never on the request thread. Below the
+# configured level (WARN by default) a call is one comparison.
+#
+#   debug_trace.debug("selector", "keywords", lambda: {"keywords": keywords})
+#
+# DEBUG/INFO events of a request are emitted only when the request was
+# sampled (see request()); WARN and ERROR always are.
+DEBUG, INFO, WARN, ERROR, OFF = 10, 20, 30, 40, 100
+LEVELS = {"debug": DEBUG, "info": INFO, "warn": WARN, "warning": WARN, "error": ERROR, "off": OFF}
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARN: "warn", ERROR: "error"}
+
+_level = WARN
+_sample_rate = 1.0
+_sink = None
+_sink_lock = threading.Lock()
+_sink_path = None
+_sink_is_default = True  # _sink is (or will lazily be) the BufferedSink for _sink_path
+_request = ContextVar("zax_debug_request", default=None)  # (request id, sampled)
+
+
+class BufferedSink:
+    """
+    Writes records as JSON lines from a daemon thread. Request threads only
+    append to a bounded buffer; once `max_pending` records are waiting, new
+    ones are dropped and counted in `dropped` instead of blocking.
+    """
+
+    def __init__(self, stream=None, max_pending=10000, flush_interval=0.2):
+        self.stream = stream or sys.stdout
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._pending = deque()
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def put(self, record):
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append(record)
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="zax-debug-trace", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Format and write everything buffered so far."""
+        with self._write_lock:
+            lines = []
+            while self._pending:
+                lines.append(json.dumps(self._pending.popleft(), default=str))
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                except (OSError, ValueError):
+                    self.dropped += len(lines)
+
+
+def _get_sink():
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                stream = open(_sink_path, "a", buffering=1) if _sink_path else None
+                _sink = BufferedSink(stream)
+                atexit.register(_sink.flush)
+    return _sink
+
+
+def configure(level="warn", sample_rate=1.0, path=None, sink=None):
+    """
+    Set the minimum level ("debug", "info", "warn", "error" or "off"), the
+    fraction of requests whose DEBUG/INFO events are kept, and where records
+    go: `path` appends JSON lines to a file, otherwise stdout. `sink` replaces
+    the sink outright (anything with put(record)).
+    """
+    global _level, _sample_rate, _sink, _sink_path, _sink_is_default
+    _level = LEVELS[level.lower()] if isinstance(level, str) else level
+    _sample_rate = sample_rate
+    with _sink_lock:
+        # A custom sink is dropped again by the next configure() without one
+        if sink is not None or path != _sink_path or not _sink_is_default:
+            if _sink is not None and hasattr(_sink, "flush"):
+                _sink.flush()
+            _sink, _sink_path, _sink_is_default = sink, path, sink is None
+
+
+def enabled(level):
+    """Whether an event at `level` would be emitted in the current request."""
+    if level < _level:
+        return False
+    if level >= WARN:
+        return True
+    request = _request.get()
+    return request is None or request[1]
+
+
+@contextmanager
+def request(request_id=None):
+    """
+    Scope one request: decides once whether its DEBUG/INFO events are
+    sampled (DEBUG_TRACE_SAMPLE_RATE) and tags every record with the request id.
+    Events outside any request scope are not sampled out.
+    """
+    sampled = _sample_rate >= 1.0 or random.random() < _sample_rate
+    token = _request.set((str(request_id) if request_id is not None else uuid.uuid4().hex[:12], sampled))
+    try:
+        yield
+    finally:
+        try:
+            _request.reset(token)
+        except ValueError:
+            # Generator closed from another context (e.g. a finished stream finalised elsewhere)
+            pass
+
+
+def emit(level, component, event, payload=None):
+    if not enabled(level):
+        return
+    if callable(payload):
+        payload = payload()
+    request = _request.get()
+    record = {"ts": time.time(), "level": LEVEL_NAMES.get(level, level), "component": component, "event": event}
+    if request is not None:
+        record["request"] = request[0]
+    if payload is not None:
+        record["data"] = payload
+    _get_sink().put(record)
+
+
+def debug(component, event, payload=None):
+    if _level > DEBUG:
+        return
+    emit(DEBUG, component, event, payload)
+
+
+def info(component, event, payload=None):
+    if _level > INFO:
+        return
+    emit(INFO, component, event, payload)
+
+
+def warn(component, event, payload=None):
+    if _level > WARN:
+        return
+    emit(WARN, component, event, payload)
+
+
+def error(component, event, payload=None):
+    if _level > ERROR:
+        return
+    emit(ERROR, component, event, payload)
@@ -0,0 +1,170 @@
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from table_selector import STOPWORDS, singular
+from schema_renderer import estimate_tokens
+import debug_trace
+
+# Hashed feature space for question terms, term bigrams and selected tables
+DIMENSIONS = 1 << 20
+
+
+def _terms(question):
+    words = [singular(w) for w in re.findall(r"\w+", question.lower()) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def features(question, tables=()):
+    """Hashed term counts of a question plus one feature per selected table."""
+    tokens = _terms(question) + [f"table:{t}" for t in tables]
+    return Counter(zlib.crc32(token.encode()) % DIMENSIONS for token in tokens)
+
+
+def format_examples(examples):
+    """The EXAMPLES block of the generation prompt."""
+    if not examples:
+        return "(no similar examples)"
+    return "\n\n".join(f"Q: {e['question']}\nA:\n{e['sql'].strip()}" for e in examples)
+
+
+class ExampleStore:
+    """
+    Few-shot question/SQL examples with a hashing TF-IDF index over the
+    question terms and tables. `select` returns the most similar examples
+    that fit a token budget; `add` learns pairs that executed successfully.
+    Seed examples are never evicted; learned ones are dropped LRU beyond
+    `max_entries` and persisted as JSON at `path` when given (written
+    outside the lock, so `select` never waits on disk I/O).
+    """
+
+    def __init__(self, seed=(), max_entries=500, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._version = 0  # bumped on every add; a snapshot older than the saved one is not written
+        self._saved_version = 0
+        self._examples = OrderedDict()  # normalised question -> example dict
+        self._features = {}  # normalised question -> Counter of hashed features
+        self._df = Counter()  # hashed feature -> number of examples containing it
+        self._postings = {}  # hashed feature -> set of normalised questions
+        for example in seed:
+            self._insert(dict(example, seed=True))
+        if path:
+            self._load()
+
+    def __len__(self):
+        return len(self._examples)
+
+    def add(self, question, sql, tables=()):
+        """Store a question/SQL pair that executed successfully (replacing an earlier SQL for it)."""
+        if not question.strip() or not sql.strip():
+            return
+        with self._lock:
+            key = self._key(question)
+            if key in self._examples and self._examples[key].get("seed"):
+                return
+            self._insert({"question": question.strip(), "sql": sql.strip(), "tables": sorted(tables)})
+            learned = [k for k, e in self._examples.items() if not e.get("seed")]
+            for stale in learned[:max(0, len(learned) - self.max_entries)]:
+                self._remove(stale)
+            self._version += 1
+            version = self._version
+            snapshot = [e for e in self._examples.values() if not e.get("seed")] if self.path else None
+        if snapshot is not None:
+            self._save(version, snapshot)
+
+    def select(self, question, tables=(), k=3, budget_tokens=0):
+        """
+        The `k` examples most similar to the question (cosine over TF-IDF
+        weighted hashed features), skipping any that would push the total past
+        `budget_tokens` (0 = no limit). Examples sharing no feature are never
+        returned.
+        """
+        query = features(question, tables)
+        with self._lock:
+            n = len(self._examples)
+
+            def idf(f):
+                return math.log((1 + n) / (1 + self._df[f])) + 1
+
+            candidates = set().union(*(self._postings.get(f, ()) for f in query))
+            query_norm = math.sqrt(sum((c * idf(f)) ** 2 for f, c in query.items())) or 1.0
+            scored = []
+            for key in candidates:
+                vector = self._features[key]
+                dot = sum(c * vector[f] * idf(f) ** 2 for f, c in query.items() if f in vector)
+                norm = math.sqrt(sum((c * idf(f)) ** 2 for f, c in vector.items()))
+                scored.append((dot / (query_norm * norm), key))
+            scored.sort(key=lambda s: -s[0])
+            chosen, used = [], 0
+            for _, key in scored:
+                if len(chosen) >= k:
+                    break
+                example = self._examples[key]
+                cost = estimate_tokens(format_examples([example])) + 1
+                if budget_tokens and used + cost > budget_tokens:
+                    continue
+                chosen.append(example)
+                used += cost
+            for example in chosen:
+                self._examples.move_to_end(self._key(example["question"]))
+            return chosen
+
+    @staticmethod
+    def _key(question):
+        return " ".join(question.lower().split()).rstrip("?.! ")
+
+    def _insert(self, example):
+        key = self._key(example["question"])
+        if key in self._examples:
+            self._remove(key)
+        vector = features(example["question"], example.get("tables", ()))
+        self._examples[key] = example
+        self._features[key] = vector
+        for f in vector:
+            self._df[f] += 1
+            self._postings.setdefault(f, set()).add(key)
+
+    def _remove(self, key):
+        del self._examples[key]
+        for f in self._features.pop(key):
+            self._df[f] -= 1
+            self._postings[f].discard(key)
+            if not self._df[f]:
+                del self._df[f]
+                del self._postings[f]
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for example in data[-self.max_entries:]:
+            if not self._examples.get(self._key(example["question"]), {}).get("seed"):
+                self._insert(example)
+
+    def _save(self, version, data):
+        with self._save_lock:
+            if version < self._saved_version:
+                return
+            self._write(data)
+            self._saved_version = version
+
+    def _write(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            os.unlink(tmp_path)
+            debug_trace.warn("examples", "persist_failed", lambda: {"path": self.path, "error": str(e)})
@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = ("config", "tools", "workflow", "streaming", "server")
+
+# Child process: time the import, then (optionally) one first-use call such as workflow.get_app
+CHILD = """
+import importlib, json, sys, time
+started = time.perf_counter()
+try:
+    module = importlib.import_module(sys.argv[1])
+except Exception as e:
+    print(json.dumps({"error": f"{type(e).__name__}: {e}"}))
+    sys.exit(0)
+report = {"import_s": time.perf_counter() - started}
+if sys.argv[2]:
+    started = time.perf_counter()
+    try:
+        getattr(module, sys.argv[2])()
+        report["first_use_s"] = time.perf_counter() - started
+    except Exception as e:
+        report["first_use_error"] = f"{type(e).__name__}: {e}"
+print(json.dumps(report))
+"""
+
+
+def parse_importtime(stderr, top=10):
+    """The `top` slowest imports from `python -X importtime` output as (package, cumulative ms)."""
+    roots = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Only top-level imports ("| name", one space): nested ones are inside their parent's time
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            roots[name.strip()] = int(cumulative) / 1000
+    return sorted(roots.items(), key=lambda item: -item[1])[:top]
+
+
+def profile(module, first_use="", repeat=3, env=None):
+    """Median import (and first-use) time of `module` over `repeat` fresh interpreters."""
+    runs, slowest = [], []
+    for _ in range(repeat):
+        child = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD, module, first_use],
+            capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        lines = child.stdout.strip().splitlines()
+        run = json.loads(lines[-1]) if lines else {"error": child.stderr.strip().splitlines()[-1:]}
+        if "error" in run:
+            return {"module": module, "error": run["error"]}
+        runs.append(run)
+        slowest = parse_importtime(child.stderr)
+    report = {"module": module, "import_s": statistics.median(r["import_s"] for r in runs), "slowest_imports_ms": slowest}
+    first = [r["first_use_s"] for r in runs if "first_use_s" in r]
+    if first:
+        report["first_use"] = first_use
+        report["first_use_s"] = statistics.median(first)
+    elif first_use and runs:
+        report["first_use_error"] = runs[-1].get("first_use_error")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cold-start report: import time of each backend module in a fresh interpreter, "
+                    "its slowest transitive imports, and optionally the cost of a first-use call."
+    )
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES))
+    parser.add_argument("--first-use", default="",
+                        help="module attribute to call after importing, e.g. get_app for workflow")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-database", action="store_true",
+                        help="unset DATABASE_URL to check the modules import without a database")
+    args = parser.parse_args()
+    env = dict(os.environ)
+    if args.no_database:
+        env.pop("DATABASE_URL", None)
+    reports = [profile(m, args.first_use, args.repeat, env) for m in args.modules]
+    for r in reports:
+        if "error" in r:
+            print(f"{r['module']:>12}  FAILED: {r['error']}")
+            continue
+        line = f"{r['module']:>12}  import={r['import_s'] * 1000:8.1f}ms"
+        if "first_use_s" in r:
+            line += f"  {r['first_use']}()={r['first_use_s'] * 1000:8.1f}ms"
+        print(line + "  slowest: " + ", ".join(f"{name} {ms:.0f}ms" for name, ms in r["slowest_imports_ms"][:3]))
+    print(json.dumps(reports, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import threading
+
+
+class Lazy:
+    """
+    Thread-safe, build-once holder for a heavyweight object: `get()` runs
+    `build` on first use (concurrent first callers wait for the one build)
+    and returns the same object afterwards. A failed build is not cached,
+    so the next call retries.
+    """
+
+    def __init__(self, build):
+        self._build = build
+        self._lock = threading.Lock()
+        self._value = None
+        self._built = False
+
+    def get(self):
+        if self._built:
+            return self._value
+        with self._lock:
+            if not self._built:
+                self._value = self._build()
+                self._built = True
+        return self._value
+
+    def built(self):
+        return self._built
+
+    def reset(self):
+        """Forget the built object; the next get() builds a new one."""
+        with self._lock:
+            self._value = None
+            self._built = False
@@ -1,3 +1,5 @@
+import asyncio
+import sys
 from workflow import app
 
 if __name__ == "__main__":
@@ -6,6 +8,9 @@ if __name__ == "__main__":
         "last_query_result": None,
         "last_sql": ""
     }
-    response = app.invoke(query)
+    if "--async" in sys.argv:
+        response = asyncio.run(app.ainvoke(query))
+    else:
+        response = app.invoke(query)
     # Print only the final formatted answer message!
-    print(response["messages"][-1].content)
\ No newline at end of file
+    print(response["messages"][-1].content)
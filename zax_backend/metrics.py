@@ -0,0 +1,348 @@
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+# Latency buckets in seconds, from a cached lookup up to a slow LLM round trip
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_enabled = False
+_trace_dir = None
+_hook_registered = False  # configure hooks cannot be removed: the handler checks _enabled instead
+_NOOP = nullcontext()
+_current_trace = ContextVar("zax_current_trace", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms keyed by name and labels, rendered
+    in the Prometheus text exposition format. Names ending in `_total` are
+    counters; histograms are in seconds.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, metric, value=1, **labels):
+        key = (metric, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, metric, value, **labels):
+        key = (metric, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def counter(self, metric, **labels):
+        with self._lock:
+            return self._counters.get((metric, _labels(labels)), 0)
+
+    def histogram(self, metric, **labels):
+        with self._lock:
+            return self._histograms.get((metric, _labels(labels)))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def prometheus_text(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            lines, typed = [], set()
+            for (name, labels), value in counters:
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), histogram in histograms:
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class Trace:
+    """Spans recorded while one request ran, as offsets from its start."""
+
+    def __init__(self, request_id=None):
+        self.request_id = str(request_id) if request_id is not None else uuid.uuid4().hex
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans = []
+
+    def add(self, kind, name, started, seconds, **attrs):
+        span = {"kind": kind, "name": name, "start_ms": (started - self._t0) * 1000, "ms": seconds * 1000, **attrs}
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start_ms"])
+        return {
+            "request_id": self.request_id,
+            "started_at": self.started_at,
+            "ms": (time.perf_counter() - self._t0) * 1000,
+            "spans": spans,
+        }
+
+
+def enabled():
+    return _enabled
+
+
+def record_span(kind, name, started, seconds, error=False):
+    """Record a finished span in the latency histogram and the current request's trace."""
+    registry.observe("zax_span_seconds", seconds, kind=kind, name=name)
+    if error:
+        registry.inc("zax_span_errors_total", kind=kind, name=name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(kind, name, started, seconds, **({"error": True} if error else {}))
+
+
+class _Span:
+    __slots__ = ("kind", "name", "started")
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_span(self.kind, self.name, self.started, time.perf_counter() - self.started, error=exc_type is not None)
+        return False
+
+
+def span(kind, name):
+    """Context manager timing one operation (e.g. span("db", "query")); a shared no-op when disabled."""
+    if not _enabled:
+        return _NOOP
+    return _Span(kind, name)
+
+
+def inc(metric, value=1, **labels):
+    if _enabled:
+        registry.inc(metric, value, **labels)
+
+
+def record_cache(cache, hit):
+    """Count one lookup in `cache`; the hit rate is hits / (hits + misses)."""
+    if _enabled:
+        registry.inc("zax_cache_requests_total", cache=cache, outcome="hit" if hit else "miss")
+
+
+def record_retry(kind):
+    if _enabled:
+        registry.inc("zax_retries_total", kind=kind)
+
+
+class _TraceScope:
+    def __init__(self, request_id):
+        self.trace = Trace(request_id)
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_trace.set(self.trace)
+        return self.trace
+
+    def __exit__(self, *exc):
+        try:
+            _current_trace.reset(self._token)
+        except ValueError:
+            # Generator closed from another context; the trace is finished either way
+            pass
+        if _trace_dir:
+            path = os.path.join(_trace_dir, f"{self.trace.request_id}.json")
+            with open(path, "w") as f:
+                json.dump(self.trace.to_dict(), f, indent=2)
+        return False
+
+
+def trace_request(request_id=None):
+    """
+    Collect the spans of one request; yields the Trace (None when metrics
+    are disabled). With a trace directory configured the trace is written
+    there as <request_id>.json when the request finishes.
+    """
+    if not _enabled:
+        return _NOOP
+    return _TraceScope(request_id)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback timing every graph node, tool and LLM call and
+    counting LLM tokens. It is registered as a configure hook, so every
+    run picks it up without passing callbacks around.
+    """
+
+    run_inline = True
+    raise_error = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs = {}
+
+    def _start(self, run_id, kind, name):
+        if not _enabled:
+            return
+        with self._lock:
+            self._runs[run_id] = (kind, name, time.perf_counter())
+
+    def _end(self, run_id, error=False):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is not None:
+            kind, name, started = run
+            record_span(kind, name, started, time.perf_counter() - started, error=error)
+        return run
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node's own run; chains nested inside a node share its metadata
+        if node and kwargs.get("name") == node:
+            self._start(run_id, "node", node)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, "tool", (serialized or {}).get("name") or kwargs.get("name") or "tool")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "llm", kwargs.get("name") or "chat_model")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, "llm", kwargs.get("name") or "llm")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        if self._end(run_id) is None:
+            return
+        registry.inc("zax_llm_calls_total")
+        prompt, completion = _token_usage(response)
+        if prompt:
+            registry.inc("zax_llm_tokens_total", prompt, kind="prompt")
+        if completion:
+            registry.inc("zax_llm_tokens_total", completion, kind="completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        if self._end(run_id, error=True) is not None:
+            registry.inc("zax_llm_calls_total")
+
+
+def _token_usage(response):
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+    if not (prompt or completion):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt, completion = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    return prompt, completion
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host="0.0.0.0"):
+    """Serve GET /metrics on a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"[METRICS] Serving /metrics on port {server.server_address[1]}")
+    return server
+
+
+def configure(enabled=False, trace_dir=None, port=0):
+    """
+    Turn instrumentation on or off. While disabled, span() and the counters
+    are no-ops and the LangChain callback handler records nothing.
+    """
+    global _enabled, _trace_dir, _hook_registered
+    _trace_dir = trace_dir
+    if trace_dir:
+        os.makedirs(trace_dir, exist_ok=True)
+    if enabled and not _hook_registered:
+        register_configure_hook(ContextVar("zax_metrics_callback", default=MetricsCallbackHandler()), inheritable=True)
+        _hook_registered = True
+    _enabled = enabled
+    if enabled and port:
+        serve_metrics(port)
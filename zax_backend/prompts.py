@@ -17,34 +17,37 @@ query_check_prompt = ChatPromptTemplate.from_messages([
     ("placeholder", "{messages}")
 ])
 
-# UPDATED: With advanced window function and nested subquery examples!
-query_gen_system_prompt = """
-You are a PostgreSQL expert. Your ONLY job is to generate a single, complete, and syntactically correct PostgreSQL query that answers the input question.
-
-DATABASE SCHEMA:
-{schema}
-
-EXAMPLES:
-
-Q: Show the average rating of suppliers by country.
-A:
+# Seed few-shot examples for query_gen_prompt. The generation node picks the
+# most similar ones (plus pairs learned from successful queries) per question
+# through example_store.ExampleStore and fills them in as {examples}.
+SEED_EXAMPLES = [
+    {
+        "question": "Show the average rating of suppliers by country.",
+        "tables": ["suppliers"],
+        "sql": """
 SELECT country, AVG(rating) AS avg_rating
 FROM info.suppliers
 GROUP BY country
 ORDER BY avg_rating DESC
 LIMIT 5;
-
-Q: List the top 3 customers by total amount spent.
-A:
+""",
+    },
+    {
+        "question": "List the top 3 customers by total amount spent.",
+        "tables": ["customers", "orders"],
+        "sql": """
 SELECT c.customer_id, c.first_name, c.last_name, SUM(o.total_amount) as total_spent
 FROM info.customers c
 JOIN info.orders o ON c.customer_id = o.customer_id
 GROUP BY c.customer_id, c.first_name, c.last_name
 ORDER BY total_spent DESC
 LIMIT 3;
-
-Q: Identify the products that show a consistent month-over-month revenue growth in the last 4 months.
-A:
+""",
+    },
+    {
+        "question": "Identify the products that show a consistent month-over-month revenue growth in the last 4 months.",
+        "tables": ["products", "order_details", "orders"],
+        "sql": """
 SELECT p.product_id, p.product_name
 FROM info.products p
 JOIN info.order_details od ON p.product_id = od.product_id
@@ -60,9 +63,12 @@ HAVING bool_and(
     SUM(od.final_amount) FILTER (WHERE date_trunc('month', o.order_date) = date_trunc('month', CURRENT_DATE) - INTERVAL '1 month')
 )
 LIMIT 5;
-
-Q: Categorize each supplier as Top, Average, or Low performer based on total revenue from their products.
-A:
+""",
+    },
+    {
+        "question": "Categorize each supplier as Top, Average, or Low performer based on total revenue from their products.",
+        "tables": ["suppliers", "products", "order_details"],
+        "sql": """
 SELECT
   s.supplier_id,
   s.company_name,
@@ -90,9 +96,12 @@ JOIN info.order_details od ON p.product_id = od.product_id
 GROUP BY s.supplier_id, s.company_name
 ORDER BY total_revenue DESC
 LIMIT 5;
-
-Q: For each customer, show their total spend and their rank among all customers by total spend (window function).
-A:
+""",
+    },
+    {
+        "question": "For each customer, show their total spend and their rank among all customers by total spend (window function).",
+        "tables": ["customers", "orders"],
+        "sql": """
 SELECT
   c.customer_id,
   c.first_name,
@@ -104,9 +113,12 @@ JOIN info.orders o ON c.customer_id = o.customer_id
 GROUP BY c.customer_id, c.first_name, c.last_name
 ORDER BY total_spent DESC
 LIMIT 5;
-
-Q: Find customers who have purchased ALL products in the 'Electronics' category (nested subquery).
-A:
+""",
+    },
+    {
+        "question": "Find customers who have purchased ALL products in the 'Electronics' category (nested subquery).",
+        "tables": ["customers", "products", "orders", "order_details"],
+        "sql": """
 SELECT c.customer_id, c.first_name, c.last_name
 FROM info.customers c
 WHERE NOT EXISTS (
@@ -119,6 +131,19 @@ WHERE NOT EXISTS (
       )
 )
 LIMIT 5;
+""",
+    },
+]
+
+query_gen_system_prompt = """
+You are a PostgreSQL expert. Your ONLY job is to generate a single, complete, and syntactically correct PostgreSQL query that answers the input question.
+
+DATABASE SCHEMA:
+{schema}
+
+EXAMPLES:
+
+{examples}
 
 STRICT INSTRUCTIONS:
 - Output ONLY the SQL query. DO NOT include explanations, tool calls, function calls (such as SubmitFinalAnswer), code blocks, or any answer or commentary.
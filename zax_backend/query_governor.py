@@ -0,0 +1,68 @@
+import json
+from collections import namedtuple
+import sqlglot
+from sqlglot.errors import SqlglotError
+import debug_trace
+
+# Planner estimates of the top plan node, from EXPLAIN (FORMAT JSON)
+PlanEstimate = namedtuple("PlanEstimate", ["startup_cost", "total_cost", "rows"])
+
+# What to run instead of the original SQL: `sql` (possibly rewritten with a
+# LIMIT) or, when `error` is set, nothing at all; `cost` is the estimate the
+# decision was based on (after the LIMIT, if one was injected)
+Decision = namedtuple("Decision", ["sql", "error", "limited", "cost"])
+
+EXPLAIN_PREFIX = "EXPLAIN (FORMAT JSON) "
+
+
+def plan_estimate(explain_output):
+    """Parse EXPLAIN (FORMAT JSON) output (JSON text or the decoded list)."""
+    if isinstance(explain_output, (str, bytes)):
+        explain_output = json.loads(explain_output)
+    plan = explain_output[0]["Plan"]
+    return PlanEstimate(float(plan["Startup Cost"]), float(plan["Total Cost"]), float(plan["Plan Rows"]))
+
+
+def with_limit(sql, limit):
+    """`sql` with its outermost LIMIT set to `limit`."""
+    try:
+        statement = sqlglot.parse_one(sql, read="postgres")
+        return statement.limit(limit).sql(dialect="postgres")
+    except (SqlglotError, AttributeError):
+        return f"SELECT * FROM ({sql}) AS limited LIMIT {int(limit)}"
+
+
+class QueryGovernor:
+    """
+    Decides from the planner's estimates whether generated SQL may run.
+
+    Queries expected to return more than `max_rows` rows get a LIMIT of
+    `limit_rows` injected; the cost is then re-estimated the way Postgres
+    costs a Limit node (startup plus the fetched fraction of the run cost).
+    Queries whose (limited) cost still exceeds `max_cost` are rejected with
+    an error the correction prompt can act on. A threshold of 0 disables
+    that check.
+    """
+
+    def __init__(self, max_cost=1e6, max_rows=100000, limit_rows=10000):
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+        self.limit_rows = limit_rows
+
+    def review(self, sql, estimate):
+        cost = estimate.total_cost
+        limited = False
+        if self.max_rows and estimate.rows > self.max_rows:
+            limited = True
+            fraction = min(1.0, self.limit_rows / estimate.rows)
+            cost = estimate.startup_cost + (estimate.total_cost - estimate.startup_cost) * fraction
+        if self.max_cost and cost > self.max_cost:
+            return Decision(None, (
+                f"Error: Query rejected before execution: estimated cost {cost:,.0f} exceeds the limit of "
+                f"{self.max_cost:,.0f} (about {estimate.rows:,.0f} rows). Add the missing join conditions and "
+                f"selective filters, or aggregate instead of returning raw rows."
+            ), limited, cost)
+        if limited:
+            debug_trace.info("governor", "inject_limit", lambda: {"estimated_rows": estimate.rows, "limit": self.limit_rows})
+            return Decision(with_limit(sql, self.limit_rows), None, True, cost)
+        return Decision(sql, None, False, cost)
@@ -0,0 +1,222 @@
+import sys
+from array import array
+from langchain_community.utilities.sql_database import truncate_word
+
+FETCH_CHUNK_ROWS = 1000
+MAX_STRING_LENGTH = 300  # same truncation SQLDatabase.run applies to string values
+
+# Postgres type OIDs (psycopg2 cursor.description type_code) -> type name
+PG_TYPE_NAMES = {
+    16: "boolean", 20: "bigint", 21: "smallint", 23: "integer", 25: "text", 700: "real",
+    701: "double precision", 1042: "character", 1043: "character varying", 1082: "date",
+    1083: "time", 1114: "timestamp", 1184: "timestamptz", 1700: "numeric", 2950: "uuid",
+    114: "json", 3802: "jsonb",
+}
+
+# Fixed-width types stored as packed arrays when the column has no NULLs
+_ARRAY_TYPECODES = {
+    "smallint": "q", "integer": "q", "bigint": "q", "int2": "q", "int4": "q", "int8": "q",
+    "real": "d", "double precision": "d", "float4": "d", "float8": "d",
+}
+
+
+def _column_types(description):
+    return [PG_TYPE_NAMES.get(d[1], str(d[1]) if d[1] is not None else "unknown") for d in description]
+
+
+def _compact(values, type_name):
+    typecode = _ARRAY_TYPECODES.get(type_name)
+    if typecode and values and None not in values:
+        try:
+            return array(typecode, values)
+        except (TypeError, OverflowError):
+            pass
+    return values
+
+
+class ResultBuilder:
+    """
+    Accumulates row chunks column by column until the row/byte budget is
+    spent. The byte budget is checked after each chunk, so it can be
+    overshot by at most one chunk. Rows offered past the budget are only
+    counted (`seen`), never stored.
+    """
+
+    def __init__(self, columns, types, max_rows=None, max_bytes=None):
+        self.columns = list(columns)
+        self.types = list(types)
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.rows = 0
+        self.bytes = 0
+        self.seen = 0
+        self.truncated = False
+        self._data = [[] for _ in self.columns]
+
+    @property
+    def full(self):
+        return ((self.max_rows is not None and self.rows >= self.max_rows)
+                or (self.max_bytes is not None and self.bytes >= self.max_bytes))
+
+    def add(self, chunk):
+        """Store a chunk of row tuples; returns False once the budget is spent."""
+        self.seen += len(chunk)
+        if self.full:
+            self.truncated = self.truncated or bool(chunk)
+            return False
+        if self.max_rows is not None and self.rows + len(chunk) > self.max_rows:
+            chunk = chunk[:self.max_rows - self.rows]
+            self.truncated = True
+        for column, values in zip(self._data, zip(*chunk)):
+            column.extend(values)
+            if self.max_bytes is not None:
+                self.bytes += sum(map(sys.getsizeof, values))
+        self.rows += len(chunk)
+        return not self.full
+
+    def build(self):
+        data = [_compact(values, t) for values, t in zip(self._data, self.types)]
+        return QueryResult(self.columns, self.types, data, self.rows, total_rows=self.seen, truncated=self.truncated)
+
+
+class QueryResult:
+    """
+    Result of one statement: column names and types plus the data stored
+    column by column (packed `array`s for NULL-free integer/float columns,
+    lists otherwise), or an error message on the separate `error` channel.
+
+    `row_count` rows are held; when a row/byte budget cut the fetch short
+    `truncated` is set and `total_rows` still gives the exact size of the
+    full result. When the query governor capped the statement with a LIMIT
+    the full size is unknown: `total_estimated` is set and `total_rows` is
+    the planner's estimate.
+
+    `str(result)` renders the classic SQLDatabase.run text (a repr of the
+    row tuples, "" when empty, the error text on failure); it is built
+    lazily on first use and memoised. `preview(n)` renders a bounded sample
+    for prompts.
+    """
+
+    __slots__ = ("columns", "types", "data", "row_count", "total_rows", "truncated", "total_estimated", "error",
+                 "_text", "_nbytes")
+
+    def __init__(self, columns=(), types=(), data=(), row_count=0, error=None, total_rows=None, truncated=False,
+                 total_estimated=False):
+        self.columns = tuple(columns)
+        self.types = tuple(types)
+        self.data = tuple(data)
+        self.row_count = row_count
+        self.total_rows = row_count if total_rows is None else total_rows
+        self.truncated = truncated
+        self.total_estimated = total_estimated
+        self.error = error
+        self._text = None
+        self._nbytes = None
+
+    @classmethod
+    def from_error(cls, message):
+        return cls(error=message)
+
+    @classmethod
+    def from_chunks(cls, columns, types, chunks, max_rows=None, max_bytes=None):
+        """Build from an iterable of row chunks, transposing each chunk straight into the columns."""
+        builder = ResultBuilder(columns, types, max_rows, max_bytes)
+        for chunk in chunks:
+            builder.add(chunk)
+        return builder.build()
+
+    @classmethod
+    def from_cursor(cls, cursor, chunk_rows=FETCH_CHUNK_ROWS, max_rows=None, max_bytes=None, count_rest=None):
+        """
+        Fetch from an executed DB-API cursor (plain or server-side) in
+        `chunk_rows` batches until the budget is spent. The rows past the
+        budget are counted with `count_rest()` when given (e.g. a server-side
+        MOVE), otherwise by draining the cursor chunk by chunk.
+        """
+        # Server-side (named) cursors only describe their columns after the first fetch
+        if cursor.description is None and getattr(cursor, "name", None) is None:
+            return cls()
+        chunk = cursor.fetchmany(chunk_rows)
+        if cursor.description is None:
+            return cls()
+        builder = ResultBuilder(*cls.describe(cursor), max_rows, max_bytes)
+        while chunk:
+            if not builder.add(chunk):
+                builder.add(cursor.fetchmany(1))
+                if builder.truncated:
+                    if count_rest is not None:
+                        builder.seen += count_rest()
+                    else:
+                        for rest in iter(lambda: cursor.fetchmany(chunk_rows), []):
+                            builder.seen += len(rest)
+                break
+            chunk = cursor.fetchmany(chunk_rows)
+        return builder.build()
+
+    @staticmethod
+    def describe(cursor_or_attributes):
+        """(columns, types) from a DB-API cursor or asyncpg statement attributes."""
+        description = getattr(cursor_or_attributes, "description", None)
+        if description is not None:
+            return [d[0] for d in description], _column_types(description)
+        return [a.name for a in cursor_or_attributes], [a.type.name for a in cursor_or_attributes]
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def rows(self):
+        """Iterate the rows as tuples, produced on demand."""
+        return zip(*self.data) if self.data else iter(())
+
+    def capped(self, estimated_rows):
+        """This result marked as cut short by an injected LIMIT, with the planner's row estimate as total."""
+        return QueryResult(self.columns, self.types, self.data, self.row_count,
+                           total_rows=max(int(estimated_rows), self.total_rows), truncated=True, total_estimated=True)
+
+    def to_dict(self):
+        """{column: [values]} for dataframe-style consumers."""
+        return {name: list(values) for name, values in zip(self.columns, self.data)}
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the column data (used by the result cache budget)."""
+        if self._nbytes is None:
+            total = sys.getsizeof(self)
+            for values in self.data:
+                total += sys.getsizeof(values)
+                if not isinstance(values, array):
+                    total += sum(sys.getsizeof(v) for v in values)
+            self._nbytes = total
+        return self._nbytes
+
+    def __str__(self):
+        if self._text is None:
+            if self.error is not None:
+                self._text = self.error
+            elif not self.row_count:
+                self._text = ""
+            else:
+                self._text = str([
+                    tuple(truncate_word(v, length=MAX_STRING_LENGTH) for v in row) for row in self.rows()
+                ])
+        return self._text
+
+    def preview(self, max_rows):
+        """
+        Text for prompts: the first `max_rows` rows in the str() format plus
+        a note with the exact row count when anything was left out.
+        """
+        if self.error is not None or self.row_count <= max_rows and not self.truncated:
+            return str(self)
+        sample = [tuple(truncate_word(v, length=MAX_STRING_LENGTH) for v in row)
+                  for _, row in zip(range(max_rows), self.rows())]
+        about = "about " if self.total_estimated else ""
+        return f"{sample}\n(showing {len(sample)} of {about}{self.total_rows} rows)"
+
+    def __repr__(self):
+        if self.error is not None:
+            return f"QueryResult(error={self.error!r})"
+        return (f"QueryResult(columns={list(self.columns)!r}, row_count={self.row_count}, "
+                f"total_rows={self.total_rows}, truncated={self.truncated}"
+                + (", total_estimated=True)" if self.total_estimated else ")"))
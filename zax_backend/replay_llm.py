@@ -0,0 +1,116 @@
+import asyncio
+import json
+import time
+from typing import Any
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Canned SQL for the synthetic benchmark schema (schema "info"). "fixed_sql"
+# is what the correction prompt gets back, so entries whose "sql" is wrong
+# exercise the validate -> correct -> execute path.
+DEFAULT_SCRIPT = [
+    {"question": "List products with stock level below 50",
+     "sql": "SELECT product_name, stock_level FROM info.products WHERE stock_level < 50 ORDER BY stock_level LIMIT 5"},
+    {"question": "Show the average rating of suppliers by country",
+     "sql": "SELECT country, AVG(rating) AS avg_rating FROM info.suppliers GROUP BY country ORDER BY avg_rating DESC LIMIT 5"},
+    {"question": "List the top 3 customers by total amount spent",
+     "sql": "SELECT c.customer_id, c.first_name, c.last_name, SUM(o.total_amount) AS total_spent "
+            "FROM info.customers c JOIN info.orders o ON c.customer_id = o.customer_id "
+            "GROUP BY c.customer_id, c.first_name, c.last_name ORDER BY total_spent DESC LIMIT 3"},
+    {"question": "List sales representatives and the number of orders they handled",
+     "sql": "SELECT r.sales_rep_id, r.first_name, r.last_name, COUNT(o.order_id) AS orders_handled "
+            "FROM info.sales_representative r JOIN info.orders o ON r.sales_rep_id = o.sales_rep_id "
+            "GROUP BY r.sales_rep_id, r.first_name, r.last_name ORDER BY orders_handled DESC LIMIT 5"},
+    {"question": "What is the total revenue per product category",
+     "sql": "SELECT p.category, SUM(od.final_amount) AS revenue "
+            "FROM info.products p JOIN info.order_details od ON p.product_id = od.product_id "
+            "GROUP BY p.category ORDER BY revenue DESC LIMIT 5"},
+    {"question": "How many orders were placed each month",
+     "sql": "SELECT date_trunc('month', order_date) AS month, COUNT(*) AS orders "
+            "FROM info.orders GROUP BY month ORDER BY month DESC LIMIT 5"},
+    {"question": "Which suppliers have the highest credit limit",
+     "sql": "SELECT company_name, credit_limit FROM info.suppliers ORDER BY credit_limit DESC LIMIT 5"},
+    {"question": "Which payment method is used most often",
+     "sql": "SELECT payment_type, COUNT(*) AS uses FROM info.orders GROUP BY payment_type ORDER BY uses DESC LIMIT 5",
+     "fixed_sql": "SELECT payment_method, COUNT(*) AS uses FROM info.orders "
+                  "GROUP BY payment_method ORDER BY uses DESC LIMIT 5"},
+]
+
+# Markers of the two SQL prompts in prompts.py
+_GENERATION_MARKER = "DATABASE SCHEMA:"
+_CORRECTION_MARKER = "Your previous SQL:"
+_EMPTY_SQL = "SELECT 1 WHERE 1 = 0"
+
+
+def normalize_question(question):
+    return " ".join(question.lower().split()).rstrip("?.! ")
+
+
+def load_script(path):
+    """Read a replay script: JSONL with "question", "sql" and optional "fixed_sql"/"answer"."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for the Groq chat model, for offline benchmarks
+    and tests. It replays canned SQL for known questions: the generation
+    prompt gets the entry's "sql", the correction prompt its "fixed_sql",
+    and any other prompt (the final answer) a fixed summary of the data it
+    was shown. Every call sleeps `latency_ms` to model the provider round
+    trip; token usage is reported as whitespace-separated words.
+    """
+
+    script: list = DEFAULT_SCRIPT
+    latency_ms: float = 0.0
+    lookup: dict = {}
+
+    def model_post_init(self, __context: Any) -> None:
+        self.lookup = {normalize_question(entry["question"]): entry for entry in self.script}
+
+    @classmethod
+    def from_file(cls, path=None, latency_ms=0.0):
+        return cls(script=load_script(path) if path else DEFAULT_SCRIPT, latency_ms=latency_ms)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools, **kwargs):
+        # Replies are plain text; the graph only reads message content
+        return self
+
+    def _reply(self, messages):
+        system = messages[0].content if messages and messages[0].type == "system" else ""
+        human = [m.content for m in messages if m.type == "human"]
+        entry = self.lookup.get(normalize_question(human[-1] if human else ""), {})
+        if _CORRECTION_MARKER in system:
+            return entry.get("fixed_sql") or entry.get("sql") or _EMPTY_SQL
+        if _GENERATION_MARKER in system:
+            return entry.get("sql") or _EMPTY_SQL
+        prompt = human[-1] if human else ""
+        data = prompt.partition("Database result:")[2].strip().split("\n")[0]
+        return entry.get("answer") or f"Here is what the database returned: {data[:200]}"
+
+    def _result(self, messages):
+        text = self._reply(messages)
+        prompt_tokens = sum(len(str(m.content).split()) for m in messages)
+        completion_tokens = len(text.split())
+        message = AIMessage(content=text, usage_metadata={
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return self._result(messages)
@@ -0,0 +1,192 @@
+import re
+import sys
+import threading
+import debug_trace
+import time
+from collections import OrderedDict
+
+# Per-table modification counters; cheap to read and bumped by every write.
+# They come from the statistics system, which lags writes by up to a few
+# seconds, so `max_staleness` bounds how old a served result can ever be.
+TABLE_VERSIONS_SQL = """
+    SELECT relname, n_tup_ins + n_tup_upd + n_tup_del
+    FROM pg_catalog.pg_stat_user_tables
+    WHERE schemaname = %s
+"""
+
+# Results of these change on every call and are never cached
+VOLATILE_FUNCTIONS = re.compile(r"\b(random|clock_timestamp|timeofday|nextval|setval|gen_random_uuid)\s*\(", re.I)
+
+_QUOTED_OR_PLAIN = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")|([^'"]+)""")
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+
+
+def normalize_sql(sql):
+    """
+    Cache key for a statement: whitespace collapsed and text lower-cased
+    outside quoted literals/identifiers, trailing semicolons removed.
+    """
+    parts = []
+    for quoted, plain in _QUOTED_OR_PLAIN.findall(sql.strip().rstrip(";").strip()):
+        parts.append(quoted if quoted else re.sub(r"\s+", " ", plain.lower()))
+    return "".join(parts).strip()
+
+
+def referenced_tables(sql, known_tables):
+    """Known table names that appear as identifiers anywhere in `sql`."""
+    known = set(known_tables)
+    return sorted({t for t in _IDENTIFIER.findall(normalize_sql(sql)) if t in known})
+
+
+def is_cacheable(sql):
+    return not VOLATILE_FUNCTIONS.search(sql)
+
+
+def pg_table_versions(connect, schema):
+    """Return {table: modification counter} for every user table in `schema`."""
+    with connect() as conn:
+        with conn.cursor() as cur:
+            cur.execute(TABLE_VERSIONS_SQL, (schema,))
+            return dict(cur.fetchall())
+
+
+async def apg_table_versions(aconnect, schema):
+    async with aconnect() as conn:
+        rows = await conn.fetch(TABLE_VERSIONS_SQL.replace("%s", "$1"), schema)
+    return {name: version for name, version in rows}
+
+
+def result_size(result):
+    nbytes = getattr(result, "nbytes", None)
+    return nbytes if nbytes is not None else sys.getsizeof(result)
+
+
+class ResultCache:
+    """
+    Bounded cache of query results keyed by normalised SQL.
+
+    Eviction is LRU against a byte budget (`max_bytes`). Every entry records
+    the tables it read and their data versions, as returned by
+    `version_source()`, taken before execution. A later lookup compares
+    them with the current versions (re-read at most every `check_interval`
+    seconds) and drops the entry when any of those tables changed or the
+    entry is older than `max_staleness` seconds.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_staleness=300.0, version_source=None, check_interval=1.0,
+                 async_version_source=None):
+        self.max_bytes = max_bytes
+        self.max_staleness = max_staleness
+        self.check_interval = check_interval
+        self._version_source = version_source
+        self._async_version_source = async_version_source
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (result, size, tables, versions, stored_at)
+        self._bytes = 0
+        self._versions = {}
+        self._versions_at = float("-inf")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def data_versions(self, tables, current=None):
+        """
+        Current data versions of `tables`; take these before executing the
+        query. Coroutines pass `current` from `acurrent_versions()` so the
+        sync version source is never queried on the event loop.
+        """
+        versions = self._current_versions() if current is None else current
+        return {t: versions.get(t) for t in tables}
+
+    def get(self, key, current=None):
+        now = time.monotonic()
+        current = self._current_versions() if current is None else current
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, _, tables, versions, stored_at = entry
+                if now - stored_at > self.max_staleness or any(current.get(t) != versions.get(t) for t in tables):
+                    self._drop(key)
+                    self.invalidations += 1
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result, tables=(), versions=None):
+        size = result_size(result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            while self._entries and self._bytes + size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+            self._entries[key] = (result, size, tuple(tables), dict(versions or {}), time.monotonic())
+            self._bytes += size
+
+    def invalidate_tables(self, tables):
+        """Drop every entry that read any of `tables`."""
+        tables = set(tables)
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if tables.intersection(e[2])]:
+                self._drop(key)
+                self.invalidations += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[1]
+
+    async def arefresh_versions(self):
+        """Re-read data versions through `async_version_source` if they are due."""
+        if self._async_version_source is None or time.monotonic() - self._versions_at < self.check_interval:
+            return
+        try:
+            self._versions = await self._async_version_source()
+        except Exception as e:
+            debug_trace.warn("result_cache", "table_versions_failed", lambda: {"error": str(e)})
+            self._versions = {}
+        self._versions_at = time.monotonic()
+
+    async def acurrent_versions(self):
+        """The data versions for the async path: refreshed only through `async_version_source`."""
+        await self.arefresh_versions()
+        return self._versions
+
+    def _current_versions(self):
+        if self._version_source is None:
+            return {}
+        now = time.monotonic()
+        if now - self._versions_at >= self.check_interval:
+            try:
+                self._versions = self._version_source()
+            except Exception as e:
+                # Without a freshness signal only max_staleness protects entries
+                debug_trace.warn("result_cache", "table_versions_failed", lambda: {"error": str(e)})
+                self._versions = {}
+            self._versions_at = now
+        return self._versions
@@ -0,0 +1,257 @@
+import asyncio
+import threading
+import time
+import weakref
+from collections import defaultdict
+
+COLUMNS_SQL = """
+    SELECT table_name, column_name, data_type
+    FROM information_schema.columns
+    WHERE table_schema = %s
+    ORDER BY table_name, ordinal_position
+"""
+
+FOREIGN_KEYS_SQL = """
+    SELECT con.conname, cl.relname, a.attname, fcl.relname, fa.attname
+    FROM pg_catalog.pg_constraint con
+    JOIN pg_catalog.pg_class cl ON cl.oid = con.conrelid
+    JOIN pg_catalog.pg_namespace n ON n.oid = cl.relnamespace
+    JOIN pg_catalog.pg_class fcl ON fcl.oid = con.confrelid
+    JOIN pg_catalog.pg_namespace fn ON fn.oid = fcl.relnamespace
+    CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY AS k(attnum, fattnum, ord)
+    JOIN pg_catalog.pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+    JOIN pg_catalog.pg_attribute fa ON fa.attrelid = con.confrelid AND fa.attnum = k.fattnum
+    WHERE con.contype = 'f' AND n.nspname = %s AND fn.nspname = n.nspname
+    ORDER BY cl.relname, con.conname, k.ord
+"""
+
+# Cheap DDL signal: any CREATE/ALTER/DROP on a table or column rewrites its
+# pg_class / pg_attribute row and therefore changes that row's xmin.
+# ANALYZE/VACUUM update pg_class in place and do not change the signature.
+# Foreign-key constraints are folded in so the selector's join graph follows.
+SIGNATURE_SQL = """
+    SELECT md5(coalesce((
+        SELECT string_agg(
+            c.oid::text || ':' || c.xmin::text || ':' || a.attnum::text || ':' || a.xmin::text,
+            ',' ORDER BY c.oid, a.attnum)
+        FROM pg_catalog.pg_class c
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_catalog.pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0
+        WHERE n.nspname = %(schema)s AND c.relkind IN ('r', 'v', 'm', 'p', 'f')
+    ), '') || '|' || coalesce((
+        SELECT string_agg(con.oid::text || ':' || con.xmin::text, ',' ORDER BY con.oid)
+        FROM pg_catalog.pg_constraint con
+        JOIN pg_catalog.pg_namespace n ON n.oid = con.connamespace
+        WHERE n.nspname = %(schema)s AND con.contype = 'f'
+    ), ''))
+"""
+
+MAX_RENDERED = 256
+
+
+def asyncpg_sql(sql):
+    """The catalog queries take one parameter; asyncpg spells it $1."""
+    return sql.replace("%(schema)s", "$1").replace("%s", "$1")
+
+
+class SchemaCatalog:
+    """
+    In-memory copy of the column catalog for one schema.
+
+    Column metadata is loaded once and served from memory. Every
+    `check_interval` seconds the catalog compares the DDL signature with the
+    one it loaded and reloads only if the schema changed; `ttl` forces a full
+    reload regardless, and `invalidate()` drops the cached copy immediately.
+    `connect` is a callable returning a context manager that yields a DB-API
+    connection; the optional `aconnect` returns an async context manager that
+    yields an asyncpg connection and backs the `a*` coroutine methods.
+    """
+
+    def __init__(self, connect, schema, ttl=300.0, check_interval=5.0, aconnect=None):
+        self.schema = schema
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._connect = connect
+        self._aconnect = aconnect
+        self._lock = threading.RLock()
+        self._alocks = weakref.WeakKeyDictionary()  # event loop -> asyncio.Lock for aensure_fresh
+        self._tables = None
+        self._foreign_keys = None
+        self._signature = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._rendered = {}
+
+    @property
+    def version(self):
+        """DDL signature of the currently loaded catalog."""
+        with self._lock:
+            self._ensure_fresh()
+            return self._signature
+
+    def tables(self):
+        """Return {table: [(column, data_type), ...]} in ordinal order."""
+        with self._lock:
+            self._ensure_fresh()
+            return self._tables
+
+    def foreign_keys(self):
+        """Return [(constraint, table, column, ref_table, ref_column), ...]."""
+        with self._lock:
+            self._ensure_fresh()
+            return self._foreign_keys
+
+    def snapshot(self):
+        """Return a consistent (tables, foreign_keys, signature) triple."""
+        with self._lock:
+            self._ensure_fresh()
+            return self._tables, self._foreign_keys, self._signature
+
+    def render(self, only_tables=None):
+        """Render CREATE TABLE statements, optionally limited to `only_tables`."""
+        with self._lock:
+            self._ensure_fresh()
+            return self._render_cached(only_tables)
+
+    async def arender(self, only_tables=None):
+        await self.aensure_fresh()
+        with self._lock:
+            return self._render_cached(only_tables)
+
+    async def asnapshot(self):
+        await self.aensure_fresh()
+        with self._lock:
+            return self._tables, self._foreign_keys, self._signature
+
+    def invalidate(self):
+        """Drop the cached catalog; the next access reloads it."""
+        with self._lock:
+            self._tables = None
+            self._foreign_keys = None
+            self._signature = None
+            self._rendered = {}
+
+    def refresh(self):
+        """Reload the catalog now."""
+        with self._lock:
+            self._load()
+
+    def fetch_signature(self):
+        """Query the live DDL signature without loading the catalog."""
+        with self._connect() as conn:
+            return self._fetch_signature(conn)
+
+    async def afetch_signature(self):
+        async with self._aconnect() as conn:
+            return await conn.fetchval(asyncpg_sql(SIGNATURE_SQL), self.schema)
+
+    def seed(self, tables, foreign_keys, signature):
+        """
+        Install a previously persisted catalog snapshot (e.g. from a SchemaIndex
+        file) so a warm process start does not rescan information_schema.
+        """
+        with self._lock:
+            self._tables = {t: [tuple(c) for c in cols] for t, cols in tables.items()}
+            self._foreign_keys = [tuple(fk) for fk in foreign_keys]
+            self._signature = signature
+            self._rendered = {}
+            self._loaded_at = self._checked_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        due = self._due()
+        if due == "load":
+            self._load()
+        elif due == "check":
+            signature = self.fetch_signature()
+            self._checked_at = time.monotonic()
+            if signature != self._signature:
+                self._load()
+
+    def _due(self):
+        # "load", "check" or None: what _ensure_fresh / aensure_fresh would do now
+        now = time.monotonic()
+        if self._tables is None or now - self._loaded_at >= self.ttl:
+            return "load"
+        if now - self._checked_at >= self.check_interval:
+            return "check"
+        return None
+
+    def _alock(self):
+        loop = asyncio.get_running_loop()
+        lock = self._alocks.get(loop)
+        if lock is None:
+            lock = self._alocks[loop] = asyncio.Lock()
+        return lock
+
+    async def aensure_fresh(self):
+        """
+        Async freshness check; reloads through `aconnect` without blocking the
+        loop. One coroutine per loop refreshes while the others wait for it.
+        """
+        if self._due() is None:
+            return
+        async with self._alock():
+            # Whoever held the lock may have refreshed already
+            due = self._due()
+            if due == "load":
+                await self._aload()
+            elif due == "check":
+                signature = await self.afetch_signature()
+                self._checked_at = time.monotonic()
+                if signature != self._signature:
+                    await self._aload()
+
+    async def _aload(self):
+        async with self._aconnect() as conn:
+            signature = await conn.fetchval(asyncpg_sql(SIGNATURE_SQL), self.schema)
+            rows = await conn.fetch(asyncpg_sql(COLUMNS_SQL), self.schema)
+            foreign_keys = await conn.fetch(asyncpg_sql(FOREIGN_KEYS_SQL), self.schema)
+        with self._lock:
+            self._install(rows, foreign_keys, signature)
+
+    def _load(self):
+        # Signature first: a DDL racing with the column scan can only cause
+        # one extra reload on the next check, never a missed change.
+        with self._connect() as conn:
+            signature = self._fetch_signature(conn)
+            with conn.cursor() as cur:
+                cur.execute(COLUMNS_SQL, (self.schema,))
+                rows = cur.fetchall()
+                cur.execute(FOREIGN_KEYS_SQL, (self.schema,))
+                foreign_keys = cur.fetchall()
+        self._install(rows, foreign_keys, signature)
+
+    def _install(self, rows, foreign_keys, signature):
+        tables = defaultdict(list)
+        for table, col, dtype in rows:
+            tables[table].append((col, dtype))
+        self._tables = dict(tables)
+        self._foreign_keys = [tuple(fk) for fk in foreign_keys]
+        self._signature = signature
+        self._rendered = {}
+        self._loaded_at = self._checked_at = time.monotonic()
+
+    def _fetch_signature(self, conn):
+        with conn.cursor() as cur:
+            cur.execute(SIGNATURE_SQL, {"schema": self.schema})
+            row = cur.fetchone()
+        return row[0] if row else None
+
+    def _render_cached(self, only_tables):
+        key = tuple(only_tables) if only_tables else None
+        text = self._rendered.get(key)
+        if text is None:
+            if len(self._rendered) >= MAX_RENDERED:
+                self._rendered.clear()
+            text = self._render(key)
+            self._rendered[key] = text
+        return text
+
+    def _render(self, only_tables):
+        names = only_tables if only_tables is not None else self._tables.keys()
+        schema_strings = []
+        for table in names:
+            if table in self._tables:
+                cols = ",\n    ".join(f"{col} {dtype}" for col, dtype in self._tables[table])
+                schema_strings.append(f"CREATE TABLE {self.schema}.{table} (\n    {cols}\n);")
+        return "\n\n".join(schema_strings)
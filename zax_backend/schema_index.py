@@ -0,0 +1,374 @@
+import json
+import os
+import tempfile
+from collections import deque, namedtuple
+
+INDEX_FORMAT = 1
+# Graphs up to this many tables get their full join-path closure at compile time
+JOIN_CLOSURE_PRECOMPUTE_LIMIT = 1000
+MAX_CACHED_TERMS = 4096
+ANALYTICAL_COLUMN_MARKERS = ("amount", "total", "subtotal", "final_amount", "order_date", "date")
+
+
+class SchemaIndex:
+    """
+    Precomputed selector metadata for one schema: tables, qualified columns and
+    the join graph. Built from the live catalog (or the bundled defaults),
+    persisted as JSON and reloaded without touching the database.
+
+    `table_columns` is {table: [(column, data_type), ...]} and `foreign_keys`
+    is [(constraint, table, column, ref_table, ref_column), ...], one row per
+    column pair, as returned by SchemaCatalog.
+    """
+
+    def __init__(self, table_columns, foreign_keys=(), schema=None, version=None, relationships=None):
+        self.schema = schema
+        self.version = version
+        self.table_columns = {t: [tuple(c) for c in cols] for t, cols in table_columns.items()}
+        self.foreign_keys = [tuple(fk) for fk in foreign_keys]
+        self.tables = list(self.table_columns)
+        self.columns_by_table = {t: [c for c, _ in cols] for t, cols in self.table_columns.items()}
+        self.columns = [f"{t}.{c}" for t, cols in self.columns_by_table.items() for c in cols]
+        if relationships is None:
+            relationships = relationships_from_foreign_keys(self.foreign_keys)
+        # {table: {neighbor: ((column, neighbor_column), ...)}}, both directions
+        self.relationships = {
+            t: {n: _join_pairs(keys) for n, keys in neighbors.items()}
+            for t, neighbors in relationships.items()
+        }
+
+        self._token_index = None
+        self._join_graph = None
+
+    @property
+    def join_graph(self):
+        """Shortest-join-path closure over `relationships` (built on first use)."""
+        if self._join_graph is None:
+            self._join_graph = JoinGraph(self.relationships)
+        return self._join_graph
+
+    def token_index(self, aliases, singular):
+        """Return the compiled TokenIndex for this schema (built once per alias map)."""
+        token_index = self._token_index
+        if token_index is None or token_index.aliases is not aliases:
+            token_index = self._token_index = TokenIndex(self, aliases, singular)
+        return token_index
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        tables, foreign_keys, version = catalog.snapshot()
+        return cls(tables, foreign_keys, schema=catalog.schema, version=version)
+
+    @classmethod
+    def from_columns(cls, columns, relationships, schema=None):
+        """Build from "table.column" names and a RELATIONSHIPS-style join graph."""
+        table_columns = {}
+        for col in columns:
+            table, colname = col.split(".", 1)
+            table_columns.setdefault(table, []).append((colname, None))
+        return cls(table_columns, schema=schema, relationships=relationships)
+
+    def to_dict(self):
+        return {
+            "format": INDEX_FORMAT,
+            "schema": self.schema,
+            "version": self.version,
+            "tables": self.table_columns,
+            "foreign_keys": self.foreign_keys,
+            "relationships": {
+                t: {n: [list(p) for p in pairs] for n, pairs in neighbors.items()}
+                for t, neighbors in self.relationships.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported schema index format: {data.get('format')!r}")
+        return cls(
+            data["tables"], data["foreign_keys"],
+            schema=data["schema"], version=data["version"],
+            relationships=data["relationships"]
+        )
+
+    def save(self, path):
+        """Atomically write the index to `path` as JSON."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.to_dict(), f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Load an index written by `save`; returns None if missing or unreadable."""
+        try:
+            with open(path) as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+class TokenIndex:
+    """
+    Inverted lookups used by the table selector so that matching a question
+    costs roughly O(keywords) instead of O(tables x columns x keywords):
+
+    - table name and singular forms -> tables
+    - alias phrases -> tables, via a multi-pattern PhraseMatcher
+    - keyword -> column names, via a trigram index over column names
+      (results are memoised per keyword)
+    - column name -> tables that have it
+    """
+
+    def __init__(self, index, aliases, singular):
+        self.aliases = aliases
+        self.strict_terms = {}
+        self.loose_terms = {}
+        for table in index.tables:
+            for term in (table, singular(table)):
+                self.strict_terms.setdefault(term, set()).add(table)
+            for term in (table, singular(table), table.rstrip("s")):
+                self.loose_terms.setdefault(term, set()).add(table)
+
+        present = {alias: table for alias, table in aliases.items() if table in index.columns_by_table}
+        self.alias_tables = present
+        self.alias_matcher = PhraseMatcher(present)
+
+        self.tables_by_column = {}
+        self.column_sets = {}
+        for table, cols in index.columns_by_table.items():
+            self.column_sets[table] = set(cols)
+            for col in cols:
+                self.tables_by_column.setdefault(col, []).append(table)
+        self._plain_names = [c for c in self.tables_by_column if not is_id_field(c)]
+        self._trigrams = {}
+        for name in self._plain_names:
+            for i in range(len(name) - 2):
+                self._trigrams.setdefault(name[i:i + 3], set()).add(name)
+        self._column_cache = {}
+
+        self.analytical_columns = {
+            table: [f"{table}.{c}" for c in cols
+                    if any(m in f"{table}.{c}" for m in ANALYTICAL_COLUMN_MARKERS)]
+            for table, cols in index.columns_by_table.items()
+        }
+
+    def columns_matching(self, term):
+        """Column names that contain `term` (ignoring *_id fields) or equal it."""
+        names = self._column_cache.get(term)
+        if names is None:
+            if len(term) >= 3:
+                postings = sorted(
+                    (self._trigrams.get(term[i:i + 3], ()) for i in range(len(term) - 2)),
+                    key=len
+                )
+                candidates = set(postings[0]).intersection(*postings[1:])
+            else:
+                candidates = self._plain_names
+            names = {n for n in candidates if term in n}
+            if term in self.tables_by_column:
+                names.add(term)
+            names = frozenset(names)
+            if len(self._column_cache) >= MAX_CACHED_TERMS:
+                self._column_cache.clear()
+            self._column_cache[term] = names
+        return names
+
+
+JoinEdge = namedtuple("JoinEdge", ["left", "right", "keys"])
+JoinEdge.__doc__ = "Join between two tables; `keys` is ((left_column, right_column), ...)."
+
+
+class JoinGraph:
+    """
+    Precomputed shortest join paths for a relationship graph.
+
+    Each source table's BFS tree (next hop back towards the source and hop
+    distance for every reachable table) is computed once and reused by every
+    question; graphs up to JOIN_CLOSURE_PRECOMPUTE_LIMIT tables get the whole
+    all-pairs closure up front via `precompute()`. Neighbours are explored in
+    relationship order, so paths match a plain BFS over the same graph.
+    """
+
+    def __init__(self, relationships):
+        self.relationships = relationships
+        self._trees = {}
+
+    def precompute(self):
+        if len(self.relationships) <= JOIN_CLOSURE_PRECOMPUTE_LIMIT:
+            for table in self.relationships:
+                self._tree(table)
+
+    def _tree(self, source):
+        tree = self._trees.get(source)
+        if tree is None:
+            parent = {source: None}
+            dist = {source: 0}
+            queue = deque([source])
+            while queue:
+                current = queue.popleft()
+                for neighbor in self.relationships.get(current, {}):
+                    if neighbor not in parent:
+                        parent[neighbor] = current
+                        dist[neighbor] = dist[current] + 1
+                        queue.append(neighbor)
+            tree = self._trees[source] = (parent, dist)
+        return tree
+
+    def distance(self, table1, table2):
+        """Number of joins between the tables, or None if they are not connected."""
+        return self._tree(table1)[1].get(table2)
+
+    def path(self, table1, table2):
+        """Tables from table1 to table2, excluding table1; [] if unconnected."""
+        parent, _ = self._tree(table1)
+        if table1 == table2 or table2 not in parent:
+            return []
+        path = []
+        node = table2
+        while node != table1:
+            path.append(node)
+            node = parent[node]
+        path.reverse()
+        return path
+
+    def connect(self, tables):
+        """
+        Approximate minimal connecting subgraph (Steiner tree) for `tables`:
+        starting from the first table, repeatedly attach the remaining table
+        closest to the tree along its shortest path. Returns (tables, edges);
+        tables that cannot be reached are kept but left unconnected.
+        """
+        remaining = list(dict.fromkeys(tables))
+        if not remaining:
+            return [], []
+        tree = [remaining.pop(0)]
+        in_tree = set(tree)
+        edges = []
+        while remaining:
+            best = None
+            for terminal in remaining:
+                dist = self._tree(terminal)[1]
+                for node in tree:
+                    d = dist.get(node)
+                    if d is not None and (best is None or d < best[0]):
+                        best = (d, terminal, node)
+            if best is None:
+                terminal = remaining.pop(0)
+                tree.append(terminal)
+                in_tree.add(terminal)
+                continue
+            _, terminal, node = best
+            remaining.remove(terminal)
+            hops = [terminal] + self.path(terminal, node)
+            for a, b in zip(hops, hops[1:]):
+                edges.append(self.edge(a, b))
+            for table in hops:
+                if table not in in_tree:
+                    tree.append(table)
+                    in_tree.add(table)
+            remaining = [t for t in remaining if t not in in_tree]
+        return tree, edges
+
+    def spanning_edges(self, tables):
+        """Join edges of a spanning forest over `tables`, using only joins among them."""
+        members = set(tables)
+        seen = set()
+        edges = []
+        for root in dict.fromkeys(tables):
+            if root in seen:
+                continue
+            seen.add(root)
+            queue = deque([root])
+            while queue:
+                current = queue.popleft()
+                for neighbor in self.relationships.get(current, {}):
+                    if neighbor in members and neighbor not in seen:
+                        seen.add(neighbor)
+                        edges.append(self.edge(current, neighbor))
+                        queue.append(neighbor)
+        return edges
+
+    def edge(self, table1, table2):
+        return JoinEdge(table1, table2, self.relationships[table1][table2])
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over characters: reports every pattern that occurs
+    as a substring of the text in a single pass, whatever the number of
+    patterns. `patterns` maps pattern -> value; `find` returns the values.
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern, value in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][ch] = nxt
+                node = nxt
+            self._out[node].append(value)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text):
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            if self._out[node]:
+                found.update(self._out[node])
+        return found
+
+
+def is_id_field(name):
+    return name.endswith("_id") or name == "id"
+
+
+def relationships_from_foreign_keys(foreign_keys):
+    """
+    Turn per-column FK rows into an undirected join graph. Composite keys keep
+    all their column pairs; self references are skipped since they never
+    bridge two tables.
+    """
+    constraints = {}
+    for name, table, column, ref_table, ref_column in foreign_keys:
+        if table == ref_table:
+            continue
+        constraints.setdefault((table, name, ref_table), []).append((column, ref_column))
+    relationships = {}
+    for (table, _, ref_table), pairs in sorted(constraints.items()):
+        relationships.setdefault(table, {}).setdefault(ref_table, tuple(pairs))
+        relationships.setdefault(ref_table, {}).setdefault(table, tuple((r, c) for c, r in pairs))
+    return relationships
+
+
+def _join_pairs(keys):
+    # RELATIONSHIPS uses a bare column name when both sides share it
+    if isinstance(keys, str):
+        return ((keys, keys),)
+    return tuple(tuple(p) for p in keys)
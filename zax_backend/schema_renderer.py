@@ -0,0 +1,113 @@
+from schema_index import ANALYTICAL_COLUMN_MARKERS, is_id_field
+
+# Rough prompt-token estimate: ~4 characters per token for schema text
+CHARS_PER_TOKEN = 4
+
+# Shorter type names for the compact notation
+COMPACT_TYPES = {
+    "integer": "int", "bigint": "int8", "smallint": "int2", "character varying": "varchar",
+    "character": "char", "double precision": "float8", "real": "float4", "boolean": "bool",
+    "timestamp without time zone": "timestamp", "timestamp with time zone": "timestamptz",
+    "time without time zone": "time",
+}
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def key_columns(index, table, tables):
+    """The table's id column plus every column it joins on to the other `tables`."""
+    columns = index.columns_by_table.get(table, [])
+    keys = {columns[0]} if columns and is_id_field(columns[0]) else set()
+    for neighbor, pairs in index.relationships.get(table, {}).items():
+        if neighbor in tables:
+            keys.update(column for column, _ in pairs)
+    return keys
+
+
+def _relevance(table, column, matched, keywords):
+    if f"{table}.{column}" in matched:
+        return 3
+    if any(k in column for k in keywords if len(k) >= 3):
+        return 2
+    if any(m in column for m in ANALYTICAL_COLUMN_MARKERS):
+        return 1
+    return 0
+
+
+def _column_text(column, dtype, compact):
+    if not dtype:
+        return column
+    return f"{column} {COMPACT_TYPES.get(dtype, dtype) if compact else dtype}"
+
+
+def _table_text(schema, table, columns, omitted, compact):
+    prefix = f"{schema}.{table}" if schema else table
+    if compact:
+        more = f", ...{omitted} more" if omitted else ""
+        return f"{prefix}({', '.join(columns)}{more})"
+    body = ",\n    ".join(columns)
+    more = f"\n    -- {omitted} more columns not shown" if omitted else ""
+    return f"CREATE TABLE {prefix} (\n    {body}{more}\n);"
+
+
+class RenderedSchema:
+    """Schema text for the prompt; `trimmed` is set when columns were left out to fit the budget."""
+
+    def __init__(self, text, trimmed, tokens):
+        self.text = text
+        self.trimmed = trimmed
+        self.tokens = tokens
+
+    def __str__(self):
+        return self.text
+
+
+def render_schema(index, tables, matched_columns=(), keywords=(), budget_tokens=0, compact=False):
+    """
+    Render `tables` from the schema index for the generation prompt.
+
+    Keys and join columns between the selected tables are always kept. The
+    other columns are ranked by relevance: selector-matched columns, then
+    columns containing a question keyword, then amount/date columns, then the
+    rest in table order. They are added in that order while the estimate
+    stays within `budget_tokens` (0 = no limit). Kept columns stay in their
+    ordinal order, and each table notes how many columns it left out.
+    `compact` renders one line per table with short type names instead of
+    CREATE TABLE statements.
+    """
+    tables = [t for t in dict.fromkeys(tables) if t in index.table_columns]
+    selected = set(tables)
+    matched = set(matched_columns)
+    keywords = [k.lower() for k in keywords]
+    rendered = {t: {c: _column_text(c, dtype, compact) for c, dtype in index.table_columns[t]} for t in tables}
+
+    keep = {t: key_columns(index, t, selected) for t in tables}
+    ranked = sorted(
+        ((-_relevance(t, c, matched, keywords), position, t_order, t, c)
+         for t_order, t in enumerate(tables)
+         for position, (c, _) in enumerate(index.table_columns[t]) if c not in keep[t]),
+    )
+    if budget_tokens:
+        # Fixed cost of every table with its keys, then the ranked columns while they fit
+        used = sum(estimate_tokens(_table_text(index.schema, t, [rendered[t][c] for c in keep[t]], 0, compact))
+                   for t in tables)
+        for _, _, _, table, column in ranked:
+            cost = estimate_tokens(rendered[table][column]) + 1
+            if used + cost > budget_tokens:
+                break
+            keep[table].add(column)
+            used += cost
+    else:
+        for _, _, _, table, column in ranked:
+            keep[table].add(column)
+
+    parts, trimmed = [], False
+    for table in tables:
+        columns = [text for column, text in rendered[table].items() if column in keep[table]]
+        omitted = len(rendered[table]) - len(columns)
+        trimmed = trimmed or omitted > 0
+        parts.append(_table_text(index.schema, table, columns, omitted, compact))
+    text = ("\n" if compact else "\n\n").join(parts)
+    return RenderedSchema(text, trimmed, estimate_tokens(text))
@@ -0,0 +1,82 @@
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from batch_runner import percentile
+from synthetic_schema import generate_schema
+from table_selector import extract_keywords, match_tables_and_columns, singular
+
+DEFAULT_SCALES = (500, 5000, 50000)
+
+
+def score(predicted, truth):
+    """(true positives, false positives, false negatives) of a predicted table set."""
+    predicted, truth = set(predicted), set(truth)
+    return len(predicted & truth), len(predicted - truth), len(truth - predicted)
+
+
+def _build(schema):
+    # What set_schema_index does for the live schema, timed on its own
+    schema.index.token_index(schema.aliases, singular)
+    schema.index.join_graph.precompute()
+
+
+def run_scale(n_columns, seed=0, n_questions=200):
+    """Selector latency, memory and precision/recall on one synthetic schema size."""
+    tracemalloc.start()
+    schema = generate_schema(n_columns, seed=seed, n_questions=n_questions)
+    generated, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    _build(schema)
+    build_s = time.perf_counter() - started
+    built, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    before_queries, _ = tracemalloc.get_traced_memory()
+    for question, _ in schema.questions[:20]:
+        match_tables_and_columns(extract_keywords(question), index=schema.index, aliases=schema.aliases)
+    _, query_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies, tp, fp, fn = [], 0, 0, 0
+    for question, truth in schema.questions:
+        started = time.perf_counter()
+        tables, _ = match_tables_and_columns(extract_keywords(question), index=schema.index, aliases=schema.aliases)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits, extra, missed = score(tables, truth)
+        tp, fp, fn = tp + hits, fp + extra, fn + missed
+    return {
+        "columns": len(schema.index.columns),
+        "tables": len(schema.index.tables),
+        "foreign_keys": len(schema.index.foreign_keys),
+        "aliases": len(schema.aliases),
+        "questions": len(schema.questions),
+        "index_build_s": build_s,
+        "index_memory_mb": (built - generated) / 2 ** 20,
+        "query_peak_memory_mb": max(0, query_peak - before_queries) / 2 ** 20,
+        "latency_mean_ms": statistics.mean(latencies),
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+        "latency_p99_ms": percentile(latencies, 99),
+        "precision": tp / (tp + fp) if tp + fp else 0.0,
+        "recall": tp / (tp + fn) if tp + fn else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Table selector latency, memory and accuracy on synthetic schemas.")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)), help="comma-separated column counts")
+    parser.add_argument("--questions", type=int, default=200, help="questions per scale")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    results = {}
+    for n_columns in (int(s) for s in args.scales.split(",")):
+        results[n_columns] = run_scale(n_columns, seed=args.seed, n_questions=args.questions)
+        r = results[n_columns]
+        print(f"{n_columns:>7} cols  p50={r['latency_p50_ms']:7.2f}ms  p95={r['latency_p95_ms']:7.2f}ms  "
+              f"build={r['index_build_s']:6.2f}s  index={r['index_memory_mb']:7.1f}MB  "
+              f"P={r['precision']:.3f}  R={r['recall']:.3f}")
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import debug_trace
+from db_pool import CancelScope, QueryCancelled
+
+# HTTP/JSON front end for the compiled workflow.
+#   POST /query    {"question": "...", "stream": false}
+#                  -> {"sql", "columns", "rows", "row_count", "total_rows", "total_estimated",
+#                      "truncated", "error", "answer", "ms"}
+#                  with "stream": true (or Accept: text/event-stream) the progress events of
+#                  streaming.stream_events are sent as server-sent events, ending with "done"
+#   GET  /healthz  admission counters; 503 while draining
+#   GET  /metrics  Prometheus text (when metrics are enabled)
+# Clients are identified by the X-Client-Id header, falling back to the peer address.
+
+
+class Rejected(Exception):
+    """A request turned away by admission control."""
+
+    def __init__(self, status, reason, retry_after=1):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    At most `max_in_flight` requests run at once; up to `max_queue` more wait
+    (each for at most `queue_timeout` seconds) for a slot. A client holds at
+    most `per_client` running or waiting requests. Everything beyond that is
+    shed immediately with 429, and nothing is admitted while draining (503).
+    """
+
+    def __init__(self, max_in_flight=8, max_queue=32, per_client=4, queue_timeout=30.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.per_client = per_client
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+        self._clients = {}
+        self.draining = False
+        self.admitted = 0
+        self.shed = 0
+
+    def acquire(self, client):
+        with self._cond:
+            if self.draining:
+                raise Rejected(503, "server is shutting down")
+            if self._clients.get(client, 0) >= self.per_client:
+                self.shed += 1
+                raise Rejected(429, f"too many concurrent requests for client {client}")
+            if self._running >= self.max_in_flight and self._waiting >= self.max_queue:
+                self.shed += 1
+                raise Rejected(429, "server is saturated")
+            self._clients[client] = self._clients.get(client, 0) + 1
+            self._waiting += 1
+            try:
+                admitted = self._cond.wait_for(
+                    lambda: self.draining or self._running < self.max_in_flight, timeout=self.queue_timeout
+                )
+                if not admitted or self.draining:
+                    self._release_client(client)
+                    self.shed += 1
+                    self._cond.notify_all()
+                    if self.draining:
+                        raise Rejected(503, "server is shutting down")
+                    raise Rejected(429, "timed out waiting in the queue")
+            finally:
+                self._waiting -= 1
+            self._running += 1
+            self.admitted += 1
+
+    def release(self, client):
+        with self._cond:
+            self._running -= 1
+            self._release_client(client)
+            self._cond.notify_all()
+
+    def _release_client(self, client):
+        self._clients[client] -= 1
+        if not self._clients[client]:
+            del self._clients[client]
+
+    def drain(self, timeout=None):
+        """Stop admitting, fail queued requests and wait for running ones; True if they all finished."""
+        with self._cond:
+            self.draining = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._running and not self._waiting, timeout=timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "running": self._running,
+                "waiting": self._waiting,
+                "clients": len(self._clients),
+                "admitted": self.admitted,
+                "shed": self.shed,
+                "draining": self.draining,
+            }
+
+
+def _default_events(inputs):
+    # Imported on first use so the server (and its tests) start without a database
+    from streaming import stream_events
+    return stream_events(inputs)
+
+
+def _jsonable(event):
+    """An event from streaming.stream_events as JSON-ready data (QueryResult -> columns/rows)."""
+    data = {k: v for k, v in event.items() if k not in ("state", "result")}
+    result = event.get("result")
+    if result is not None:
+        data.update(columns=list(result.columns), rows=[list(row) for row in result.rows()],
+                    row_count=result.row_count, total_rows=result.total_rows,
+                    total_estimated=result.total_estimated, truncated=result.truncated, error=result.error)
+    return data
+
+
+class QueryServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer running each admitted question through `events(inputs)` on its handler thread."""
+
+    daemon_threads = True
+
+    def __init__(self, address, admission=None, events=None, max_body=64 * 1024):
+        super().__init__(address, QueryHandler)
+        self.admission = admission or AdmissionController()
+        self.events = events or _default_events
+        self.max_body = max_body
+        self._scopes = set()
+        self._scopes_lock = threading.Lock()
+
+    def track(self, scope, active):
+        with self._scopes_lock:
+            (self._scopes.add if active else self._scopes.discard)(scope)
+
+    def drain(self, timeout=30.0):
+        """
+        Graceful shutdown: reject new work, let in-flight requests finish for
+        up to `timeout` seconds, cancel whatever is still running, then stop
+        the accept loop.
+        """
+        print(f"[SERVER] Draining ({self.admission.stats()['running']} running)")
+        finished = self.admission.drain(timeout)
+        if not finished:
+            with self._scopes_lock:
+                for scope in self._scopes:
+                    scope.cancel()
+            self.admission.drain(5.0)
+        self.shutdown()
+        print("[SERVER] Stopped" + ("" if finished else " (cancelled unfinished requests)"))
+        return finished
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        debug_trace.info("server", "access", lambda: {"client": self.address_string(), "line": format % args})
+
+    def _send_json(self, status, payload, headers=()):
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            stats = self.server.admission.stats()
+            self._send_json(503 if stats["draining"] else 200, stats)
+        elif self.path == "/metrics":
+            import metrics
+            body = metrics.registry.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/query":
+            return self._send_json(404, {"error": "not found"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > self.server.max_body:
+            self.close_connection = True
+            return self._send_json(413, {"error": "request body too large"})
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            question = request["question"].strip()
+        except (ValueError, KeyError, AttributeError, TypeError):
+            return self._send_json(400, {"error": 'expected a JSON body with a "question" string'})
+        if not question:
+            return self._send_json(400, {"error": "question is empty"})
+        stream = bool(request.get("stream")) or "text/event-stream" in self.headers.get("Accept", "")
+
+        client = self.headers.get("X-Client-Id") or self.client_address[0]
+        try:
+            self.server.admission.acquire(client)
+        except Rejected as e:
+            return self._send_json(e.status, {"error": e.reason}, [("Retry-After", str(e.retry_after))])
+        scope = CancelScope()
+        self.server.track(scope, True)
+        try:
+            inputs = {"user_input": question, "last_query_result": None, "last_sql": ""}
+            with scope:
+                if stream:
+                    self._stream(inputs, scope)
+                else:
+                    self._respond(inputs)
+        finally:
+            self.server.track(scope, False)
+            self.server.admission.release(client)
+
+    def _respond(self, inputs):
+        started = time.perf_counter()
+        try:
+            done = None
+            for event in self.server.events(inputs):
+                if event["event"] == "done":
+                    done = event
+        except QueryCancelled:
+            return self._send_json(503, {"error": "cancelled: server is shutting down"})
+        except Exception as e:
+            return self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+        payload = _jsonable(done or {"event": "done", "answer": "", "sql": ""})
+        payload.pop("event", None)
+        payload.pop("t", None)
+        payload["ms"] = (time.perf_counter() - started) * 1000
+        self._send_json(200, payload)
+
+    def _stream(self, inputs, scope):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        events = self.server.events(inputs)
+        try:
+            for event in events:
+                self._sse(event["event"], _jsonable(event))
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away: stop the graph and any statement it is running
+            scope.cancel()
+            debug_trace.warn("server", "client_disconnected", lambda: {"client": self.address_string()})
+        except QueryCancelled:
+            self._sse("error", {"error": "cancelled: server is shutting down"})
+        except Exception as e:
+            self._sse("error", {"error": f"{type(e).__name__}: {e}"})
+        finally:
+            close = getattr(events, "close", None)
+            if close:
+                close()
+
+    def _sse(self, name, data):
+        self.wfile.write(f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n".encode())
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="HTTP/JSON query service around the compiled workflow. "
+                    "Set LLM_BACKEND=replay to run it locally against the stand-in LLM."
+    )
+    parser.add_argument("--host", default=os.getenv("SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "8080")))
+    parser.add_argument("--max-in-flight", type=int, default=int(os.getenv("SERVER_MAX_IN_FLIGHT", "8")),
+                        help="questions running at once (keep at or below DB_POOL_MAX_SIZE)")
+    parser.add_argument("--max-queue", type=int, default=int(os.getenv("SERVER_MAX_QUEUE", "32")),
+                        help="questions waiting for a slot before new ones get 429")
+    parser.add_argument("--per-client", type=int, default=int(os.getenv("SERVER_PER_CLIENT", "4")),
+                        help="running + waiting questions per client")
+    parser.add_argument("--queue-timeout", type=float, default=float(os.getenv("SERVER_QUEUE_TIMEOUT", "30")))
+    parser.add_argument("--drain-timeout", type=float, default=float(os.getenv("SERVER_DRAIN_TIMEOUT", "30")),
+                        help="seconds in-flight questions get to finish on SIGTERM/SIGINT")
+    parser.add_argument("--no-warmup", action="store_true", help="skip building the graph before listening")
+    args = parser.parse_args()
+
+    if not args.no_warmup:
+        # Pay the client/pool/graph/schema setup before the first request arrives
+        from db_schema_utils import get_schema_index
+        from workflow import get_app
+        get_app()
+        get_schema_index()
+    admission = AdmissionController(args.max_in_flight, args.max_queue, args.per_client, args.queue_timeout)
+    server = QueryServer((args.host, args.port), admission)
+
+    def stop(signum, frame):
+        threading.Thread(target=server.drain, args=(args.drain_timeout,), daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"[SERVER] Listening on http://{args.host}:{server.server_address[1]}")
+    server.serve_forever()
+    server.server_close()
+
+if __name__ == "__main__":
+    main()
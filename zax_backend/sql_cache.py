@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from table_selector import singular
+import debug_trace
+
+# Filler words that change the phrasing but not the query
+IGNORED_WORDS = {
+    "please", "what", "which", "who", "is", "are", "was", "were", "do", "does", "can", "could",
+    "you", "i", "we", "want", "would", "like", "need", "see", "tell", "there", "that", "this",
+    "these", "those", "be"
+}
+
+
+def question_fingerprint(keywords, tables, schema_version):
+    """
+    Normalised key for a question: the singularised, de-duplicated, sorted
+    keywords (minus filler words), the selected tables and the schema version.
+    Word order and plural/singular changes map to the same fingerprint.
+    """
+    terms = sorted({singular(k) for k in keywords if k not in IGNORED_WORDS})
+    payload = json.dumps([terms, sorted(tables), schema_version], separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class QuestionSQLCache:
+    """
+    Fingerprint -> validated SQL cache with LRU eviction, a TTL and optional
+    JSON persistence at `path` (written through on every store, outside the
+    cache lock so lookups never wait on disk I/O).
+    """
+
+    def __init__(self, max_entries=1000, ttl=86400.0, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries = OrderedDict()  # fingerprint -> (sql, stored_at wall-clock)
+        self._version = 0  # bumped on every change; a snapshot older than the saved one is not written
+        self._saved_version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            self._load()
+
+    def get(self, fingerprint):
+        """Return the cached SQL for `fingerprint` or None, counting the hit/miss."""
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is not None and time.time() - entry[1] > self.ttl:
+                del self._entries[fingerprint]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(fingerprint)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, fingerprint, sql):
+        """Store SQL that executed successfully for `fingerprint`."""
+        with self._lock:
+            self._entries[fingerprint] = (sql, time.time())
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        if self.path:
+            self._save()
+
+    def invalidate(self, fingerprint=None):
+        """Drop one entry, or everything when `fingerprint` is None."""
+        with self._lock:
+            if fingerprint is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(fingerprint, None)
+        if self.path:
+            self._save()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for fingerprint, sql, stored_at in data:
+            if now - stored_at <= self.ttl:
+                self._entries[fingerprint] = (sql, stored_at)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self):
+        # Snapshot under the cache lock, write under a separate one
+        with self._lock:
+            self._version += 1
+            version = self._version
+            data = [[k, sql, ts] for k, (sql, ts) in self._entries.items()]
+        with self._save_lock:
+            if version < self._saved_version:
+                return
+            self._write(data)
+            self._saved_version = version
+
+    def _write(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            os.unlink(tmp_path)
+            debug_trace.warn("sql_cache", "persist_failed", lambda: {"path": self.path, "error": str(e)})
@@ -0,0 +1,127 @@
+import asyncio
+import contextvars
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import debug_trace
+
+# One generated query: the LLM `message`, its SQL text and, once reviewed,
+# either a validation/EXPLAIN `error` or the estimated `cost` (None when the
+# database cannot estimate it). `index` is the generation order; 0 is the
+# regular deterministic generation.
+Candidate = namedtuple("Candidate", ["index", "message", "sql", "error", "cost"])
+
+
+def _sql_of(message):
+    return (message.content if hasattr(message, "content") else "").strip()
+
+
+def _reviewed(index, message, review):
+    sql = _sql_of(message)
+    if not sql:
+        return Candidate(index, message, sql, "Error: LLM returned empty SQL", None)
+    error, cost = review(sql)
+    return Candidate(index, message, sql, error, cost)
+
+
+async def _areviewed(index, message, areview):
+    sql = _sql_of(message)
+    if not sql:
+        return Candidate(index, message, sql, "Error: LLM returned empty SQL", None)
+    error, cost = await areview(sql)
+    return Candidate(index, message, sql, error, cost)
+
+
+def pick(candidates):
+    """
+    The cheapest valid candidate (ties and unknown costs go to the earlier
+    one). When none is valid, the earliest candidate so the correction loop
+    starts from the regular generation and its error.
+    """
+    candidates = sorted(candidates, key=lambda c: c.index)
+    valid = [c for c in candidates if c.error is None]
+    if valid:
+        return min(valid, key=lambda c: (c.cost if c.cost is not None else 0.0, c.index))
+    return candidates[0] if candidates else None
+
+
+def _report(finished, n, chosen):
+    valid = sum(1 for c in finished if c.error is None)
+    debug_trace.info("candidates", "picked", lambda: {
+        "reviewed": len(finished), "requested": n, "valid": valid, "index": chosen.index, "cost": chosen.cost
+    })
+
+
+def best_candidate(generate, review, n, grace_s=0.5):
+    """
+    Generate `n` candidates concurrently with `generate(i)` (returns the LLM
+    message), validate/EXPLAIN each with `review(sql)` (returns `(error,
+    cost)`) as soon as it arrives, and return the pick().
+
+    Once the first valid candidate is in, the others get `grace_s` more
+    seconds; whatever is still pending then is abandoned. Queued work is
+    cancelled, but an LLM call already running in a worker thread finishes
+    in the background and is discarded. If every generation raised, the
+    first exception is re-raised so callers' retry logic still applies.
+    """
+    def work(i):
+        return _reviewed(i, generate(i), review)
+
+    executor = ThreadPoolExecutor(max_workers=n, thread_name_prefix="sql-candidate")
+    # Workers run in a copy of the caller's context (cancel scope, callbacks)
+    pending = {executor.submit(contextvars.copy_context().run, work, i) for i in range(n)}
+    finished, errors, deadline = [], [], None
+    try:
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is not None:
+                    errors.append(future.exception())
+                else:
+                    finished.append(future.result())
+            if deadline is None and any(c.error is None for c in finished):
+                deadline = time.monotonic() + grace_s
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    if not finished:
+        raise errors[0]
+    chosen = pick(finished)
+    _report(finished, n, chosen)
+    return chosen
+
+
+async def abest_candidate(agenerate, areview, n, grace_s=0.5):
+    """
+    Async best_candidate: each candidate is a task, and the ones still
+    pending after the grace period are cancelled, which aborts their LLM
+    request or their EXPLAIN on the server.
+    """
+    async def work(i):
+        return await _areviewed(i, await agenerate(i), areview)
+
+    pending = {asyncio.ensure_future(work(i)) for i in range(n)}
+    finished, errors, deadline = [], [], None
+    try:
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in done:
+                if task.exception() is not None:
+                    errors.append(task.exception())
+                else:
+                    finished.append(task.result())
+            if deadline is None and any(c.error is None for c in finished):
+                deadline = time.monotonic() + grace_s
+    finally:
+        for task in pending:
+            task.cancel()
+    if not finished:
+        raise errors[0]
+    chosen = pick(finished)
+    _report(finished, n, chosen)
+    return chosen
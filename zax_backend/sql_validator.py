@@ -0,0 +1,179 @@
+import difflib
+import weakref
+from collections import namedtuple
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import OptimizeError, ParseError, SqlglotError
+from sqlglot.optimizer.normalize_identifiers import normalize_identifiers
+from sqlglot.optimizer.qualify import qualify
+from sqlglot.optimizer.scope import traverse_scope
+from sqlglot.schema import MappingSchema
+
+Diagnostic = namedtuple("Diagnostic", ["code", "message"])
+
+# Statements (or clauses) that write or lock; generated SQL must be a plain read
+WRITE_EXPRESSIONS = (
+    exp.Insert, exp.Update, exp.Delete, exp.Merge, exp.Create, exp.Drop, exp.Alter,
+    exp.TruncateTable, exp.Command, exp.Into, exp.Copy, exp.Grant, exp.Set, exp.Lock,
+)
+
+_validators = weakref.WeakKeyDictionary()
+
+
+def validator_for(index):
+    """The SQLValidator of a SchemaIndex, built once per index (i.e. per schema version)."""
+    validator = _validators.get(index)
+    if validator is None:
+        validator = _validators[index] = SQLValidator(index)
+    return validator
+
+
+def format_diagnostics(diagnostics):
+    """Error text for the correction prompt, one diagnostic per line."""
+    return "Error: SQL failed validation:\n" + "\n".join(f"- {d.message}" for d in diagnostics)
+
+
+def _suggest(name, candidates):
+    matches = difflib.get_close_matches(name, list(candidates), n=3, cutoff=0.6)
+    return f" Did you mean {', '.join(matches)}?" if matches else ""
+
+
+class SQLValidator:
+    """
+    Offline checks for generated SQL against a SchemaIndex: exactly one
+    read-only query, every table and qualified column known, unqualified
+    columns unambiguous and joins with a join condition.
+
+    The database remains the authority: SQL the parser cannot handle, or
+    that reads tables outside the indexed schema, is passed through
+    unvalidated rather than rejected.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.schema_name = index.schema
+        self.columns = {t: set(cols) for t, cols in index.columns_by_table.items()}
+        mapping = {t: {c: (dtype or "unknown") for c, dtype in cols} for t, cols in index.table_columns.items()}
+        self._schema = MappingSchema({self.schema_name: mapping} if self.schema_name else mapping, dialect="postgres")
+
+    def validate(self, sql):
+        """Return a list of Diagnostics; empty when the SQL may be executed."""
+        try:
+            statements = [s for s in sqlglot.parse(sql, read="postgres") if s is not None]
+        except (ParseError, SqlglotError):
+            return []
+        if len(statements) != 1:
+            return [Diagnostic("multiple_statements", "Submit exactly one SELECT statement.")]
+        statement = statements[0]
+        if not isinstance(statement, exp.Query) or statement.find(*WRITE_EXPRESSIONS):
+            return [Diagnostic("not_read_only", "Only read-only SELECT queries are allowed (no DML, DDL or locking).")]
+        # Postgres folds unquoted identifiers to lowercase; quoted ones keep their case
+        statement = normalize_identifiers(statement, dialect="postgres")
+
+        ctes = {cte.alias_or_name for cte in statement.find_all(exp.CTE)}
+        diagnostics = []
+        external = False
+        for table in statement.find_all(exp.Table):
+            name = table.name
+            if not name or (table.db and table.db != self.schema_name):
+                external = True
+            elif name not in ctes and name not in self.columns:
+                diagnostics.append(Diagnostic("unknown_table", f'Unknown table "{name}".{_suggest(name, self.columns)}'))
+        if diagnostics or external:
+            return diagnostics
+
+        try:
+            diagnostics.extend(self._check_scopes(statement))
+            diagnostics.extend(self._check_joins(statement))
+        except Exception:
+            return diagnostics
+        if not diagnostics:
+            diagnostics.extend(self._check_resolution(statement))
+        return diagnostics
+
+    def _check_scopes(self, statement):
+        # Qualified columns whose qualifier is a catalog table in the same scope
+        diagnostics = []
+        for scope in traverse_scope(statement):
+            for column in scope.columns:
+                source = scope.sources.get(column.table) if column.table else None
+                if isinstance(source, exp.Table) and source.name in self.columns:
+                    known = self.columns[source.name]
+                    if column.name not in known:
+                        diagnostics.append(Diagnostic(
+                            "unknown_column",
+                            f'Column "{column.name}" does not exist in table "{source.name}" '
+                            f'(referenced as {column.table}.{column.name}).{_suggest(column.name, known)}'
+                        ))
+        return diagnostics
+
+    def _check_joins(self, statement):
+        diagnostics = []
+        for select in statement.find_all(exp.Select):
+            from_ = select.args.get("from_") or select.args.get("from")
+            if from_ is None or not isinstance(from_.this, exp.Table):
+                continue
+            previous = [from_.this]
+            for join in select.args.get("joins") or []:
+                target = join.this
+                if not isinstance(target, exp.Table):
+                    previous = []
+                    continue
+                explicit = join.args.get("side") or join.args.get("kind") not in (None, "CROSS")
+                if not (join.args.get("on") or join.args.get("using") or join.args.get("method")
+                        or join.args.get("kind") == "CROSS"):
+                    if explicit or not self._linked_in_where(select, target):
+                        diagnostics.append(Diagnostic(
+                            "missing_join_condition",
+                            f'Table "{target.name}" is joined without a join condition.'
+                            f"{self._join_hint(previous, target)}"
+                        ))
+                previous.append(target)
+        return diagnostics
+
+    def _linked_in_where(self, select, target):
+        where = select.args.get("where")
+        if where is None:
+            return False
+        alias = target.alias_or_name
+        for eq in where.find_all(exp.EQ):
+            qualifiers = {c.table for c in eq.find_all(exp.Column)}
+            if "" in qualifiers or (alias in qualifiers and len(qualifiers) > 1):
+                return True
+        return False
+
+    def _join_hint(self, previous, target):
+        for table in previous:
+            keys = self.index.relationships.get(table.name, {}).get(target.name)
+            if keys:
+                conditions = " AND ".join(
+                    f"{table.alias_or_name}.{col} = {target.alias_or_name}.{ncol}" for col, ncol in keys
+                )
+                return f" Use ON {conditions}."
+        return ""
+
+    def _check_resolution(self, statement):
+        # sqlglot resolves every unqualified column against the schema and the
+        # scopes it is visible in (select aliases, CTEs, outer queries)
+        try:
+            qualify(
+                statement, schema=self._schema, db=self.schema_name, dialect="postgres",
+                validate_qualify_columns=True, quote_identifiers=False, identify=False
+            )
+        except OptimizeError as e:
+            message = str(e)
+            if "could not be resolved" not in message:
+                return [Diagnostic("unknown_column", message)]
+            name = message.split("'")[1] if message.count("'") >= 2 else ""
+            tables = sorted({t.name for t in statement.find_all(exp.Table) if name in self.columns.get(t.name, ())})
+            if len(tables) > 1:
+                return [Diagnostic(
+                    "ambiguous_column",
+                    f'Column "{name}" is ambiguous: it exists in {", ".join(tables)}. Qualify it with a table alias.'
+                )]
+            candidates = set().union(*(self.columns.get(t.name, set()) for t in statement.find_all(exp.Table)))
+            return [Diagnostic("unknown_column", f'Unknown column "{name}".{_suggest(name, candidates)}')]
+        except Exception:
+            # Anything sqlglot cannot resolve is left for the database to judge
+            pass
+        return []
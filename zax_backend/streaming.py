@@ -0,0 +1,83 @@
+import time
+import debug_trace
+from metrics import trace_request
+from workflow import get_app
+
+# Progress events produced while a question runs through the graph. Every
+# event is a dict with "event", "t" (seconds since the run started) and:
+#   stage_start / stage_end  "stage", "task" (+ "ms" on stage_end)
+#   sql                      "sql": generated or corrected SQL, once it exists
+#   rows                     "result": the QueryResult (rows or error)
+#   token                    "text", "task": one chunk of the final answer
+#   done                     "answer", "sql", "result" (QueryResult), "state": final state,
+#                            "trace": the request's span trace dict (None when metrics are off)
+STREAM_MODES = ["tasks", "messages", "values"]
+ANSWER_NODE = "submit_final_answer"
+
+
+class _EventTranslator:
+    """Turns raw LangGraph stream chunks into the progress events above."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.task_started = {}
+        self.last_sql = None
+        self.state = None
+
+    def _event(self, name, **data):
+        return {"event": name, "t": time.perf_counter() - self.started, **data}
+
+    def translate(self, mode, chunk):
+        if mode == "values":
+            self.state = chunk
+        elif mode == "tasks":
+            yield from self._task(chunk)
+        elif mode == "messages":
+            message, metadata = chunk
+            # Only the answer node streams to the user; SQL is sent whole once it is known
+            if metadata.get("langgraph_node") == ANSWER_NODE and isinstance(message.content, str) and message.content:
+                task = metadata.get("langgraph_checkpoint_ns", "").partition(":")[2]
+                yield self._event("token", text=message.content, task=task)
+
+    def _task(self, chunk):
+        name, task = chunk["name"], chunk["id"]
+        if "result" not in chunk:
+            self.task_started[task] = time.perf_counter()
+            yield self._event("stage_start", stage=name, task=task)
+            return
+        started = self.task_started.pop(task, self.started)
+        result = chunk["result"] if isinstance(chunk["result"], dict) else {}
+        sql = result.get("last_sql")
+        if sql and sql != self.last_sql:
+            self.last_sql = sql
+            yield self._event("sql", sql=sql)
+        if name == "execute_query" and "last_query_result" in result:
+            yield self._event("rows", result=result["last_query_result"])
+        yield self._event("stage_end", stage=name, task=task, ms=(time.perf_counter() - started) * 1000)
+
+    def done(self, trace=None):
+        state = self.state or {}
+        messages = state.get("messages") or []
+        answer = messages[-1].content if messages else ""
+        return self._event("done", answer=answer, sql=state.get("last_sql", ""),
+                           result=state.get("last_query_result"), state=state,
+                           trace=trace.to_dict() if trace is not None else None)
+
+
+def stream_events(inputs, graph=None):
+    """Run `inputs` through the graph and yield progress events as they happen."""
+    translator = _EventTranslator()
+    with debug_trace.request(), trace_request() as trace:
+        for mode, chunk in (graph or get_app()).stream(inputs, stream_mode=STREAM_MODES):
+            yield from translator.translate(mode, chunk)
+    yield translator.done(trace)
+
+
+async def astream_events(inputs, graph=None):
+    """Async stream_events, driven by the graph's async nodes."""
+    translator = _EventTranslator()
+    with debug_trace.request(), trace_request() as trace:
+        async for mode, chunk in (graph or get_app()).astream(inputs, stream_mode=STREAM_MODES):
+            for event in translator.translate(mode, chunk):
+                yield event
+    yield translator.done(trace)
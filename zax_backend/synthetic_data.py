@@ -0,0 +1,174 @@
+import csv
+import io
+import random
+from datetime import date, timedelta
+
+# Synthetic copy of the customers/orders/order_details/products/suppliers/
+# sales_representative schema the selector and prompts are written for.
+# Row counts at scale 1.0; every table scales linearly (minimum 1 row).
+BASE_ROWS = {
+    "suppliers": 50,
+    "sales_representative": 40,
+    "customers": 2000,
+    "products": 500,
+    "orders": 10000,
+    "order_details": 30000,
+}
+
+# Load order: referenced tables first
+TABLES = ["suppliers", "sales_representative", "customers", "products", "orders", "order_details"]
+
+DDL = """
+CREATE TABLE {schema}.suppliers (
+    supplier_id integer PRIMARY KEY, company_name text, contact_person text, email text, phone text,
+    website text, country text, city text, partnership_date date, payment_terms text,
+    credit_limit numeric(12, 2), rating numeric(3, 2), status text
+);
+CREATE TABLE {schema}.sales_representative (
+    sales_rep_id integer PRIMARY KEY, first_name text, last_name text, email text, phone text,
+    region text, territory text, hire_date date, commission_rate numeric(5, 4),
+    annual_target numeric(12, 2), department text, status text
+);
+CREATE TABLE {schema}.customers (
+    customer_id integer PRIMARY KEY, first_name text, last_name text, email text, city text,
+    country text, join_date date
+);
+CREATE TABLE {schema}.products (
+    product_id integer PRIMARY KEY, product_name text, category text, subcategory text, brand text,
+    price numeric(10, 2), stock_level integer,
+    supplier_id integer REFERENCES {schema}.suppliers (supplier_id),
+    weight_kg numeric(8, 2), length_cm numeric(8, 2), width_cm numeric(8, 2), height_cm numeric(8, 2),
+    launch_date date
+);
+CREATE TABLE {schema}.orders (
+    order_id integer PRIMARY KEY,
+    customer_id integer REFERENCES {schema}.customers (customer_id),
+    sales_rep_id integer REFERENCES {schema}.sales_representative (sales_rep_id),
+    order_date date, total_amount numeric(12, 2), status text, payment_method text, shipping_method text
+);
+CREATE TABLE {schema}.order_details (
+    order_detail_id integer PRIMARY KEY,
+    order_id integer REFERENCES {schema}.orders (order_id),
+    product_id integer REFERENCES {schema}.products (product_id),
+    quantity integer, unit_price numeric(10, 2), subtotal numeric(12, 2), discount_percentage numeric(5, 2),
+    discount_amount numeric(12, 2), final_amount numeric(12, 2), tax_rate numeric(5, 4), tax_amount numeric(12, 2)
+);
+CREATE INDEX ON {schema}.orders (customer_id);
+CREATE INDEX ON {schema}.orders (sales_rep_id);
+CREATE INDEX ON {schema}.order_details (order_id);
+CREATE INDEX ON {schema}.order_details (product_id);
+CREATE INDEX ON {schema}.products (supplier_id);
+"""
+
+FIRST_NAMES = ["Ava", "Liam", "Noah", "Emma", "Mia", "Omar", "Sofia", "Yuki", "Ravi", "Lena", "Ines", "Kofi"]
+LAST_NAMES = ["Smith", "Garcia", "Khan", "Chen", "Muller", "Rossi", "Silva", "Okafor", "Tanaka", "Novak"]
+COUNTRIES = {
+    "USA": ["New York", "Chicago", "Austin"], "Germany": ["Berlin", "Munich"], "India": ["Mumbai", "Pune"],
+    "Brazil": ["Sao Paulo", "Recife"], "Japan": ["Tokyo", "Osaka"], "Kenya": ["Nairobi"],
+}
+CATEGORIES = {
+    "Electronics": ["Phones", "Laptops", "Audio"], "Furniture": ["Chairs", "Desks", "Lamps"],
+    "Clothing": ["Shirts", "Shoes"], "Books": ["Fiction", "Science"], "Sports": ["Bikes", "Fitness"],
+}
+BRANDS = ["Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne"]
+REGIONS = {"North": ["N1", "N2"], "South": ["S1", "S2"], "East": ["E1"], "West": ["W1", "W2"]}
+ORDER_STATUSES = ["Delivered", "Shipped", "Processing", "Cancelled", "Returned"]
+PAYMENT_METHODS = ["Credit Card", "PayPal", "Bank Transfer", "Cash on Delivery"]
+SHIPPING_METHODS = ["Standard", "Express", "Overnight", "Pickup"]
+START = date(2021, 1, 1)
+
+
+def row_counts(scale=1.0):
+    return {table: max(1, int(count * scale)) for table, count in BASE_ROWS.items()}
+
+
+def _day(rng, start=START, days=1460):
+    return start + timedelta(days=rng.randrange(days))
+
+
+def _person(rng):
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+
+def synthetic_rows(table, scale=1.0, seed=0):
+    """
+    Yield the rows of `table` as tuples in DDL column order. Generation is
+    deterministic for a (scale, seed) pair and streams, so large scales do
+    not need the whole table in memory. Foreign keys only reference ids
+    below the referenced table's row count, so every join resolves.
+    """
+    counts = row_counts(scale)
+    rng = random.Random(f"{seed}:{table}")
+    for i in range(1, counts[table] + 1):
+        if table == "suppliers":
+            country = rng.choice(list(COUNTRIES))
+            first, last = _person(rng)
+            yield (i, f"{rng.choice(BRANDS)} Supply {i}", f"{first} {last}", f"contact{i}@supplier{i}.com",
+                   f"+1-555-{i:04d}", f"https://supplier{i}.example.com", country, rng.choice(COUNTRIES[country]),
+                   _day(rng), rng.choice(["Net 30", "Net 60", "Prepaid"]), round(rng.uniform(5e3, 5e5), 2),
+                   round(rng.uniform(1, 5), 2), rng.choice(["Active", "Inactive"]))
+        elif table == "sales_representative":
+            region = rng.choice(list(REGIONS))
+            first, last = _person(rng)
+            yield (i, first, last, f"rep{i}@example.com", f"+1-555-{i:04d}", region, rng.choice(REGIONS[region]),
+                   _day(rng), round(rng.uniform(0.01, 0.1), 4), round(rng.uniform(5e4, 5e5), 2),
+                   rng.choice(["Retail", "Enterprise"]), rng.choice(["Active", "On Leave"]))
+        elif table == "customers":
+            country = rng.choice(list(COUNTRIES))
+            first, last = _person(rng)
+            yield (i, first, last, f"customer{i}@example.com", rng.choice(COUNTRIES[country]), country, _day(rng))
+        elif table == "products":
+            category = rng.choice(list(CATEGORIES))
+            yield (i, f"{rng.choice(BRANDS)} {category} {i}", category, rng.choice(CATEGORIES[category]),
+                   rng.choice(BRANDS), round(rng.uniform(5, 2000), 2), rng.randrange(0, 500),
+                   rng.randrange(1, counts["suppliers"] + 1), round(rng.uniform(0.1, 40), 2),
+                   round(rng.uniform(5, 200), 2), round(rng.uniform(5, 200), 2), round(rng.uniform(5, 200), 2),
+                   _day(rng))
+        elif table == "orders":
+            yield (i, rng.randrange(1, counts["customers"] + 1), rng.randrange(1, counts["sales_representative"] + 1),
+                   _day(rng), round(rng.uniform(10, 5000), 2), rng.choice(ORDER_STATUSES),
+                   rng.choice(PAYMENT_METHODS), rng.choice(SHIPPING_METHODS))
+        elif table == "order_details":
+            quantity = rng.randrange(1, 10)
+            unit_price = round(rng.uniform(5, 2000), 2)
+            subtotal = round(quantity * unit_price, 2)
+            discount = rng.choice([0, 0, 5, 10, 15])
+            discount_amount = round(subtotal * discount / 100, 2)
+            tax_rate = rng.choice([0.05, 0.08, 0.2])
+            tax_amount = round((subtotal - discount_amount) * tax_rate, 2)
+            yield (i, rng.randrange(1, counts["orders"] + 1), rng.randrange(1, counts["products"] + 1), quantity,
+                   unit_price, subtotal, discount, discount_amount, round(subtotal - discount_amount + tax_amount, 2),
+                   tax_rate, tax_amount)
+
+
+def _copy_chunks(rows, chunk_rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for n, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if n % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def load(conn, schema="info", scale=1.0, seed=0, chunk_rows=50000):
+    """
+    (Re)create the synthetic tables in `schema` on a psycopg2 connection and
+    COPY the generated rows in, then ANALYZE so EXPLAIN costs are realistic.
+    Returns {table: rows loaded}.
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+        for table in reversed(TABLES):
+            cur.execute(f"DROP TABLE IF EXISTS {schema}.{table} CASCADE")
+        cur.execute(DDL.format(schema=schema))
+        for table in TABLES:
+            for chunk in _copy_chunks(synthetic_rows(table, scale, seed), chunk_rows):
+                cur.copy_expert(f"COPY {schema}.{table} FROM STDIN WITH (FORMAT csv)", io.StringIO(chunk))
+            print(f"[SYNTHETIC] Loaded {schema}.{table}")
+        cur.execute("ANALYZE")
+    conn.commit()
+    return row_counts(scale)
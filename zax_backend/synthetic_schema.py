@@ -0,0 +1,112 @@
+import random
+from collections import namedtuple
+from schema_index import SchemaIndex
+
+# Generated schema plus everything needed to score the selector against it:
+# `aliases` in TABLE_ALIASES form and `questions` as (question, tables) pairs,
+# where `tables` is the ground truth (the mentioned tables plus the bridge
+# tables needed to join them).
+SyntheticSchema = namedtuple("SyntheticSchema", ["index", "aliases", "questions"])
+
+DOMAINS = [
+    "sales", "billing", "inventory", "shipping", "support", "marketing", "payroll", "hiring", "finance",
+    "procurement", "warehouse", "retail", "logistics", "compliance", "research", "catalog", "loyalty",
+    "fleet", "facility", "travel", "claims", "lending", "trading", "clinic", "pharmacy", "school",
+    "library", "energy", "telecom", "insurance", "banking", "tax", "audit", "legal", "events", "media",
+]
+# entity -> synonyms users say instead of the table name
+ENTITIES = {
+    "customer": ["client", "buyer"], "invoice": ["bill"], "order": ["purchase"], "product": ["item", "article"],
+    "supplier": ["vendor"], "employee": ["staff member", "worker"], "shipment": ["delivery"],
+    "ticket": ["case"], "campaign": ["promotion"], "contract": ["agreement"], "account": ["ledger"],
+    "payment": ["remittance"], "asset": ["equipment"], "location": ["site"], "project": ["initiative"],
+    "vehicle": ["truck"], "policy": ["plan"], "claim": ["request"], "course": ["class"], "patient": ["client"],
+    "device": ["unit"], "store": ["shop"], "review": ["rating"], "batch": ["lot"], "route": ["lane"],
+}
+ATTRIBUTES = [
+    "name", "status", "amount", "price", "quantity", "created_date", "updated_date", "region", "country",
+    "city", "category", "priority", "score", "balance", "currency", "description", "code", "type", "channel",
+    "discount", "tax_amount", "total_amount", "weight", "duration", "rating", "start_date", "end_date",
+    "email", "phone", "segment", "level", "cost", "revenue", "margin", "owner", "source",
+]
+AGGREGATES = ["total", "average", "count of", "maximum", "minimum"]
+
+
+def _plural(word):
+    if word.endswith("y") and word[-2:-1] not in "aeiou":
+        return word[:-1] + "ies"
+    if word.endswith(("s", "sh", "ch")):
+        return word + "es"
+    return word + "s"
+
+
+def _table_names(count, rng):
+    names = []
+    pairs = [(d, e) for d in DOMAINS for e in ENTITIES]
+    rng.shuffle(pairs)
+    for i in range(count):
+        domain, entity = pairs[i % len(pairs)]
+        round_ = i // len(pairs)
+        names.append((f"{domain}_{_plural(entity)}" + (f"_{round_}" if round_ else ""), domain, entity, round_))
+    return names
+
+
+def generate_schema(n_columns, seed=0, columns_per_table=10, max_foreign_keys=3, n_questions=200):
+    """
+    Build a SchemaIndex with about `n_columns` columns spread over tables of
+    ~`columns_per_table` columns, named "<domain>_<entities>", and a dense
+    FK graph: every table references 1..`max_foreign_keys` earlier tables,
+    preferring its own domain. Each table gets aliases ("sales customers",
+    "sales clients", ...) and the question set mentions tables through them.
+    Deterministic for a given seed.
+    """
+    rng = random.Random(seed)
+    n_tables = max(2, n_columns // columns_per_table)
+    names = _table_names(n_tables, rng)
+    table_columns, foreign_keys, aliases = {}, [], {}
+    by_domain = {}
+    for position, (table, domain, entity, round_) in enumerate(names):
+        key = f"{entity}_id" if not round_ else f"{entity}{round_}_id"
+        columns = [(key, "integer")]
+        earlier = by_domain.get(domain, [])
+        candidates = earlier[-8:] + [names[j][0] for j in rng.sample(range(position), min(position, 4))]
+        for ref in dict.fromkeys(rng.sample(candidates, min(len(candidates), rng.randint(1, max_foreign_keys)))):
+            ref_key = table_columns[ref][0][0]
+            if any(c == ref_key for c, _ in columns):
+                continue
+            columns.append((ref_key, "integer"))
+            foreign_keys.append((f"{table}_{ref_key}_fkey", table, ref_key, ref, ref_key))
+        attributes = rng.sample(ATTRIBUTES, max(1, columns_per_table - len(columns)))
+        columns.extend((f"{entity}_{a}" if rng.random() < 0.3 else a, "text") for a in attributes)
+        table_columns[table] = columns
+        by_domain.setdefault(domain, []).append(table)
+        suffix = f" {round_}" if round_ else ""
+        for word in [entity] + ENTITIES[entity]:
+            for form in (word, _plural(word)):
+                aliases.setdefault(f"{domain} {form}{suffix}", table)
+    index = SchemaIndex(table_columns, foreign_keys, schema="synthetic", version=f"synthetic-{n_columns}-{seed}")
+    return SyntheticSchema(index, aliases, _questions(index, names, rng, n_questions))
+
+
+def _mention(rng, domain, entity, round_):
+    word = rng.choice([entity] + ENTITIES[entity])
+    return f"{domain} {_plural(word)}" + (f" {round_}" if round_ else "")
+
+
+def _questions(index, names, rng, count):
+    info = {table: (domain, entity, round_) for table, domain, entity, round_ in names}
+    questions = []
+    for _ in range(count):
+        table = rng.choice(index.tables)
+        neighbors = list(index.relationships.get(table, {}))
+        targets = [table] + rng.sample(neighbors, min(len(neighbors), rng.randint(0, 2)))
+        attribute = rng.choice([c for c, _ in index.table_columns[table] if not c.endswith("_id")])
+        mentions = [_mention(rng, *info[t]) for t in targets]
+        if len(mentions) == 1:
+            question = f"What is the {rng.choice(AGGREGATES)} {attribute.replace('_', ' ')} of {mentions[0]}"
+        else:
+            question = (f"Show the {rng.choice(AGGREGATES)} {attribute.replace('_', ' ')} of {mentions[0]} "
+                        f"per " + " and ".join(mentions[1:]))
+        truth, _ = index.join_graph.connect(targets)
+        questions.append((question, sorted(truth)))
+    return questions
@@ -1,5 +1,6 @@
 import re
-from collections import deque
+import debug_trace
+from schema_index import SchemaIndex
 
 SCHEMA_TABLES = [
     "customers",
@@ -68,12 +69,24 @@ TABLE_ALIASES = {
     "vendors": "suppliers",
 }
 
+# === Active schema index: bundled defaults until the live catalog is installed ===
+DEFAULT_SCHEMA_INDEX = SchemaIndex.from_columns(SCHEMA_COLUMNS, RELATIONSHIPS, schema="info")
+_active_index = DEFAULT_SCHEMA_INDEX
+
+def set_schema_index(index):
+    """Make `index` the default metadata for the selector functions below."""
+    global _active_index
+    index.token_index(TABLE_ALIASES, singular)
+    index.join_graph.precompute()
+    _active_index = index
+
+def get_schema_index():
+    return _active_index
+
 def extract_keywords(question):
-    print("[DEBUG][extract_keywords] input question:", question)
     words = re.findall(r'\w+', question.lower())
-    print("[DEBUG][extract_keywords] words after split:", words)
     filtered = [w for w in words if w not in STOPWORDS]
-    print("[DEBUG][extract_keywords] after stopword removal:", filtered)
+    debug_trace.debug("selector", "extract_keywords", lambda: {"question": question, "words": words, "keywords": filtered})
     return filtered
 
 def singular(word):
@@ -83,155 +96,145 @@ def singular(word):
         return word[:-1]
     return word
 
-def match_tables_and_columns(keywords):
+def match_tables_and_columns(keywords, index=None, aliases=None):
+    index = index or _active_index
+    aliases = TABLE_ALIASES if aliases is None else aliases
+    lookup = index.token_index(aliases, singular)
     matched_tables = set()
     matched_columns = set()
     keyword_set = set(keywords)
     keyword_singulars = set(singular(k) for k in keywords)
-
-    def is_id_field(name):
-        return name.endswith("_id") or name == "id"
+    terms = keyword_set | keyword_singulars
 
     # === 1. Table matching by direct name, singular/plural, and aliases ===
-    for table in SCHEMA_TABLES:
-        # Direct match, singular/plural match
-        if table in keyword_set or singular(table) in keyword_set or table in keyword_singulars or singular(table) in keyword_singulars:
-            matched_tables.add(table)
-            for col in SCHEMA_COLUMNS:
-                table_name, colname = col.split(".")
-                if table_name == table:
-                    for k in keyword_set | keyword_singulars:
-                        if (k in colname and not is_id_field(colname)) or (k == colname):
-                            matched_columns.add(col)
-        # Alias/nickname match
-        for alias, alias_table in TABLE_ALIASES.items():
-            if alias in " ".join(keywords) and alias_table == table:
-                matched_tables.add(table)
+    for k in terms:
+        matched_tables.update(lookup.strict_terms.get(k, ()))
+    direct_tables = set(matched_tables)
+    for k in terms:
+        names = lookup.columns_matching(k)
+        if not names:
+            continue
+        for table in direct_tables:
+            for colname in names & lookup.column_sets[table]:
+                matched_columns.add(f"{table}.{colname}")
+    # Alias/nickname match (multi-word aliases anywhere in the keyword string)
+    matched_tables.update(lookup.alias_matcher.find(" ".join(keywords)))
 
     # === 2. Multi-entity keyword table matching (boost for multiple mentioned entities) ===
     keyword_all_tables = set()
     for k in keywords + list(keyword_singulars):
         # Check direct, singular, and alias mapping
-        for table in SCHEMA_TABLES:
-            if k == table or k == singular(table) or k == table.rstrip('s'):
-                keyword_all_tables.add(table)
-        # Alias mapping
-        if k in TABLE_ALIASES:
-            keyword_all_tables.add(TABLE_ALIASES[k])
+        keyword_all_tables.update(lookup.loose_terms.get(k, ()))
+        if k in lookup.alias_tables:
+            keyword_all_tables.add(lookup.alias_tables[k])
     if len(matched_tables) < len(keyword_all_tables):
         matched_tables.update(keyword_all_tables)
 
     # === 3. Fallback: If nothing matched, column-only match as before ===
     if not matched_tables:
-        for col in SCHEMA_COLUMNS:
-            table, colname = col.split(".")
-            for k in keyword_set | keyword_singulars:
-                if (k in colname and not is_id_field(colname)) or (k == colname):
-                    matched_columns.add(col)
+        for k in terms:
+            for colname in lookup.columns_matching(k):
+                for table in lookup.tables_by_column[colname]:
+                    matched_columns.add(f"{table}.{colname}")
                     matched_tables.add(table)
 
-    print("[DEBUG][selector] keywords:", keywords)
-    print("[DEBUG][selector] keyword_singulars:", keyword_singulars)
-    print("[DEBUG][selector] matched_tables after main pass:", matched_tables)
+    debug_trace.debug("selector", "main_pass", lambda: {
+        "keywords": keywords, "keyword_singulars": keyword_singulars, "matched_tables": sorted(matched_tables)
+    })
 
     # === 4. Heuristic expansion for analytical/transactional language ===
-    matched_tables = expand_tables_by_heuristics(matched_tables, keywords)
+    matched_tables = expand_tables_by_heuristics(matched_tables, keywords, index)
 
     # === 5. Dependency-graph expansion as before ===
-    matched_tables = expand_tables_by_dependency_graph(matched_tables)
+    matched_tables = expand_tables_by_dependency_graph(matched_tables, index)
 
     # === 6. Analytical column boosting ===
-    matched_columns = boost_analytical_columns(matched_tables, matched_columns, keywords)
+    matched_columns = boost_analytical_columns(matched_tables, matched_columns, keywords, index, aliases)
 
     return list(matched_tables), list(matched_columns)
 
-def expand_tables_by_heuristics(matched_tables, keywords):
+def expand_tables_by_heuristics(matched_tables, keywords, index=None):
     """
     Heuristic rules for multi-table/relationship and analytical queries.
+    Tables the active schema does not have are never added.
     """
+    index = index or _active_index
+    matched_tables = set(matched_tables)
+
+    def add(table):
+        if table in index.columns_by_table:
+            matched_tables.add(table)
+
     keywords_joined = " ".join(keywords)
     # Analytical/transactional language: always include orders for amount spent, revenue, etc.
     spending_keywords = {"spent", "amount", "total", "purchase", "order", "revenue", "sales", "buy", "bought"}
     if any(word in (k.lower() for k in keywords) for word in spending_keywords):
-        matched_tables.add("orders")
+        add("orders")
     # If "order details" or line-item analysis, include order_details
     order_details_aliases = {"order_details", "order item", "order items", "line item", "line items", "item line", "item lines"}
     if any(alias in keywords_joined for alias in order_details_aliases):
-        matched_tables.add("order_details")
+        add("order_details")
     # If both product and supplier are mentioned, include both tables
     if "supplier" in keywords and "product" in keywords:
-        matched_tables.add("suppliers")
-        matched_tables.add("products")
+        add("suppliers")
+        add("products")
     # If both product and order are mentioned, likely needs order_details as bridge
     if "product" in keywords and ("order" in keywords or "ordered" in keywords):
-        matched_tables.add("order_details")
+        add("order_details")
     # If customer and order, include both
     if "customer" in keywords and "order" in keywords:
-        matched_tables.add("customers")
-        matched_tables.add("orders")
+        add("customers")
+        add("orders")
     # If sales rep + order, include both
     if ("sales" in keywords or "sales_rep" in keywords or "representative" in keywords) and "order" in keywords:
-        matched_tables.add("sales_representative")
-        matched_tables.add("orders")
+        add("sales_representative")
+        add("orders")
     return matched_tables
 
-def boost_analytical_columns(matched_tables, matched_columns, keywords):
+def boost_analytical_columns(matched_tables, matched_columns, keywords, index=None, aliases=None):
     """
     For questions about spending, revenue, totals, trends, etc., always include relevant amount and date columns in matched_columns.
     """
+    index = index or _active_index
+    lookup = index.token_index(TABLE_ALIASES if aliases is None else aliases, singular)
     analytical_keywords = {"revenue", "sales", "amount", "total", "spent", "purchase", "trend", "growth", "increase", "decrease", "change", "month", "year", "quarter"}
     if any(ak in (k.lower() for k in keywords) for ak in analytical_keywords):
         for table in matched_tables:
-            for col in SCHEMA_COLUMNS:
-                if col.startswith(table + ".") and (
-                    "amount" in col or
-                    "total" in col or
-                    "subtotal" in col or
-                    "final_amount" in col or
-                    "order_date" in col or
-                    "date" in col
-                ):
-                    matched_columns.add(col)
+            matched_columns.update(lookup.analytical_columns.get(table, ()))
         # Also: always add orders.total_amount and order_details.final_amount if orders/order_details in matched_tables
         if "orders" in matched_tables:
-            matched_columns.add("orders.total_amount")
-            matched_columns.add("orders.order_date")
+            matched_columns.update(f"orders.{c}" for c in ("total_amount", "order_date") if c in lookup.column_sets["orders"])
         if "order_details" in matched_tables:
-            matched_columns.add("order_details.final_amount")
+            matched_columns.update(f"order_details.{c}" for c in ("final_amount",) if c in lookup.column_sets["order_details"])
     return matched_columns
 
-def expand_tables_by_dependency_graph(matched_tables):
+def expand_tables_by_dependency_graph(matched_tables, index=None):
     """
-    For every pair of tables in matched_tables, find the shortest join path.
-    Add all tables along the path to matched_tables.
+    Add the bridge tables needed to join all matched tables, using the
+    fewest extra tables (Steiner-style expansion over precomputed join paths).
     """
-    tables = list(matched_tables)
-    all_tables_needed = set(matched_tables)
-    for i in range(len(tables)):
-        for j in range(i+1, len(tables)):
-            path = find_join_path(tables[i], tables[j])
-            if path:
-                all_tables_needed.update(path)
-    print("[DEBUG][dependency-graph] tables after join-path expansion:", all_tables_needed)
+    index = index or _active_index
+    tables, _ = index.join_graph.connect(sorted(matched_tables))
+    all_tables_needed = set(tables)
+    debug_trace.debug("selector", "join_path_expansion", lambda: {"tables": sorted(all_tables_needed)})
     return all_tables_needed
 
-def find_join_path(table1, table2):
+def find_join_path(table1, table2, index=None):
     """
     Returns list of tables to traverse to get from table1 to table2, excluding table1.
     If already directly connected, returns [table2].
     If not connected, returns [].
     """
-    if table1 == table2:
-        return []
-    visited = set()
-    queue = deque([(table1, [])])
-    while queue:
-        current, path = queue.popleft()
-        if current == table2:
-            return path
-        visited.add(current)
-        neighbors = RELATIONSHIPS.get(current, {})
-        for neighbor in neighbors:
-            if neighbor not in visited:
-                queue.append((neighbor, path + [neighbor]))
-    return []
\ No newline at end of file
+    return (index or _active_index).join_graph.path(table1, table2)
+
+def find_join_conditions(tables, index=None):
+    """
+    Return the join conditions connecting `tables`, e.g.
+    ["orders.customer_id = customers.customer_id"], using only joins between them.
+    """
+    conditions = []
+    for edge in (index or _active_index).join_graph.spanning_edges(sorted(tables)):
+        conditions.extend(
+            f"{edge.left}.{left_col} = {edge.right}.{right_col}" for left_col, right_col in edge.keys
+        )
+    return conditions
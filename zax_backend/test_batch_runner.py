@@ -0,0 +1,60 @@
+import asyncio
+import json
+from langchain_core.messages import AIMessage
+from query_result import QueryResult
+from batch_runner import read_questions, percentile, run_batch
+
+class RateLimited(Exception):
+    status_code = 429
+
+class FakeGraph:
+    def __init__(self, fail_first=()):
+        self.fail_first = set(fail_first)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def ainvoke(self, state):
+        question = state["user_input"]
+        if question in self.fail_first:
+            self.fail_first.discard(question)
+            raise RateLimited("slow down")
+        if question == "boom":
+            raise ValueError("bad question")
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return {"messages": [AIMessage(content=f"answer to {question}")], "last_sql": "SELECT 1", "last_query_result": QueryResult(["n"], ["integer"], [[1]], 1)}
+
+def test_read_questions_jsonl_and_csv(tmp_path):
+    jsonl = tmp_path / "q.jsonl"
+    jsonl.write_text(json.dumps({"id": "a", "question": "How many orders?"}) + "\n\n" + json.dumps({"user_input": "List customers"}) + "\n")
+    assert list(read_questions(str(jsonl))) == [
+        {"id": "a", "question": "How many orders?"},
+        {"id": 2, "question": "List customers"},
+    ]
+    csv_file = tmp_path / "q.csv"
+    csv_file.write_text("id,question\nx,Top products\ny,\n")
+    assert list(read_questions(str(csv_file))) == [{"id": "x", "question": "Top products"}]
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 95) == 3.0
+
+def test_run_batch_bounds_concurrency_and_retries(monkeypatch):
+    monkeypatch.setattr("batch_runner.backoff_delay", lambda attempt, exc=None: 0)
+    graph = FakeGraph(fail_first={"q1"})
+    items = [{"id": i, "question": f"q{i}"} for i in range(10)] + [{"id": 10, "question": "boom"}]
+    streamed = []
+    summary = asyncio.run(run_batch(iter(items), graph, concurrency=3, on_result=streamed.append))
+
+    assert graph.peak <= 3
+    assert len(streamed) == 11
+    by_id = {r["id"]: r for r in streamed}
+    assert by_id[1]["attempts"] == 2 and by_id[1]["answer"] == "answer to q1"
+    assert by_id[1]["columns"] == ["n"] and by_id[1]["rows"] == [[1]]
+    assert by_id[10]["error"].startswith("ValueError") and by_id[10]["attempts"] == 1
+    assert summary["ok"] == 10 and summary["failed"] == 1 and summary["retries"] == 1
+    assert summary["latency_p99_s"] >= summary["latency_p50_s"]
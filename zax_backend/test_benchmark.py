@@ -0,0 +1,48 @@
+import asyncio
+from benchmark import run_async, run_sync, stage_breakdown
+from metrics import Trace
+
+def test_stage_breakdown_groups_spans_by_stage():
+    traces = [
+        {"spans": [{"kind": "node", "name": "query_gen", "ms": ms}, {"kind": "db", "name": "query", "ms": 1.0}]}
+        for ms in (10.0, 20.0, 30.0, 40.0)
+    ]
+    stages = stage_breakdown(traces)
+    assert stages["node:query_gen"]["count"] == 4
+    assert stages["node:query_gen"]["p50_ms"] == 20.0
+    assert stages["node:query_gen"]["p99_ms"] == 40.0
+    assert stages["db:query"]["mean_ms"] == 1.0
+
+class FakeApp:
+    def invoke(self, inputs):
+        if "fail" in inputs["user_input"]:
+            raise RuntimeError("boom")
+        return {"last_query_result": None}
+
+    async def ainvoke(self, inputs):
+        await asyncio.sleep(0)
+        return self.invoke(inputs)
+
+def test_runners_record_latency_errors_and_traces():
+    questions = ["a", "fail", "b"]
+    resets = []
+    for records, traces in (
+        run_sync(FakeApp(), questions, 2, _tracing, lambda: resets.append(1)),
+        asyncio.run(run_async(FakeApp(), questions, 2, _tracing, lambda: resets.append(1))),
+    ):
+        assert [r["question"] for r in records] == questions
+        assert [bool(r["error"]) for r in records] == [False, True, False]
+        assert all(r["latency_s"] >= 0 for r in records)
+        assert len(traces) == 3
+    assert len(resets) == 6
+
+class _tracing:
+    # trace_request stand-in: a context manager yielding a Trace
+    def __init__(self, request_id):
+        self.trace = Trace(request_id)
+
+    def __enter__(self):
+        return self.trace
+
+    def __exit__(self, *exc):
+        return False
@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+import threading
+import asyncpg
+from db_pool import AsyncConnectionPool, CancelScope, ConnectionPool, QueryCancelled, quote_search_path
+
+def test_connections_are_reused_and_counted(tmp_path):
+    pool = ConnectionPool(f"sqlite:///{tmp_path / 'pool.db'}", min_size=1, max_size=2)
+    for _ in range(3):
+        with pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            assert cur.fetchone() == (1,)
+            assert pool.stats()["in_use"] == 1
+    stats = pool.stats()
+    assert stats["in_use"] == 0
+    assert stats["checkouts"] >= 3
+    assert stats["max_size"] == 2
+    pool.close()
+
+def test_pool_times_out_when_exhausted(tmp_path):
+    pool = ConnectionPool(f"sqlite:///{tmp_path / 'pool.db'}", min_size=1, max_size=1, timeout=0.05)
+    with pool.connection():
+        with pytest.raises(Exception):
+            with pool.connection():
+                pass
+    assert pool.stats()["timeouts"] == 1
+    pool.close()
+
+def test_invalid_sizes_rejected():
+    with pytest.raises(ValueError):
+        ConnectionPool("sqlite://", min_size=3, max_size=2)
+
+def test_cancel_scope_interrupts_running_statement(tmp_path):
+    pool = ConnectionPool(f"sqlite:///{tmp_path / 'pool.db'}", min_size=1, max_size=1)
+    scope = CancelScope()
+    timer = threading.Timer(0.2, scope.cancel)
+    timer.start()
+    with pytest.raises(Exception):
+        with scope, pool.connection() as conn:
+            cur = conn.cursor()
+            # Endless recursive CTE; only the cancel can stop it
+            cur.execute("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT count(*) FROM n")
+    assert scope.cancelled
+    with pytest.raises(QueryCancelled):
+        with scope, pool.connection():
+            pass
+    assert pool.stats()["in_use"] == 0
+    pool.close()
+
+def test_search_path_is_quoted():
+    assert quote_search_path("info") == '"info"'
+    assert quote_search_path('info, "$user",x"y') == '"info","$user","x""y"'
+
+def test_async_pool_creation_failure_is_not_cached(monkeypatch):
+    attempts = []
+
+    async def create_pool(dsn, **kwargs):
+        attempts.append(kwargs["server_settings"])
+        if len(attempts) == 1:
+            raise ConnectionRefusedError("database starting up")
+        return "pool"
+
+    monkeypatch.setattr(asyncpg, "create_pool", create_pool)
+    pool = AsyncConnectionPool("postgresql://u@localhost/db", min_size=1, max_size=1, search_path="info")
+
+    async def run():
+        with pytest.raises(ConnectionRefusedError):
+            await pool._pool()
+        return await pool._pool()
+
+    assert asyncio.run(run()) == "pool"
+    assert attempts[-1] == {"search_path": '"info"'}
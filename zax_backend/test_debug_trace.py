@@ -0,0 +1,58 @@
+import io
+import json
+import pytest
+import debug_trace
+from debug_trace import BufferedSink
+
+class ListSink:
+    def __init__(self):
+        self.records = []
+
+    def put(self, record):
+        self.records.append(record)
+
+@pytest.fixture
+def sink():
+    sink = ListSink()
+    yield sink
+    debug_trace.configure()
+
+def test_below_level_does_no_work(sink):
+    debug_trace.configure(level="warn", sink=sink)
+    debug_trace.debug("selector", "keywords", lambda: pytest.fail("payload built below the level"))
+    debug_trace.warn("execute", "attempt_failed", lambda: {"attempt": 1})
+    assert [(r["level"], r["event"], r["data"]) for r in sink.records] == [("warn", "attempt_failed", {"attempt": 1})]
+
+def test_sampling_applies_per_request_to_debug_and_info(sink):
+    debug_trace.configure(level="debug", sample_rate=0.0, sink=sink)
+    with debug_trace.request("r1"):
+        debug_trace.debug("generation", "prompt", "text")
+        debug_trace.error("correct", "empty_sql")
+    debug_trace.info("server", "access")
+    assert [(r["event"], r.get("request")) for r in sink.records] == [("empty_sql", "r1"), ("access", None)]
+
+def test_buffered_sink_writes_json_lines_and_drops_when_full():
+    stream = io.StringIO()
+    buffered = BufferedSink(stream, max_pending=2, flush_interval=60)
+    for n in range(3):
+        buffered.put({"event": "e", "data": {"n": n, "obj": object}})
+    buffered.flush()
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["data"]["n"] for line in lines] == [0, 1]
+    assert buffered.dropped == 1
+
+def test_configure_without_sink_restores_the_default(sink):
+    debug_trace.configure(level="warn", sink=sink)
+    debug_trace.configure(level="off")
+    assert isinstance(debug_trace._get_sink(), BufferedSink)
+
+def test_request_scope_closed_from_another_context():
+    import contextvars
+
+    def events():
+        with debug_trace.request("r1"):
+            yield 1
+
+    stream = events()
+    next(stream)
+    contextvars.copy_context().run(stream.close)
@@ -0,0 +1,26 @@
+from example_store import ExampleStore, format_examples
+from prompts import SEED_EXAMPLES
+
+def test_selects_most_similar_seed_examples():
+    store = ExampleStore(SEED_EXAMPLES)
+    chosen = store.select("Who are the top 5 customers by total spent?", ["customers", "orders"], k=2)
+    assert chosen[0]["question"] == "List the top 3 customers by total amount spent."
+    assert len(chosen) == 2
+    assert store.select("zebra migration", k=3) == []
+
+def test_budget_skips_examples_that_do_not_fit():
+    store = ExampleStore(SEED_EXAMPLES)
+    chosen = store.select("Which products had month-over-month revenue growth?", ["products"], k=3, budget_tokens=150)
+    assert chosen and all("bool_and" not in e["sql"] for e in chosen)
+    assert "Q: " in format_examples(chosen)
+    assert format_examples([]) == "(no similar examples)"
+
+def test_learned_examples_persist_and_evict(tmp_path):
+    path = tmp_path / "examples.json"
+    store = ExampleStore(SEED_EXAMPLES, max_entries=2, path=path)
+    for n in range(3):
+        store.add(f"How many widgets of kind {n} were sold?", f"SELECT {n}", ["widgets"])
+    assert len(store) == len(SEED_EXAMPLES) + 2
+    reloaded = ExampleStore(SEED_EXAMPLES, max_entries=2, path=path)
+    assert reloaded.select("How many widgets of kind 2 were sold?", k=1)[0]["sql"] == "SELECT 2"
+    assert all(e["sql"] != "SELECT 0" for e in reloaded.select("widgets kind 0 sold", k=5))
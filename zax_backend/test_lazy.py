@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from lazy import Lazy
+from import_profile import parse_importtime
+
+def test_builds_once_under_concurrent_first_use():
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    lazy = Lazy(build)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(lazy.get())) for _ in range(8)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+    assert len(calls) == 1 and all(r is results[0] for r in results)
+
+def test_failed_build_is_retried():
+    attempts = []
+
+    def build():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("database unreachable")
+        return "ok"
+
+    lazy = Lazy(build)
+    try:
+        lazy.get()
+    except ConnectionError:
+        pass
+    assert not lazy.built() and lazy.get() == "ok"
+
+def test_backend_imports_without_a_database():
+    env = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+    code = ("import workflow, config, tools; "
+            "assert not (config._pool.built() or config._llm.built() or workflow._app.built())")
+    child = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                           env=env, capture_output=True, text=True)
+    assert child.returncode == 0, child.stderr[-500:]
+
+def test_parse_importtime_keeps_top_level_imports():
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       209 |        209 |     _json\n"
+              "import time:       337 |       1958 | json\n"
+              "import time:       100 |       5000 | sqlalchemy\n")
+    assert parse_importtime(stderr) == [("sqlalchemy", 5.0), ("json", 1.958)]
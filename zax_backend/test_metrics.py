@@ -0,0 +1,63 @@
+import uuid
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+import metrics
+from metrics import MetricsCallbackHandler, MetricsRegistry, Trace
+
+def test_prometheus_text_has_counters_and_cumulative_buckets():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.inc("zax_cache_requests_total", cache="sql", outcome="hit")
+    registry.inc("zax_cache_requests_total", cache="sql", outcome="hit")
+    for seconds in (0.05, 0.5, 5.0):
+        registry.observe("zax_span_seconds", seconds, kind="node", name="query_gen")
+    text = registry.prometheus_text()
+    assert 'zax_cache_requests_total{cache="sql",outcome="hit"} 2' in text
+    assert "# TYPE zax_span_seconds histogram" in text
+    assert 'zax_span_seconds_bucket{kind="node",name="query_gen",le="0.1"} 1' in text
+    assert 'zax_span_seconds_bucket{kind="node",name="query_gen",le="1.0"} 2' in text
+    assert 'zax_span_seconds_bucket{kind="node",name="query_gen",le="+Inf"} 3' in text
+    assert 'zax_span_seconds_count{kind="node",name="query_gen"} 3' in text
+
+def test_disabled_instrumentation_is_a_shared_noop():
+    assert not metrics.enabled()
+    assert metrics.span("db", "query") is metrics.span("node", "x")
+    with metrics.trace_request() as trace:
+        assert trace is None
+
+def test_handler_times_nodes_and_counts_tokens(monkeypatch):
+    registry = MetricsRegistry()
+    monkeypatch.setattr(metrics, "registry", registry)
+    monkeypatch.setattr(metrics, "_enabled", True)
+    handler = MetricsCallbackHandler()
+    node_run, inner_run, llm_run = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    handler.on_chain_start({}, {}, run_id=node_run, metadata={"langgraph_node": "query_gen"}, name="query_gen")
+    handler.on_chain_start({}, {}, run_id=inner_run, metadata={"langgraph_node": "query_gen"}, name="RunnableSequence")
+    handler.on_chat_model_start({}, [], run_id=llm_run, name="ChatGroq")
+    message = AIMessage(content="SELECT 1", usage_metadata={"input_tokens": 120, "output_tokens": 8, "total_tokens": 128})
+    handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=llm_run)
+    handler.on_chain_end({}, run_id=inner_run)
+    handler.on_chain_end({}, run_id=node_run)
+    assert registry.histogram("zax_span_seconds", kind="node", name="query_gen").count == 1
+    assert registry.histogram("zax_span_seconds", kind="node", name="RunnableSequence") is None
+    assert registry.histogram("zax_span_seconds", kind="llm", name="ChatGroq").count == 1
+    assert registry.counter("zax_llm_tokens_total", kind="prompt") == 120
+    assert registry.counter("zax_llm_tokens_total", kind="completion") == 8
+
+def test_trace_orders_spans_by_start():
+    trace = Trace("q1")
+    trace.add("db", "query", trace._t0 + 0.2, 0.1)
+    trace.add("node", "query_gen", trace._t0 + 0.0, 0.15, error=True)
+    data = trace.to_dict()
+    assert data["request_id"] == "q1"
+    assert [s["name"] for s in data["spans"]] == ["query_gen", "query"]
+    assert data["spans"][0]["error"] is True
+
+def test_configure_can_turn_instrumentation_off_again(monkeypatch):
+    monkeypatch.setattr(metrics, "_hook_registered", True)  # keep the global LangChain hook out of the test
+    metrics.configure(enabled=True)
+    assert metrics.enabled() and metrics.span("db", "query") is not metrics.span("node", "x")
+    metrics.configure(enabled=False)
+    assert not metrics.enabled() and metrics.span("db", "query") is metrics.span("node", "x")
+    handler = MetricsCallbackHandler()
+    handler.on_chain_start({}, {}, run_id=uuid.uuid4(), metadata={"langgraph_node": "n"}, name="n")
+    assert not handler._runs
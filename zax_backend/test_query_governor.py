@@ -0,0 +1,55 @@
+import pytest
+import json
+from query_governor import PlanEstimate, QueryGovernor, plan_estimate, with_limit
+
+def _explain(startup, total, rows):
+    return [{"Plan": {"Node Type": "Seq Scan", "Startup Cost": startup, "Total Cost": total, "Plan Rows": rows}}]
+
+def test_plan_estimate_reads_json_text_and_decoded_output():
+    assert plan_estimate(_explain(0.0, 35.5, 2550)) == PlanEstimate(0.0, 35.5, 2550.0)
+    assert plan_estimate(json.dumps(_explain(1.0, 2.0, 3))) == PlanEstimate(1.0, 2.0, 3.0)
+
+def test_cheap_query_runs_unchanged():
+    decision = QueryGovernor(max_cost=1000, max_rows=100).review("SELECT 1", PlanEstimate(0, 10, 1))
+    assert decision.sql == "SELECT 1" and decision.error is None and not decision.limited
+
+def test_expensive_query_is_rejected_with_actionable_error():
+    decision = QueryGovernor(max_cost=1000, max_rows=0).review("SELECT * FROM a, b", PlanEstimate(0, 5e6, 10))
+    assert decision.sql is None
+    assert "estimated cost" in decision.error and "join conditions" in decision.error
+
+def test_large_result_gets_limit_and_is_recosted():
+    governor = QueryGovernor(max_cost=1000, max_rows=100, limit_rows=10)
+    # 1e6 rows at a run cost of 1e5: fetching 10 rows costs 1, well under the limit
+    decision = governor.review("SELECT id FROM orders", PlanEstimate(0, 1e5, 1e6))
+    assert decision.limited and decision.error is None
+    assert decision.sql == "SELECT id FROM orders LIMIT 10"
+
+def test_with_limit_replaces_a_larger_limit():
+    assert with_limit("SELECT id FROM orders ORDER BY id LIMIT 500", 10) == "SELECT id FROM orders ORDER BY id LIMIT 10"
+
+def test_decision_reports_cost_after_limit():
+    decision = QueryGovernor(max_cost=0, max_rows=100, limit_rows=10).review("SELECT 1", PlanEstimate(5, 1005, 1000))
+    assert decision.cost == pytest.approx(15.0)
+
+def test_governor_limited_result_is_truncated_with_estimated_total(tmp_path, monkeypatch):
+    import tools
+    from db_pool import ConnectionPool
+    pool = ConnectionPool(f"sqlite:///{tmp_path / 'governor.db'}", min_size=1, max_size=1)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (n INTEGER)")
+        conn.executemany("INSERT INTO t VALUES (?)", [(n,) for n in range(30)])
+        conn.commit()
+    monkeypatch.setattr(tools, "get_pool", lambda: pool)
+    monkeypatch.setattr(tools, "governor", QueryGovernor(max_rows=10, limit_rows=5))
+    # sqlite has no EXPLAIN (FORMAT JSON): review with a fixed plan estimate instead
+    monkeypatch.setattr(tools, "_prepare", lambda conn, statement, govern=True:
+                        tools._reviewed(statement, PlanEstimate(0, 10, 30)))
+
+    result = tools.fetch_result("SELECT n FROM t", max_rows=5)
+    assert result.row_count == 5 and result.truncated and result.total_estimated
+    assert result.total_rows == 30
+    assert "of about 30 rows" in result.preview(2)
+    small = tools.fetch_result("SELECT n FROM t WHERE n < 3", max_rows=5)
+    assert not small.truncated and small.total_rows == 3
+    pool.close()
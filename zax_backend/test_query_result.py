@@ -0,0 +1,84 @@
+import sqlite3
+from array import array
+from decimal import Decimal
+from query_result import QueryResult
+
+def test_from_chunks_is_columnar_and_packs_numeric_columns():
+    result = QueryResult.from_chunks(
+        ["id", "name", "price"], ["integer", "text", "numeric"],
+        [[(1, "Chair", Decimal("9.50")), (2, "Desk", None)], [], [(3, "Lamp", Decimal("4.00"))]]
+    )
+    assert result.ok and result.row_count == 3
+    assert isinstance(result.data[0], array) and list(result.data[0]) == [1, 2, 3]
+    assert result.data[1] == ["Chair", "Desk", "Lamp"]
+    assert result.to_dict()["price"] == [Decimal("9.50"), None, Decimal("4.00")]
+
+def test_text_matches_sqldatabase_format_and_is_lazy():
+    result = QueryResult.from_chunks(["id", "name"], ["integer", "text"], [[(1, "x" * 400)]])
+    assert result._text is None
+    text = str(result)
+    assert text == str([(1, "x" * 297 + "...")])
+    assert str(result) is text
+    assert str(QueryResult.from_chunks(["id"], ["integer"], [])) == ""
+
+def test_nullable_integer_column_stays_a_list():
+    result = QueryResult.from_chunks(["n"], ["integer"], [[(1,), (None,)]])
+    assert result.data[0] == [1, None]
+
+def test_error_channel():
+    result = QueryResult.from_error("Error: relation \"x\" does not exist")
+    assert not result.ok and result.row_count == 0
+    assert str(result).startswith("Error:")
+    assert list(result.rows()) == []
+
+def test_from_cursor_fetches_in_chunks():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (a INTEGER, b TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", [(i, str(i)) for i in range(25)])
+    cursor = conn.cursor()
+    cursor.execute("SELECT a, b FROM t ORDER BY a")
+    result = QueryResult.from_cursor(cursor, chunk_rows=10)
+    assert result.columns == ("a", "b") and result.row_count == 25
+    assert list(result.rows())[-1] == (24, "24")
+    assert result.nbytes > 0
+
+def test_row_budget_truncates_and_counts_the_rest():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (a INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(95)])
+    cursor = conn.cursor()
+    cursor.execute("SELECT a FROM t ORDER BY a")
+    result = QueryResult.from_cursor(cursor, chunk_rows=10, max_rows=25)
+    assert result.row_count == 25 and result.truncated and result.total_rows == 95
+    assert list(result.data[0]) == list(range(25))
+
+def test_budget_exactly_at_end_is_not_truncated():
+    result = QueryResult.from_chunks(["a"], ["integer"], [[(1,), (2,)], [(3,), (4,)]], max_rows=4)
+    assert result.row_count == 4 and not result.truncated and result.total_rows == 4
+
+def test_byte_budget_stops_after_the_crossing_chunk():
+    chunks = [[("x" * 100,)] * 10 for _ in range(5)]
+    result = QueryResult.from_chunks(["s"], ["text"], chunks, max_bytes=2000)
+    assert result.row_count == 20 and result.truncated and result.total_rows == 50
+
+def test_count_rest_callback_replaces_draining():
+    class Cursor:
+        description = [("a", 23)]
+        name = "c1"
+
+        def __init__(self):
+            self.batches = [[(1,), (2,)], [(3,)]]
+
+        def fetchmany(self, n):
+            return self.batches.pop(0) if self.batches else []
+
+    result = QueryResult.from_cursor(Cursor(), chunk_rows=2, max_rows=2, count_rest=lambda: 1000)
+    assert result.types == ("integer",)
+    assert result.truncated and result.total_rows == 2 + 1 + 1000
+
+def test_preview_is_bounded_and_reports_total():
+    result = QueryResult.from_chunks(["a"], ["integer"], [[(i,) for i in range(100)]], max_rows=60)
+    text = result.preview(3)
+    assert text == "[(0,), (1,), (2,)]\n(showing 3 of 100 rows)"
+    small = QueryResult.from_chunks(["a"], ["integer"], [[(1,)]])
+    assert small.preview(3) == str(small) == "[(1,)]"
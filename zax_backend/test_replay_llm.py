@@ -0,0 +1,36 @@
+import asyncio
+import time
+from langchain_core.messages import HumanMessage
+from prompts import query_gen_prompt, sql_correction_prompt
+from replay_llm import DEFAULT_SCRIPT, ReplayChatModel
+
+QUESTION = "Which payment method is used most often"
+
+def test_generation_and_correction_replay_canned_sql():
+    model = ReplayChatModel()
+    generated = (query_gen_prompt | model).invoke({"schema": "-- tables", "examples": "", "user_input": QUESTION + "?"})
+    assert "payment_type" in generated.content
+    corrected = (sql_correction_prompt | model).invoke({
+        "sql": generated.content, "db_error": "Error: unknown column", "messages": [HumanMessage(content=QUESTION)]
+    })
+    assert "payment_method" in corrected.content and "payment_type" not in corrected.content
+
+def test_unknown_question_gets_empty_result_sql_and_answers_are_deterministic():
+    model = ReplayChatModel()
+    assert model.invoke([("system", "DATABASE SCHEMA:\n..."), ("human", "Who won?")]).content == "SELECT 1 WHERE 1 = 0"
+    prompt = [HumanMessage(content="Database result: [('Chair',)]\nFormat it for the user.")]
+    first, second = model.invoke(prompt), model.bind_tools([]).invoke(prompt)
+    assert first.content == second.content and "Chair" in first.content
+    assert first.usage_metadata["output_tokens"] == len(first.content.split())
+
+def test_latency_applies_to_sync_and_async_calls():
+    model = ReplayChatModel(latency_ms=30)
+    start = time.perf_counter()
+    model.invoke("hi")
+    asyncio.run(model.ainvoke("hi"))
+    assert time.perf_counter() - start >= 0.06
+
+def test_default_script_sql_targets_known_tables():
+    from table_selector import SCHEMA_TABLES
+    for entry in DEFAULT_SCRIPT:
+        assert any(f"info.{table}" in entry["sql"] for table in SCHEMA_TABLES)
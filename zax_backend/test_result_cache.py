@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from result_cache import ResultCache, normalize_sql, referenced_tables, is_cacheable
+
+def test_normalize_sql_keeps_literals():
+    assert normalize_sql("SELECT  *\n FROM Orders WHERE status = 'Shipped' ;") == \
+        "select * from orders where status = 'Shipped'"
+
+def test_referenced_tables():
+    sql = "SELECT c.first_name FROM info.customers c JOIN info.orders o ON c.customer_id = o.customer_id"
+    assert referenced_tables(sql, ["customers", "orders", "products"]) == ["customers", "orders"]
+
+def test_volatile_queries_are_not_cacheable():
+    assert not is_cacheable("SELECT * FROM products ORDER BY random() LIMIT 1")
+    assert is_cacheable("SELECT * FROM orders WHERE order_date > now() - interval '1 day'")
+
+def test_entry_invalidated_when_table_version_changes():
+    versions = {"orders": 1, "products": 7}
+    cache = ResultCache(version_source=lambda: dict(versions), check_interval=0)
+    cache.put("q", "[(1,)]", ["orders"], cache.data_versions(["orders"]))
+    assert cache.get("q") == "[(1,)]"
+    versions["products"] = 8
+    assert cache.get("q") == "[(1,)]"
+    versions["orders"] = 2
+    assert cache.get("q") is None
+    assert cache.stats()["invalidations"] == 1
+
+def test_size_aware_eviction():
+    cache = ResultCache(max_bytes=400)
+    cache.put("a", "x" * 100)
+    cache.put("b", "y" * 100)
+    cache.get("a")
+    cache.put("c", "z" * 100)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["bytes"] <= 400
+
+def test_max_staleness_and_table_invalidation():
+    cache = ResultCache(max_staleness=-1)
+    cache.put("a", "[(1,)]", ["orders"])
+    assert cache.get("a") is None
+    cache = ResultCache()
+    cache.put("a", "[(1,)]", ["orders"])
+    cache.invalidate_tables(["orders"])
+    assert cache.get("a") is None
+
+def test_async_path_never_calls_the_sync_version_source():
+    versions = {"orders": 1}
+
+    async def aversions():
+        return dict(versions)
+
+    cache = ResultCache(version_source=lambda: pytest.fail("sync version source on the event loop"),
+                        async_version_source=aversions, check_interval=0)
+
+    async def run():
+        cache.put("q", "[(1,)]", ["orders"], cache.data_versions(["orders"], await cache.acurrent_versions()))
+        hit = cache.get("q", await cache.acurrent_versions())
+        versions["orders"] = 2
+        return hit, cache.get("q", await cache.acurrent_versions())
+
+    assert asyncio.run(run()) == ("[(1,)]", None)
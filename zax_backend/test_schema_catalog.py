@@ -0,0 +1,141 @@
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from schema_catalog import SchemaCatalog, SIGNATURE_SQL, FOREIGN_KEYS_SQL, asyncpg_sql
+
+class FakeDatabase:
+    def __init__(self, rows, signature="v1", foreign_keys=()):
+        self.rows = rows
+        self.foreign_keys = list(foreign_keys)
+        self.signature = signature
+        self.column_scans = 0
+
+    @contextmanager
+    def connect(self):
+        yield self
+
+    def cursor(self):
+        return FakeCursor(self)
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        if sql == SIGNATURE_SQL:
+            self.result = [(self.db.signature,)]
+        elif sql == FOREIGN_KEYS_SQL:
+            self.result = list(self.db.foreign_keys)
+        else:
+            self.db.column_scans += 1
+            self.result = list(self.db.rows)
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+class FakeAsyncConnection:
+    """asyncpg-shaped view of a FakeDatabase."""
+
+    def __init__(self, db):
+        self.db = db
+
+    @asynccontextmanager
+    async def connect(self):
+        yield self
+
+    async def fetchval(self, sql, schema):
+        assert sql == asyncpg_sql(SIGNATURE_SQL)
+        return self.db.signature
+
+    async def fetch(self, sql, schema):
+        if sql == asyncpg_sql(FOREIGN_KEYS_SQL):
+            return list(self.db.foreign_keys)
+        self.db.column_scans += 1
+        return list(self.db.rows)
+
+ROWS = [
+    ("customers", "customer_id", "integer"),
+    ("customers", "first_name", "text"),
+    ("orders", "order_id", "integer"),
+    ("orders", "customer_id", "integer"),
+]
+
+def test_render_matches_create_table_format():
+    db = FakeDatabase(ROWS)
+    catalog = SchemaCatalog(db.connect, "info")
+    assert catalog.render(["orders"]) == (
+        "CREATE TABLE info.orders (\n    order_id integer,\n    customer_id integer\n);"
+    )
+    assert catalog.render().startswith("CREATE TABLE info.customers (")
+    assert db.column_scans == 1
+
+def test_reload_only_when_signature_changes():
+    db = FakeDatabase(ROWS)
+    catalog = SchemaCatalog(db.connect, "info", ttl=3600, check_interval=0)
+    catalog.render()
+    catalog.render(["customers"])
+    assert db.column_scans == 1
+
+    db.signature = "v2"
+    db.rows = ROWS + [("orders", "status", "text")]
+    assert "status text" in catalog.render(["orders"])
+    assert db.column_scans == 2
+    assert catalog.version == "v2"
+
+def test_invalidate_forces_reload():
+    db = FakeDatabase(ROWS)
+    catalog = SchemaCatalog(db.connect, "info", ttl=3600, check_interval=3600)
+    catalog.tables()
+    catalog.invalidate()
+    catalog.tables()
+    assert db.column_scans == 2
+
+def test_seed_skips_column_scan():
+    db = FakeDatabase(ROWS)
+    catalog = SchemaCatalog(db.connect, "info", ttl=3600, check_interval=3600)
+    catalog.seed({"orders": [("order_id", "integer")]}, [], "v1")
+    assert catalog.render() == "CREATE TABLE info.orders (\n    order_id integer\n);"
+    assert db.column_scans == 0
+
+def test_async_render_reloads_on_signature_change():
+    db = FakeDatabase(ROWS)
+    catalog = SchemaCatalog(db.connect, "info", ttl=3600, check_interval=0, aconnect=FakeAsyncConnection(db).connect)
+
+    async def scenario():
+        first = await catalog.arender(["orders"])
+        await catalog.arender(["customers"])
+        db.signature = "v2"
+        db.rows = ROWS + [("orders", "status", "text")]
+        return first, await catalog.arender(["orders"])
+
+    first, second = asyncio.run(scenario())
+    assert first == "CREATE TABLE info.orders (\n    order_id integer,\n    customer_id integer\n);"
+    assert "status text" in second
+    assert db.column_scans == 2
+
+def test_concurrent_async_refresh_loads_once():
+    db = FakeDatabase(ROWS)
+    connection = FakeAsyncConnection(db)
+    catalog = SchemaCatalog(db.connect, "info", ttl=3600, check_interval=60, aconnect=connection.connect)
+    fetch = connection.fetch
+
+    async def slow_fetch(sql, schema):
+        await asyncio.sleep(0.01)
+        return await fetch(sql, schema)
+
+    connection.fetch = slow_fetch
+
+    async def scenario():
+        return await asyncio.gather(*(catalog.arender(["orders"]) for _ in range(5)))
+
+    assert len(set(asyncio.run(scenario()))) == 1
+    assert db.column_scans == 1
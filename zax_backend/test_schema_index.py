@@ -0,0 +1,76 @@
+import time
+from schema_index import SchemaIndex, PhraseMatcher
+from table_selector import match_tables_and_columns, find_join_path, singular, DEFAULT_SCHEMA_INDEX, TABLE_ALIASES
+
+TABLES = {
+    "accounts": [("account_id", "integer"), ("owner_name", "text")],
+    "invoices": [("invoice_id", "integer"), ("account_id", "integer"), ("total_amount", "numeric")],
+    "invoice_lines": [("line_id", "integer"), ("invoice_ref", "integer"), ("sku", "text")],
+}
+FOREIGN_KEYS = [
+    ("invoices_account_fk", "invoices", "account_id", "accounts", "account_id"),
+    ("lines_invoice_fk", "invoice_lines", "invoice_ref", "invoices", "invoice_id"),
+]
+
+def test_relationships_derived_from_foreign_keys():
+    index = SchemaIndex(TABLES, FOREIGN_KEYS, schema="billing", version="v1")
+    assert index.relationships["invoice_lines"]["invoices"] == (("invoice_ref", "invoice_id"),)
+    assert index.relationships["invoices"]["invoice_lines"] == (("invoice_id", "invoice_ref"),)
+    assert find_join_path("accounts", "invoice_lines", index) == ["invoices", "invoice_lines"]
+
+def test_save_and_load_round_trip(tmp_path):
+    index = SchemaIndex(TABLES, FOREIGN_KEYS, schema="billing", version="v1")
+    path = tmp_path / "index.json"
+    index.save(path)
+    start = time.perf_counter()
+    loaded = SchemaIndex.load(path)
+    assert time.perf_counter() - start < 0.1
+    assert loaded.version == "v1"
+    assert loaded.columns == index.columns
+    assert loaded.relationships == index.relationships
+
+def test_load_missing_file_returns_none(tmp_path):
+    assert SchemaIndex.load(tmp_path / "missing.json") is None
+
+def test_selector_uses_given_index():
+    index = SchemaIndex(TABLES, FOREIGN_KEYS)
+    tables, _ = match_tables_and_columns(["accounts", "total", "invoice_lines"], index=index)
+    # "total" would add the demo schema's orders table; it must not leak in here
+    assert set(tables) == {"accounts", "invoices", "invoice_lines"}
+
+def test_default_index_matches_bundled_schema():
+    assert "orders" in DEFAULT_SCHEMA_INDEX.tables
+    assert DEFAULT_SCHEMA_INDEX.relationships["orders"]["customers"] == (("customer_id", "customer_id"),)
+
+def test_phrase_matcher_finds_overlapping_aliases():
+    matcher = PhraseMatcher({"sales rep": "reps", "rep": "reps", "line item": "lines", "item": "items"})
+    assert matcher.find("top sales reps by line items") == {"reps", "lines", "items"}
+    assert matcher.find("nothing here") == set()
+
+def test_token_index_column_lookup():
+    lookup = DEFAULT_SCHEMA_INDEX.token_index(TABLE_ALIASES, singular)
+    assert lookup.columns_matching("rate") == {"tax_rate", "commission_rate"}
+    # *_id columns only match exactly
+    assert "customer_id" not in lookup.columns_matching("customer")
+    assert lookup.columns_matching("customer_id") == {"customer_id"}
+    assert lookup.strict_terms["product"] == {"products"}
+
+def test_steiner_expansion_adds_fewest_bridge_tables():
+    # a - b - c - d and a - x - d: the x branch needs one bridge table, b - c needs two
+    relationships = {
+        "a": {"b": "k", "x": "k"}, "b": {"a": "k", "c": "k"}, "c": {"b": "k", "d": "k"},
+        "d": {"c": "k", "x": "k"}, "x": {"a": "k", "d": "k"},
+    }
+    graph = SchemaIndex({}, relationships=relationships).join_graph
+    tables, edges = graph.connect(["a", "d"])
+    assert set(tables) == {"a", "x", "d"}
+    assert len(edges) == 2
+    assert graph.distance("a", "c") == 2
+
+def test_join_conditions_follow_foreign_keys():
+    from table_selector import find_join_conditions
+    index = SchemaIndex(TABLES, FOREIGN_KEYS)
+    assert find_join_conditions(["invoice_lines", "invoices", "accounts"], index) == [
+        "accounts.account_id = invoices.account_id",
+        "invoices.invoice_id = invoice_lines.invoice_ref",
+    ]
@@ -0,0 +1,35 @@
+from schema_index import SchemaIndex
+from schema_renderer import render_schema, estimate_tokens
+
+TABLES = {
+    "accounts": [("account_id", "integer"), ("owner_name", "text"), ("region", "text"), ("notes", "text")],
+    "invoices": [("invoice_id", "integer"), ("account_id", "integer"), ("total_amount", "numeric"),
+                 ("issued_date", "date"), ("memo", "text"), ("terms", "text"), ("currency", "text")],
+}
+FOREIGN_KEYS = [("invoices_account_fk", "invoices", "account_id", "accounts", "account_id")]
+INDEX = SchemaIndex(TABLES, FOREIGN_KEYS, schema="billing")
+
+def test_no_budget_renders_every_column():
+    schema = render_schema(INDEX, ["accounts", "invoices"])
+    assert not schema.trimmed
+    assert "CREATE TABLE billing.invoices" in schema.text
+    assert all(column in schema.text for columns in TABLES.values() for column, _ in columns)
+
+def test_budget_keeps_keys_and_join_columns_first():
+    schema = render_schema(INDEX, ["accounts", "invoices"], budget_tokens=1)
+    assert schema.trimmed
+    for column in ("account_id integer", "invoice_id integer"):
+        assert column in schema.text
+    assert "owner_name" not in schema.text and "memo" not in schema.text
+    assert "-- 5 more columns not shown" in schema.text
+
+def test_relevant_columns_win_the_budget():
+    fixed = render_schema(INDEX, ["accounts", "invoices"], budget_tokens=1).tokens
+    schema = render_schema(INDEX, ["accounts", "invoices"], matched_columns=["invoices.memo"],
+                           keywords=["region"], budget_tokens=fixed + 2 * estimate_tokens("region text") + 2)
+    assert "memo text" in schema.text and "region text" in schema.text
+    assert "terms" not in schema.text and "owner_name" not in schema.text
+
+def test_compact_notation():
+    schema = render_schema(INDEX, ["invoices"], budget_tokens=1, compact=True)
+    assert schema.text == "billing.invoices(invoice_id int, ...6 more)"
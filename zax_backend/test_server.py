@@ -0,0 +1,77 @@
+import http.client
+import json
+import threading
+import time
+from query_result import QueryResult
+from server import AdmissionController, QueryServer, Rejected
+
+def fake_events(release=None):
+    def events(inputs):
+        yield {"event": "sql", "t": 0.0, "sql": "SELECT 1"}
+        if release is not None:
+            release.wait(5)
+        yield {"event": "done", "t": 0.1, "answer": f"answer to {inputs['user_input']}", "sql": "SELECT 1",
+               "result": QueryResult(["n"], ["integer"], [[1]], 1), "state": {}, "trace": None}
+    return events
+
+def start(events, **admission):
+    server = QueryServer(("127.0.0.1", 0), AdmissionController(**admission), events)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def post(server, body, client="a"):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    conn.request("POST", "/query", json.dumps(body), {"X-Client-Id": client, "Content-Type": "application/json"})
+    response = conn.getresponse()
+    return response.status, response.read().decode()
+
+def test_query_returns_sql_rows_and_answer():
+    server = start(fake_events())
+    status, body = post(server, {"question": "how many?"})
+    payload = json.loads(body)
+    assert status == 200
+    assert payload["sql"] == "SELECT 1" and payload["rows"] == [[1]] and payload["answer"] == "answer to how many?"
+    assert post(server, {"nope": 1})[0] == 400
+    server.shutdown()
+
+def test_stream_sends_server_sent_events():
+    server = start(fake_events())
+    status, body = post(server, {"question": "q", "stream": True})
+    names = [line.split(": ", 1)[1] for line in body.splitlines() if line.startswith("event: ")]
+    assert status == 200 and names == ["sql", "done"]
+    server.shutdown()
+
+def test_admission_sheds_per_client_and_when_saturated():
+    admission = AdmissionController(max_in_flight=1, max_queue=0, per_client=1, queue_timeout=0.1)
+    admission.acquire("a")
+    try:
+        admission.acquire("a")
+        assert False, "per-client limit not enforced"
+    except Rejected as e:
+        assert e.status == 429
+    try:
+        admission.acquire("b")
+        assert False, "saturation not shed"
+    except Rejected as e:
+        assert e.status == 429
+    admission.release("a")
+    admission.acquire("b")
+    assert admission.stats()["shed"] == 2
+
+def test_drain_finishes_in_flight_and_rejects_new_requests():
+    release = threading.Event()
+    server = start(fake_events(release))
+    results = []
+    worker = threading.Thread(target=lambda: results.append(post(server, {"question": "slow"})))
+    worker.start()
+    while server.admission.stats()["running"] == 0:
+        time.sleep(0.01)
+    drainer = threading.Thread(target=server.drain, args=(5.0,))
+    drainer.start()
+    while not server.admission.draining:
+        time.sleep(0.01)
+    assert post(server, {"question": "late"}, client="b")[0] == 503
+    release.set()
+    worker.join(5)
+    drainer.join(5)
+    assert results[0][0] == 200 and not drainer.is_alive()
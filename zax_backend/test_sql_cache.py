@@ -0,0 +1,50 @@
+import threading
+from sql_cache import QuestionSQLCache, question_fingerprint
+from table_selector import extract_keywords
+
+def test_fingerprint_ignores_wording_changes():
+    a = question_fingerprint(extract_keywords("List products with stock level below 50"), ["products"], "v1")
+    b = question_fingerprint(extract_keywords("Which product has stock levels below 50?"), ["products"], "v1")
+    assert a == b
+    assert a != question_fingerprint(extract_keywords("List products with stock level below 60"), ["products"], "v1")
+    assert a != question_fingerprint(extract_keywords("List products with stock level below 50"), ["products"], "v2")
+
+def test_lru_eviction_and_stats():
+    cache = QuestionSQLCache(max_entries=2)
+    cache.put("a", "SELECT 1")
+    cache.put("b", "SELECT 2")
+    assert cache.get("a") == "SELECT 1"
+    cache.put("c", "SELECT 3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "SELECT 1"
+    assert cache.stats() == {"size": 2, "hits": 2, "misses": 1, "evictions": 1, "hit_rate": 2 / 3}
+
+def test_ttl_expiry():
+    cache = QuestionSQLCache(ttl=-1)
+    cache.put("a", "SELECT 1")
+    assert cache.get("a") is None
+
+def test_persistence_round_trip(tmp_path):
+    path = tmp_path / "sql_cache.json"
+    QuestionSQLCache(path=str(path)).put("a", "SELECT 1")
+    assert QuestionSQLCache(path=str(path)).get("a") == "SELECT 1"
+
+def test_persistence_does_not_block_lookups(tmp_path):
+    cache = QuestionSQLCache(path=str(tmp_path / "sql_cache.json"))
+    cache.put("a", "SELECT 1")
+    writing, release = threading.Event(), threading.Event()
+    write = cache._write
+
+    def slow_write(data):
+        writing.set()
+        release.wait(5)
+        write(data)
+
+    cache._write = slow_write
+    putter = threading.Thread(target=cache.put, args=("b", "SELECT 2"))
+    putter.start()
+    assert writing.wait(5)
+    assert cache.get("a") == "SELECT 1"
+    release.set()
+    putter.join()
+    assert QuestionSQLCache(path=str(tmp_path / "sql_cache.json")).get("b") == "SELECT 2"
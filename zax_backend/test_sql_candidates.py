@@ -0,0 +1,60 @@
+import asyncio
+import time
+import pytest
+from langchain_core.messages import AIMessage
+from sql_candidates import Candidate, abest_candidate, best_candidate, pick
+
+SQL = {0: "SELECT * FROM a, b", 1: "SELECT 1 FROM a JOIN b ON a.id = b.a_id", 2: "SELECT 2 FROM a"}
+COSTS = {SQL[1]: 50.0, SQL[2]: 10.0}
+
+def _review(sql):
+    if sql in COSTS:
+        return None, COSTS[sql]
+    return "Error: SQL failed validation", None
+
+def test_pick_prefers_cheapest_valid_then_earliest():
+    candidates = [
+        Candidate(2, None, "c", None, 5.0),
+        Candidate(0, None, "a", "Error: bad", None),
+        Candidate(1, None, "b", None, 5.0),
+    ]
+    assert pick(candidates).index == 1
+    assert pick([Candidate(1, None, "b", "Error: x", None), Candidate(0, None, "a", "Error: y", None)]).index == 0
+
+def test_best_candidate_runs_cheapest_valid():
+    chosen = best_candidate(lambda i: AIMessage(content=SQL[i]), _review, 3, grace_s=1.0)
+    assert chosen.sql == SQL[2] and chosen.cost == 10.0
+
+def test_slow_candidates_are_dropped_after_grace_period():
+    def generate(i):
+        if i == 2:
+            time.sleep(1.0)
+        return AIMessage(content=SQL[i])
+    start = time.perf_counter()
+    chosen = best_candidate(generate, _review, 3, grace_s=0.05)
+    assert chosen.sql == SQL[1]
+    assert time.perf_counter() - start < 0.9
+
+def test_async_best_candidate_cancels_pending_generations():
+    cancelled = []
+
+    async def agenerate(i):
+        try:
+            await asyncio.sleep(1.0 if i == 2 else 0)
+        except asyncio.CancelledError:
+            cancelled.append(i)
+            raise
+        return AIMessage(content=SQL[i])
+
+    async def areview(sql):
+        return _review(sql)
+
+    chosen = asyncio.run(abest_candidate(agenerate, areview, 3, grace_s=0.05))
+    assert chosen.sql == SQL[1]
+    assert cancelled == [2]
+
+def test_all_generations_failing_reraises():
+    def generate(i):
+        raise RuntimeError("rate limited")
+    with pytest.raises(RuntimeError):
+        best_candidate(generate, _review, 2)
@@ -0,0 +1,58 @@
+from table_selector import DEFAULT_SCHEMA_INDEX
+from sql_validator import validator_for, format_diagnostics
+
+validator = validator_for(DEFAULT_SCHEMA_INDEX)
+
+def codes(sql):
+    return [d.code for d in validator.validate(sql)]
+
+def test_valid_queries_pass():
+    assert codes(
+        "SELECT c.first_name, SUM(o.total_amount) AS spent FROM customers c "
+        "JOIN orders o ON c.customer_id = o.customer_id GROUP BY c.first_name ORDER BY spent DESC LIMIT 3;"
+    ) == []
+    assert codes(
+        "WITH t AS (SELECT customer_id, COUNT(*) AS n FROM orders GROUP BY customer_id) "
+        "SELECT t.n, c.first_name FROM t JOIN customers c USING (customer_id)"
+    ) == []
+    assert codes(
+        "SELECT c.first_name FROM customers c WHERE EXISTS "
+        "(SELECT 1 FROM orders o WHERE o.customer_id = c.customer_id)"
+    ) == []
+    assert codes("SELECT EXTRACT(YEAR FROM order_date) AS yr, COUNT(*) FROM orders GROUP BY yr ORDER BY yr") == []
+
+def test_rejects_writes_and_multiple_statements():
+    assert codes("DELETE FROM customers") == ["not_read_only"]
+    assert codes("SELECT first_name INTO backup FROM customers") == ["not_read_only"]
+    assert codes("SELECT 1; DROP TABLE customers") == ["multiple_statements"]
+
+def test_unknown_identifiers_with_suggestions():
+    [table] = validator.validate("SELECT * FROM custmers")
+    assert table.code == "unknown_table" and "customers" in table.message
+    [column] = validator.validate("SELECT c.frist_name FROM customers c")
+    assert column.code == "unknown_column" and "first_name" in column.message
+    assert codes("SELECT nope FROM customers") == ["unknown_column"]
+
+def test_ambiguous_column_and_missing_join_condition():
+    [ambiguous] = validator.validate("SELECT customer_id FROM customers c JOIN orders o ON c.customer_id = o.customer_id")
+    assert ambiguous.code == "ambiguous_column" and "customers, orders" in ambiguous.message
+    [join] = validator.validate("SELECT c.first_name FROM customers c, orders o")
+    assert join.code == "missing_join_condition"
+    assert "c.customer_id = o.customer_id" in join.message
+    assert codes("SELECT c.first_name FROM customers c, orders o WHERE c.customer_id = o.customer_id") == []
+
+def test_sql_outside_the_index_is_left_to_the_database():
+    assert codes("SELECT relname FROM pg_catalog.pg_class") == []
+    assert codes("SELECT * FROM generate_series(1, 3)") == []
+
+def test_format_diagnostics():
+    text = format_diagnostics(validator.validate("SELECT * FROM custmers"))
+    assert text.startswith("Error: SQL failed validation:\n- Unknown table")
+
+def test_unquoted_identifiers_are_case_insensitive():
+    assert codes("select * from Products") == []
+    assert codes("SELECT o.Status FROM orders o") == []
+    assert codes("SELECT p.Product_Name FROM info.products p") == []
+    assert codes("SELECT p.product_name FROM INFO.Products p") == []
+    assert codes("SELECT p.nope FROM INFO.products p") == ["unknown_column"]
+    assert codes('SELECT * FROM "Products"') == ["unknown_table"]
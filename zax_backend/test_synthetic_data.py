@@ -0,0 +1,22 @@
+from synthetic_data import TABLES, row_counts, synthetic_rows
+from table_selector import SCHEMA_COLUMNS
+
+def test_rows_match_the_selector_schema_columns():
+    for table in TABLES:
+        columns = [c for c in SCHEMA_COLUMNS if c.startswith(table + ".")]
+        row = next(synthetic_rows(table, scale=0.01))
+        assert len(row) == len(columns), table
+
+def test_generation_is_deterministic_and_scaled():
+    first = list(synthetic_rows("orders", scale=0.01, seed=7))
+    assert first == list(synthetic_rows("orders", scale=0.01, seed=7))
+    assert first != list(synthetic_rows("orders", scale=0.01, seed=8))
+    assert len(first) == row_counts(0.01)["orders"] == 100
+
+def test_foreign_keys_reference_existing_rows():
+    counts = row_counts(0.02)
+    for order_id, customer_id, rep_id, *_ in synthetic_rows("orders", scale=0.02):
+        assert 1 <= customer_id <= counts["customers"]
+        assert 1 <= rep_id <= counts["sales_representative"]
+    for row in synthetic_rows("order_details", scale=0.02):
+        assert 1 <= row[1] <= counts["orders"] and 1 <= row[2] <= counts["products"]
@@ -0,0 +1,26 @@
+from selector_benchmark import run_scale, score
+from synthetic_schema import generate_schema
+
+def test_schema_size_and_foreign_keys_are_consistent():
+    schema = generate_schema(500, seed=3)
+    index = schema.index
+    assert 450 <= len(index.columns) <= 550
+    for _, table, column, ref_table, ref_column in index.foreign_keys:
+        assert column in index.columns_by_table[table]
+        assert ref_column == index.table_columns[ref_table][0][0]
+    assert all(table in index.columns_by_table for table in schema.aliases.values())
+
+def test_generation_is_deterministic_with_ground_truth_tables():
+    first, second = generate_schema(1000, seed=1, n_questions=20), generate_schema(1000, seed=1, n_questions=20)
+    assert first.questions == second.questions
+    for question, truth in first.questions:
+        assert truth and all(t in first.index.columns_by_table for t in truth)
+
+def test_score_counts_hits_extras_and_misses():
+    assert score(["a", "b", "c"], ["b", "c", "d"]) == (2, 1, 1)
+
+def test_run_scale_reports_accuracy_and_latency():
+    result = run_scale(300, n_questions=30)
+    assert result["questions"] == 30
+    assert result["recall"] > 0.8
+    assert result["latency_p50_ms"] <= result["latency_p99_ms"]
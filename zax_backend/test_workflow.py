@@ -0,0 +1,95 @@
+import asyncio
+from collections import Counter
+import pytest
+import debug_trace
+import table_selector
+import workflow
+from example_store import ExampleStore
+from lazy import Lazy
+from query_result import QueryResult
+from replay_llm import ReplayChatModel
+from sql_cache import QuestionSQLCache
+
+QUESTION = "Which payment method is used most often?"
+
+
+class CountingReplay(ReplayChatModel):
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.__dict__.setdefault("calls", []).append(1)
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.__dict__.setdefault("calls", []).append(1)
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    llm = CountingReplay()
+    executed = []
+
+    def execute_sql(sql, use_cache=True):
+        executed.append(sql)
+        return QueryResult(columns=["payment_method", "n"], data=[["card", 7]], row_count=1)
+
+    async def aexecute_sql(sql, use_cache=True):
+        return execute_sql(sql, use_cache)
+
+    monkeypatch.setattr(workflow, "get_llm", lambda: llm)
+    monkeypatch.setattr(workflow, "_chains", Lazy(workflow._build_chains))
+    monkeypatch.setattr(workflow, "get_schema_index", lambda: table_selector.DEFAULT_SCHEMA_INDEX)
+    monkeypatch.setattr(workflow, "aget_schema_index", lambda: asyncio.sleep(0, table_selector.DEFAULT_SCHEMA_INDEX))
+    monkeypatch.setattr(workflow, "execute_sql", execute_sql)
+    monkeypatch.setattr(workflow, "aexecute_sql", aexecute_sql)
+    monkeypatch.setattr(workflow, "question_cache", QuestionSQLCache())
+    monkeypatch.setattr(workflow, "example_store", ExampleStore())
+    monkeypatch.setattr(workflow, "SQL_CANDIDATES", 1)
+    return workflow.build_workflow(fast_path=True).compile(), llm, executed
+
+
+def _inputs():
+    return {"user_input": QUESTION, "last_query_result": None, "last_sql": ""}
+
+
+def test_each_node_runs_once_per_question(graph):
+    app, llm, executed = graph
+    nodes = Counter(name for update in app.stream(_inputs(), stream_mode="updates") for name in update)
+    assert nodes == Counter(start_fast_path=1, query_gen=1, correct_query=1, execute_query=1, submit_final_answer=1)
+    assert len(llm.calls) == 2 and len(executed) == 1
+
+    # A repeated question reuses the cached SQL and skips correct_query
+    nodes = Counter(name for update in app.stream(_inputs(), stream_mode="updates") for name in update)
+    assert nodes == Counter(start_fast_path=1, query_gen=1, execute_query=1, submit_final_answer=1)
+
+
+def test_async_invoke_generates_and_executes_once(graph):
+    app, llm, executed = graph
+    state = asyncio.run(app.ainvoke(_inputs()))
+    assert len(llm.calls) == 2 and len(executed) == 1
+    assert state["last_query_result"].ok
+
+
+def test_stream_answers_once(graph):
+    from streaming import stream_events
+    app, llm, executed = graph
+    events = list(stream_events(_inputs(), graph=app))
+    answer_stages = [e for e in events if e["event"] == "stage_start" and e["stage"] == "submit_final_answer"]
+    assert len(answer_stages) == 1
+    tokens = [e for e in events if e["event"] == "token"]
+    assert tokens and {e["task"] for e in tokens} == {answer_stages[0]["task"]}
+    assert "".join(e["text"] for e in tokens) == events[-1]["answer"]
+
+
+def test_no_correction_after_the_last_attempt(graph, monkeypatch):
+    app, llm, executed = graph
+
+    def failing_sql(sql, use_cache=True):
+        executed.append(sql)
+        return QueryResult.from_error(f"Error: attempt {len(executed)} failed")
+
+    monkeypatch.setattr(workflow, "execute_sql", failing_sql)
+    monkeypatch.setattr(debug_trace, "_level", debug_trace.OFF)  # keep attempt_failed warnings off stdout
+    state = workflow.execute_with_correction({"user_input": QUESTION, "last_sql": "SELECT payment_type FROM info.orders"})
+    assert len(executed) == 3 and len(llm.calls) == 2
+    assert state["last_sql"] == executed[-1]
+    assert state["last_query_result"].error == "Error: attempt 3 failed"
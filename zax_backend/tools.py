@@ -1,17 +1,321 @@
-from langchain_community.agent_toolkits import SQLDatabaseToolkit
-from langchain_core.tools import tool
-from config import db, llm
-
-# SQL Toolkit setup
-toolkit = SQLDatabaseToolkit(db=db, llm=llm)
-tools = toolkit.get_tools()
-
-# Get specific tools
-list_tables_tool = next((tool for tool in tools if tool.name == "sql_db_list_tables"), None)
-get_schema_tool = next((tool for tool in tools if tool.name == "sql_db_schema"), None)
-
-@tool
-def query_to_database(query: str) -> str:
-    """Execute a PostgreSQL query against the database and return the result."""
-    result = db.run_no_throw(query)
-    return result if result else "Error: Query failed. Please rewrite your query and try again."
\ No newline at end of file
+import csv
+import itertools
+import asyncpg
+from langchain_core.tools import StructuredTool
+from config import (
+    get_db, get_llm, get_pool, get_async_pool, DB_SCHEMA,
+    RESULT_CACHE_ENABLED, RESULT_CACHE_MAX_BYTES, RESULT_CACHE_MAX_STALENESS, RESULT_CACHE_CHECK_INTERVAL,
+    RESULT_MAX_ROWS, RESULT_MAX_BYTES, RESULT_FETCH_ROWS, ANSWER_SAMPLE_ROWS, SQL_VALIDATION_ENABLED,
+    QUERY_TIMEOUT_MS, GOVERNOR_ENABLED, GOVERNOR_MAX_COST, GOVERNOR_MAX_ROWS, GOVERNOR_LIMIT_ROWS
+)
+from db_pool import raise_if_cancelled
+from lazy import Lazy
+import debug_trace
+from metrics import span, record_cache
+from db_schema_utils import get_schema_index, aget_schema_index
+from query_result import QueryResult, ResultBuilder
+from query_governor import QueryGovernor, plan_estimate, EXPLAIN_PREFIX
+from sql_validator import validator_for, format_diagnostics
+from result_cache import (
+    ResultCache, normalize_sql, referenced_tables, is_cacheable, pg_table_versions, apg_table_versions
+)
+
+def _build_toolkit_tools():
+    # The toolkit reflects the schema through SQLDatabase: only the full (non fast-path) graph needs it
+    from langchain_community.agent_toolkits import SQLDatabaseToolkit
+    return {tool.name: tool for tool in SQLDatabaseToolkit(db=get_db(), llm=get_llm()).get_tools()}
+
+_toolkit_tools = Lazy(_build_toolkit_tools)
+
+def sql_tool(name):
+    """One of the SQLDatabaseToolkit tools by name ("sql_db_list_tables", "sql_db_schema", ...), built on first use."""
+    return _toolkit_tools.get().get(name)
+
+# Old module attributes, resolved lazily
+_LAZY_TOOLS = {"list_tables_tool": "sql_db_list_tables", "get_schema_tool": "sql_db_schema"}
+
+def __getattr__(name):
+    if name in _LAZY_TOOLS:
+        return sql_tool(_LAZY_TOOLS[name])
+    if name == "tools":
+        return list(_toolkit_tools.get().values())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Results shared across requests, invalidated per table by pg_stat modification counters
+result_cache = ResultCache(
+    max_bytes=RESULT_CACHE_MAX_BYTES,
+    max_staleness=RESULT_CACHE_MAX_STALENESS,
+    version_source=lambda: pg_table_versions(get_pool().connection, DB_SCHEMA),
+    check_interval=RESULT_CACHE_CHECK_INTERVAL,
+    async_version_source=lambda: apg_table_versions(get_async_pool().connection, DB_SCHEMA)
+)
+
+# EXPLAIN-based admission for generated SQL
+governor = QueryGovernor(max_cost=GOVERNOR_MAX_COST, max_rows=GOVERNOR_MAX_ROWS, limit_rows=GOVERNOR_LIMIT_ROWS)
+
+QUERY_FAILED = "Error: Query failed. Please rewrite your query and try again."
+
+_cursor_ids = itertools.count()
+
+def _statement(query):
+    # DECLARE ... CURSOR FOR <query> takes a single statement without the terminator
+    return query.strip().rstrip(";").strip()
+
+def _open_cursor(conn):
+    # Named (server-side) cursors keep unfetched rows on the server; other drivers fetch plainly
+    if get_pool().engine.dialect.name == "postgresql":
+        return conn.cursor(name=f"zax_cursor_{next(_cursor_ids)}")
+    return conn.cursor()
+
+def _move_rest(conn, cursor_name):
+    # Count the rows past the budget on the server without transferring them
+    with conn.cursor() as cur:
+        cur.execute(f'MOVE FORWARD ALL IN "{cursor_name}"')
+        return cur.rowcount
+
+def _prepare(conn, statement, govern=True):
+    """
+    Run-time guards on Postgres, inside the transaction that will execute
+    `statement`: READ ONLY (as afetch_result's transaction), SET LOCAL
+    statement_timeout, then EXPLAIN through the governor. Returns the
+    statement to run (possibly with an injected LIMIT), the rejection error
+    and, when a LIMIT was injected, the planner's row estimate for the
+    unlimited statement (else None).
+    """
+    if get_pool().engine.dialect.name != "postgresql":
+        return statement, None, None
+    with conn.cursor() as cur:
+        # SQL the validator could not parse reaches this point unchecked: the database refuses writes
+        cur.execute("SET TRANSACTION READ ONLY")
+        if QUERY_TIMEOUT_MS:
+            cur.execute(f"SET LOCAL statement_timeout = {int(QUERY_TIMEOUT_MS)}")
+        if govern and GOVERNOR_ENABLED:
+            cur.execute(EXPLAIN_PREFIX + statement)
+            return _reviewed(statement, plan_estimate(cur.fetchone()[0]))
+    return statement, None, None
+
+def _reviewed(statement, estimate):
+    decision = governor.review(statement, estimate)
+    return decision.sql, decision.error, estimate.rows if decision.limited else None
+
+def _capped(result, estimated_rows):
+    # A result that filled the injected LIMIT is cut short even though the cursor ran dry
+    if estimated_rows is None or not result.ok or result.total_rows < governor.limit_rows:
+        return result
+    return result.capped(estimated_rows)
+
+def fetch_result(query, max_rows=RESULT_MAX_ROWS, max_bytes=RESULT_MAX_BYTES):
+    """
+    Execute `query` on a pooled connection and return a QueryResult (errors
+    included). The statement runs under the per-query timeout and cost
+    governor; rows are fetched in chunks through a server-side cursor and
+    kept up to the row/byte budget, the rest is only counted. Raises
+    QueryCancelled when the request's CancelScope aborted it.
+    """
+    with span("db", "query"):
+        try:
+            with get_pool().connection() as conn:
+                statement, rejected, estimated_rows = _prepare(conn, _statement(query))
+                if rejected:
+                    return QueryResult.from_error(rejected)
+                cursor = _open_cursor(conn)
+                name = getattr(cursor, "name", None)
+                try:
+                    cursor.execute(statement)
+                    return _capped(QueryResult.from_cursor(
+                        cursor, RESULT_FETCH_ROWS, max_rows, max_bytes,
+                        count_rest=(lambda: _move_rest(conn, name)) if name else None
+                    ), estimated_rows)
+                finally:
+                    cursor.close()
+        except get_pool().errors as e:
+            raise_if_cancelled()
+            return QueryResult.from_error(f"Error: {e}")
+
+async def _amove_rest(cursor, step=2 ** 31 - 1):
+    moved = total = await cursor.forward(step)
+    while moved == step:
+        moved = await cursor.forward(step)
+        total += moved
+    return total
+
+async def _aprepare(conn, statement):
+    if QUERY_TIMEOUT_MS:
+        await conn.execute(f"SET LOCAL statement_timeout = {int(QUERY_TIMEOUT_MS)}")
+    if GOVERNOR_ENABLED:
+        return _reviewed(statement, plan_estimate(await conn.fetchval(EXPLAIN_PREFIX + statement)))
+    return statement, None, None
+
+async def afetch_result(query, max_rows=RESULT_MAX_ROWS, max_bytes=RESULT_MAX_BYTES):
+    """
+    Async fetch_result through an asyncpg cursor in a read-only transaction.
+    Cancelling the awaiting task cancels the running query on the server.
+    """
+    with span("db", "query"):
+        try:
+            async with get_async_pool().connection() as conn:
+                async with conn.transaction(readonly=True):
+                    statement, rejected, estimated_rows = await _aprepare(conn, _statement(query))
+                    if rejected:
+                        return QueryResult.from_error(rejected)
+                    statement = await conn.prepare(statement)
+                    builder = ResultBuilder(*QueryResult.describe(statement.get_attributes()), max_rows, max_bytes)
+                    cursor = await statement.cursor()
+                    while True:
+                        chunk = await cursor.fetch(RESULT_FETCH_ROWS)
+                        if not chunk:
+                            break
+                        if not builder.add(chunk):
+                            builder.add(await cursor.fetch(1))
+                            if builder.truncated:
+                                builder.seen += await _amove_rest(cursor)
+                            break
+                    return _capped(builder.build(), estimated_rows)
+        except (asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            return QueryResult.from_error(f"Error: {e}")
+
+def stream_result(query, chunk_rows=RESULT_FETCH_ROWS):
+    """
+    Yield the complete result of `query` as QueryResult chunks of up to
+    `chunk_rows` rows, ignoring the budget (for UI paging and exports).
+    Errors propagate to the caller.
+    """
+    with get_pool().connection() as conn:
+        statement, _, _ = _prepare(conn, _statement(query), govern=False)
+        cursor = _open_cursor(conn)
+        try:
+            cursor.execute(statement)
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    return
+                yield QueryResult.from_chunks(*QueryResult.describe(cursor), [rows])
+        finally:
+            cursor.close()
+
+def write_csv(query, fileobj, chunk_rows=RESULT_FETCH_ROWS):
+    """Stream the full result of `query` to `fileobj` as CSV; returns the number of rows written."""
+    writer = csv.writer(fileobj)
+    written = 0
+    for chunk in stream_result(query, chunk_rows):
+        if not written:
+            writer.writerow(chunk.columns)
+        writer.writerows(chunk.rows())
+        written += chunk.row_count
+    return written
+
+def run_query(query, use_cache=True):
+    """Execute `query`, serving identical SQL from the result cache unless `use_cache` is False."""
+    if not (use_cache and RESULT_CACHE_ENABLED and is_cacheable(query)):
+        return fetch_result(query)
+    key = normalize_sql(query)
+    cached = result_cache.get(key)
+    record_cache("result", cached is not None)
+    if cached is not None:
+        return cached
+    tables = referenced_tables(query, get_schema_index().tables)
+    versions = result_cache.data_versions(tables)
+    result = fetch_result(query)
+    if result.ok and result.row_count:
+        result_cache.put(key, result, tables, versions)
+    return result
+
+async def arun_query(query, use_cache=True):
+    """Async run_query: executes through the asyncpg pool without blocking the event loop."""
+    if not (use_cache and RESULT_CACHE_ENABLED and is_cacheable(query)):
+        return await afetch_result(query)
+    key = normalize_sql(query)
+    # Versions come only from the async source here: the sync one would block the loop
+    cached = result_cache.get(key, await result_cache.acurrent_versions())
+    record_cache("result", cached is not None)
+    if cached is not None:
+        return cached
+    tables = referenced_tables(query, (await aget_schema_index()).tables)
+    versions = result_cache.data_versions(tables, await result_cache.acurrent_versions())
+    result = await afetch_result(query)
+    if result.ok and result.row_count:
+        result_cache.put(key, result, tables, versions)
+    return result
+
+def _checked(result):
+    # An empty result is treated as a failed query so the correction loop rewrites it
+    return result if not result.ok or result.row_count else QueryResult.from_error(QUERY_FAILED)
+
+def validate_sql(query, index):
+    """
+    Check `query` against the schema index without touching the database;
+    returns a QueryResult carrying the diagnostics, or None if it may run.
+    """
+    if not SQL_VALIDATION_ENABLED:
+        return None
+    with span("validate", "sql"):
+        diagnostics = validator_for(index).validate(query)
+    if not diagnostics:
+        return None
+    debug_trace.info("validate", "diagnostics", lambda: {"codes": [d.code for d in diagnostics]})
+    return QueryResult.from_error(format_diagnostics(diagnostics))
+
+def review_sql(query, index):
+    """
+    Check a candidate without running it: validation, then EXPLAIN through
+    the governor. Returns `(error, cost)`; the cost is None when the database
+    cannot estimate it.
+    """
+    invalid = validate_sql(query, index)
+    if invalid is not None:
+        return invalid.error, None
+    if get_pool().engine.dialect.name != "postgresql":
+        return None, None
+    try:
+        with span("db", "explain"), get_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(EXPLAIN_PREFIX + _statement(query))
+                estimate = plan_estimate(cur.fetchone()[0])
+    except get_pool().errors as e:
+        raise_if_cancelled()
+        return f"Error: {e}", None
+    return _costed(query, estimate)
+
+async def areview_sql(query, index):
+    invalid = validate_sql(query, index)
+    if invalid is not None:
+        return invalid.error, None
+    try:
+        with span("db", "explain"):
+            async with get_async_pool().connection() as conn:
+                estimate = plan_estimate(await conn.fetchval(EXPLAIN_PREFIX + _statement(query)))
+    except (asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+        return f"Error: {e}", None
+    return _costed(query, estimate)
+
+def _costed(query, estimate):
+    if not GOVERNOR_ENABLED:
+        return None, estimate.total_cost
+    decision = governor.review(_statement(query), estimate)
+    return decision.error, decision.cost
+
+def execute_sql(query, use_cache=True):
+    """Validate and run `query`; returns a QueryResult whose `error` covers failures and empty results."""
+    invalid = validate_sql(query, get_schema_index())
+    if invalid is not None:
+        return invalid
+    return _checked(run_query(query, use_cache=use_cache))
+
+async def aexecute_sql(query, use_cache=True):
+    invalid = validate_sql(query, await aget_schema_index())
+    if invalid is not None:
+        return invalid
+    return _checked(await arun_query(query, use_cache=use_cache))
+
+def _query_to_database(query: str) -> str:
+    return execute_sql(query).preview(ANSWER_SAMPLE_ROWS)
+
+async def _aquery_to_database(query: str) -> str:
+    return (await aexecute_sql(query)).preview(ANSWER_SAMPLE_ROWS)
+
+query_to_database = StructuredTool.from_function(
+    func=_query_to_database,
+    coroutine=_aquery_to_database,
+    name="query_to_database",
+    description="Execute a PostgreSQL query against the database and return the result."
+)
@@ -1,79 +1,158 @@
-from table_selector import extract_keywords, match_tables_and_columns
-from db_schema_utils import fetch_schema_text
+from table_selector import extract_keywords, match_tables_and_columns, find_join_conditions
+from db_schema_utils import fetch_schema_text, afetch_schema_text, get_schema_index, aget_schema_index
 from typing import Annotated, Any, TypedDict
 from pydantic import BaseModel, Field
 from langgraph.graph import END, StateGraph, START
 from langgraph.graph.message import add_messages
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableLambda, RunnableWithFallbacks
-from langgraph.prebuilt import ToolNode
-from tools import list_tables_tool, get_schema_tool, query_to_database
-from prompts import query_check_prompt, query_gen_prompt, sql_correction_prompt
-from langchain.schema import AIMessage, HumanMessage
-from config import llm
+from tools import sql_tool, query_to_database, execute_sql, aexecute_sql, review_sql, areview_sql
+from prompts import query_check_prompt, query_gen_prompt, sql_correction_prompt, SEED_EXAMPLES
+from config import get_llm, WORKFLOW_FAST_PATH, ANSWER_SAMPLE_ROWS, SQL_CACHE_MAX_ENTRIES, SQL_CACHE_TTL, SQL_CACHE_PATH
+from config import SQL_CANDIDATES, SQL_CANDIDATE_TEMPERATURE, SQL_CANDIDATE_GRACE_S, SCHEMA_TOKEN_BUDGET, SCHEMA_COMPACT
+from config import FEW_SHOT_K, FEW_SHOT_TOKEN_BUDGET, EXAMPLE_STORE_MAX_ENTRIES, EXAMPLE_STORE_PATH
+from schema_renderer import render_schema
+from example_store import ExampleStore, format_examples
+from sql_candidates import best_candidate, abest_candidate
+from sql_cache import QuestionSQLCache, question_fingerprint
+from query_result import QueryResult
+from metrics import span, record_cache, record_retry
+from lazy import Lazy
+import debug_trace
+from types import SimpleNamespace
 
-# --- Utility to detect if DB result is an error (simple version) ---
+# Validated SQL for previously answered questions, shared by every graph invocation
+question_cache = QuestionSQLCache(max_entries=SQL_CACHE_MAX_ENTRIES, ttl=SQL_CACHE_TTL, path=SQL_CACHE_PATH)
+
+# Few-shot examples for the generation prompt; grows with every successfully executed question
+example_store = ExampleStore(SEED_EXAMPLES, max_entries=EXAMPLE_STORE_MAX_ENTRIES, path=EXAMPLE_STORE_PATH)
+
+# --- Utility to detect if DB result is an error ---
 def is_db_error(result):
-    return isinstance(result, str) and (result.startswith("Error:") or "error" in result.lower())
+    return not isinstance(result, QueryResult) or not result.ok
 
 # --- The main workflow node for executing SQL with retry/correction ---
+def _store_success(state, messages, sql_query, db_result):
+    preview = db_result.preview(ANSWER_SAMPLE_ROWS)
+    debug_trace.debug("execute", "success", lambda: {"sql": sql_query, "result": preview})
+    if state.get("question_fingerprint"):
+        question_cache.put(state["question_fingerprint"], sql_query)
+    if not state.get("sql_cache_hit"):
+        example_store.add(state.get("user_input", ""), sql_query, state.get("schema_tables") or [])
+    state["last_sql"] = sql_query
+    state["last_query_result"] = db_result
+    state["messages"] = messages + [
+        AIMessage(content=f"[DB_RESULT]\nQuery: {sql_query}\nResult: {preview}")
+    ]
+    # DO NOT update user_input here!
+    return state
+
+def _record_failure(state, attempt, sql_query, db_result):
+    record_retry("correction")
+    if attempt == 1 and state.get("sql_cache_hit"):
+        question_cache.invalidate(state.get("question_fingerprint"))
+    debug_trace.warn("execute", "attempt_failed", lambda: {"attempt": attempt, "sql": sql_query, "error": db_result.error})
+
+def _correction_input(state, sql_query, db_result, full_schema=None):
+    messages = [HumanMessage(content=state.get("user_input", ""))]
+    if full_schema:
+        # The generation prompt only showed the top-ranked columns; give the corrector all of them
+        messages.insert(0, HumanMessage(content=f"Full schema of the tables involved:\n{full_schema}"))
+    return {
+        "sql": sql_query,
+        "db_error": db_result.error,
+        "messages": messages
+    }
+
+def _correct_sql(state, sql_query, db_result, attempt):
+    # Correction round: ask LLM to fix SQL given the error
+    full_schema = fetch_schema_text(only_tables=state["schema_tables"]) if state.get("schema_trimmed") else None
+    correction_message = chains().sql_corrector.invoke(_correction_input(state, sql_query, db_result, full_schema))
+    sql_query = correction_message.content.strip()
+    debug_trace.debug("correct", "corrected_sql", lambda: {"attempt": attempt, "sql": sql_query})
+    return sql_query
+
+async def _acorrect_sql(state, sql_query, db_result, attempt):
+    full_schema = await afetch_schema_text(only_tables=state["schema_tables"]) if state.get("schema_trimmed") else None
+    correction_message = await chains().sql_corrector.ainvoke(_correction_input(state, sql_query, db_result, full_schema))
+    sql_query = correction_message.content.strip()
+    debug_trace.debug("correct", "corrected_sql", lambda: {"attempt": attempt, "sql": sql_query})
+    return sql_query
+
+def _store_failure(state, messages, last_sql, last_error, attempt):
+    # Return with user_input preserved (but do not assign it here!)
+    state["last_sql"] = last_sql
+    state["last_query_result"] = last_error
+    state["messages"] = messages + [
+        AIMessage(content=f"Sorry, the system was unable to generate a working SQL query for your request after {attempt} attempts.\nLast error: {last_error}")
+    ]
+    # DO NOT update user_input here!
+    return state
+
 def execute_with_correction(state, max_retries=3):
     messages = state.get("messages", [])
     sql_query = state.get("last_sql", "")
     last_sql = sql_query
-    db_result = None
     last_error = None
     attempt = 0
 
-    print(f"[INITIAL SQL GENERATED]: {sql_query}")
+    debug_trace.debug("execute", "initial_sql", lambda: {"sql": sql_query})
 
     while attempt < max_retries:
         if not sql_query:
-            print(f"[SQL_QUERY][Attempt {attempt+1} failed]: LLM returned empty SQL!")
-            db_result = "Error: LLM returned empty SQL"
-            last_error = db_result
+            debug_trace.warn("execute", "empty_sql", lambda: {"attempt": attempt + 1})
+            last_error = QueryResult.from_error("Error: LLM returned empty SQL")
             break
 
-        db_result = query_to_database.invoke(sql_query)
+        db_result = execute_sql(sql_query, use_cache=not state.get("bypass_cache", False))
         if not is_db_error(db_result):
-            print(f"[SQL_QUERY]: {sql_query}")
-            print(f"[DB_RESULT]: {db_result}")
-            state["last_sql"] = sql_query
-            state["last_query_result"] = db_result
-            state["messages"] = messages + [
-                AIMessage(content=f"[DB_RESULT]\nQuery: {sql_query}\nResult: {db_result}")
-            ]
-            # DO NOT update user_input here!
-            return state
-
-        last_error = db_result
+            return _store_success(state, messages, sql_query, db_result)
+
+        last_error, last_sql = db_result, sql_query
         attempt += 1
-        print(f"[SQL_QUERY][Attempt {attempt} failed]: {sql_query}")
-        print(f"[DB_ERROR]: {db_result}")
-
-        # Correction round: ask LLM to fix SQL given the error
-        correction_prompt_value = sql_correction_prompt.invoke({
-            "sql": sql_query,
-            "db_error": db_result,
-            "messages": [HumanMessage(content=state.get("user_input", ""))]
-        })
-        correction_message = correction_prompt_value.to_messages()[-1]
-        sql_query = correction_message.content.strip()
-        last_sql = sql_query
-        print(f"[LLM CORRECTION OUTPUT][Attempt {attempt}]: {sql_query}")
+        _record_failure(state, attempt, sql_query, db_result)
+        if attempt >= max_retries:
+            # No attempt left to run a correction in
+            break
+        sql_query = _correct_sql(state, sql_query, db_result, attempt)
+        if not sql_query:
+            debug_trace.error("correct", "empty_sql", lambda: {"attempt": attempt})
+            break
+
+    return _store_failure(state, messages, last_sql, last_error, attempt)
+
+async def aexecute_with_correction(state, max_retries=3):
+    """Async execute_with_correction: runs the SQL on the asyncpg pool."""
+    messages = state.get("messages", [])
+    sql_query = state.get("last_sql", "")
+    last_sql = sql_query
+    last_error = None
+    attempt = 0
 
+    debug_trace.debug("execute", "initial_sql", lambda: {"sql": sql_query})
+
+    while attempt < max_retries:
         if not sql_query:
-            print("[ERROR] LLM correction returned empty SQL. Stopping retry loop.")
+            debug_trace.warn("execute", "empty_sql", lambda: {"attempt": attempt + 1})
+            last_error = QueryResult.from_error("Error: LLM returned empty SQL")
             break
 
-    # Return with user_input preserved (but do not assign it here!)
-    state["last_sql"] = last_sql
-    state["last_query_result"] = last_error
-    state["messages"] = messages + [
-        AIMessage(content=f"Sorry, the system was unable to generate a working SQL query for your request after {attempt} attempts.\nLast error: {last_error}")
-    ]
-    # DO NOT update user_input here!
-    return state
+        db_result = await aexecute_sql(sql_query, use_cache=not state.get("bypass_cache", False))
+        if not is_db_error(db_result):
+            return _store_success(state, messages, sql_query, db_result)
+
+        last_error, last_sql = db_result, sql_query
+        attempt += 1
+        _record_failure(state, attempt, sql_query, db_result)
+        if attempt >= max_retries:
+            # No attempt left to run a correction in
+            break
+        sql_query = await _acorrect_sql(state, sql_query, db_result, attempt)
+        if not sql_query:
+            debug_trace.error("correct", "empty_sql", lambda: {"attempt": attempt})
+            break
+
+    return _store_failure(state, messages, last_sql, last_error, attempt)
 
 # --- State definition ---
 class State(TypedDict):
@@ -81,6 +160,11 @@ class State(TypedDict):
     last_query_result: Any
     last_sql: str
     user_input: str
+    question_fingerprint: str
+    sql_cache_hit: bool
+    schema_tables: list  # tables rendered into the generation prompt
+    schema_trimmed: bool  # columns were left out to fit SCHEMA_TOKEN_BUDGET
+    bypass_cache: bool  # set on input to skip the query result cache
 
 # --- Tool wrappers ---
 def handle_tool_error(state: State):
@@ -93,20 +177,29 @@ def handle_tool_error(state: State):
     # DO NOT return user_input
 
 def create_node_from_tool_with_fallback(tools: list) -> RunnableWithFallbacks:
+    from langgraph.prebuilt import ToolNode  # only the full (non fast-path) graph has tool nodes
     return ToolNode(tools).with_fallbacks([RunnableLambda(handle_tool_error)], exception_key="error")
 
-list_tables = create_node_from_tool_with_fallback([list_tables_tool])
-get_schema = create_node_from_tool_with_fallback([get_schema_tool])
-
-llm_with_tools = llm.bind_tools([query_to_database])
-check_generated_query = query_check_prompt | llm_with_tools
-
 class SubmitFinalAnswer(BaseModel):
     """Submit the final answer to the user based on the query results."""
     final_answer: str = Field(..., description="The formatted query results")
 
-llm_with_final_answer = llm.bind_tools([SubmitFinalAnswer])
-query_generator = query_gen_prompt | llm
+def _build_chains():
+    llm = get_llm()
+    return SimpleNamespace(
+        check_generated_query=query_check_prompt | llm.bind_tools([query_to_database]),
+        llm_with_final_answer=llm.bind_tools([SubmitFinalAnswer]),
+        query_generator=query_gen_prompt | llm,
+        # Extra candidates are sampled so they differ from the deterministic generation
+        sampled_query_generator=query_gen_prompt | llm.bind(temperature=SQL_CANDIDATE_TEMPERATURE),
+        sql_corrector=sql_correction_prompt | llm,
+    )
+
+_chains = Lazy(_build_chains)
+
+def chains():
+    """The prompt | LLM runnables, built with the LLM client on first use."""
+    return _chains.get()
 
 def first_tool_call(state: State) -> dict:
     # Only this node returns user_input
@@ -118,7 +211,18 @@ def first_tool_call(state: State) -> dict:
         }])],
         "last_query_result": None,
         "last_sql": "",
-        "user_input": state.get("user_input", "")
+        "user_input": state.get("user_input", ""),
+        "sql_cache_hit": False
+    }
+
+def start_fast_path(state: State) -> dict:
+    # Same reset as first_tool_call, minus the list_tables/get_schema round trip:
+    # query_gen selects tables and loads their schema itself.
+    return {
+        "last_query_result": None,
+        "last_sql": "",
+        "user_input": state.get("user_input", ""),
+        "sql_cache_hit": False
     }
 
 def check_the_given_query(state: State):
@@ -133,60 +237,149 @@ def check_the_given_query(state: State):
 
 # --- IMPORTANT: Only generate SQL, do NOT allow SubmitFinalAnswer here ---
 
-def generation_query(state: State):
-    print("[DEBUG][generation_query] incoming state:", state)
+def _select_for_question(state, index):
+    debug_trace.debug("generation", "incoming_state", lambda: dict(state))
     user_question = state.get("user_input", "")
-    print("[DEBUG][generation_query] user_question before extract:", user_question)
-    keywords = extract_keywords(user_question)
-    tables, columns = match_tables_and_columns(keywords)
-    if tables:
-        print("[DEBUG] About to fetch schema for tables:", tables)
-        schema_text = fetch_schema_text(only_tables=tables)
-    else:
-        schema_text = fetch_schema_text()
+    with span("selector", "match_tables"):
+        keywords = extract_keywords(user_question)
+        tables, columns = match_tables_and_columns(keywords, index=index)
+    return user_question, keywords, tables, columns, question_fingerprint(keywords, tables, index.version)
+
+def _cached_generation(fingerprint):
+    cached_sql = question_cache.get(fingerprint)
+    record_cache("sql", bool(cached_sql))
+    if not cached_sql:
+        return None
+    debug_trace.debug("generation", "sql_cache_hit", lambda: {"sql": cached_sql})
+    return {
+        "messages": [AIMessage(content=cached_sql)],
+        "last_sql": cached_sql,
+        "question_fingerprint": fingerprint,
+        "sql_cache_hit": True
+    }
+
+def _generation_prompt(user_question, schema_text, tables, index):
+    join_conditions = find_join_conditions(tables, index=index) if tables else []
+    if join_conditions:
+        schema_text += "\n\n-- Join conditions:\n" + "\n".join(f"-- {c}" for c in join_conditions)
+    with span("examples", "select"):
+        examples = example_store.select(user_question, tables, k=FEW_SHOT_K, budget_tokens=FEW_SHOT_TOKEN_BUDGET)
     prompt_input = {
         "schema": schema_text,
+        "examples": format_examples(examples),
         "user_input": user_question
     }
-    print("Prompt for LLM:", query_gen_prompt.format(**prompt_input))
-    message = query_generator.invoke(prompt_input)
+    debug_trace.debug("generation", "prompt", lambda: query_gen_prompt.format(**prompt_input))
+    return prompt_input
+
+def _schema_for_prompt(index, tables, columns, keywords):
+    # Top-ranked columns of the selected tables (all tables if none matched) within the token budget
+    with span("schema", "render_schema"):
+        schema = render_schema(index, tables or index.tables, columns, keywords,
+                               budget_tokens=SCHEMA_TOKEN_BUDGET, compact=SCHEMA_COMPACT)
+    debug_trace.debug("schema", "rendered", lambda: {"tokens": schema.tokens, "trimmed": schema.trimmed})
+    return schema
+
+def _generated(message, fingerprint, tables, schema):
     sql_text = message.content if hasattr(message, "content") else ""
     return {
         "messages": [message],
-        "last_sql": sql_text
+        "last_sql": sql_text,
+        "question_fingerprint": fingerprint,
+        "sql_cache_hit": False,
+        "schema_tables": tables,
+        "schema_trimmed": schema.trimmed
         # DO NOT return user_input
     }
 
+def _candidate_generator(i):
+    return chains().query_generator if i == 0 else chains().sampled_query_generator
+
+def _generate_sql(prompt_input, index):
+    if SQL_CANDIDATES <= 1:
+        return chains().query_generator.invoke(prompt_input)
+    return best_candidate(
+        lambda i: _candidate_generator(i).invoke(prompt_input),
+        lambda sql: review_sql(sql, index),
+        SQL_CANDIDATES, SQL_CANDIDATE_GRACE_S
+    ).message
+
+async def _agenerate_sql(prompt_input, index):
+    if SQL_CANDIDATES <= 1:
+        return await chains().query_generator.ainvoke(prompt_input)
+
+    async def agenerate(i):
+        return await _candidate_generator(i).ainvoke(prompt_input)
+
+    async def areview(sql):
+        return await areview_sql(sql, index)
+
+    return (await abest_candidate(agenerate, areview, SQL_CANDIDATES, SQL_CANDIDATE_GRACE_S)).message
+
+def generation_query(state: State):
+    index = get_schema_index()
+    user_question, keywords, tables, columns, fingerprint = _select_for_question(state, index)
+    cached = _cached_generation(fingerprint)
+    if cached:
+        return cached
+    schema = _schema_for_prompt(index, tables, columns, keywords)
+    message = _generate_sql(_generation_prompt(user_question, schema.text, tables, index), index)
+    return _generated(message, fingerprint, tables or index.tables, schema)
+
+async def agenerate_query(state: State):
+    index = await aget_schema_index()
+    user_question, keywords, tables, columns, fingerprint = _select_for_question(state, index)
+    cached = _cached_generation(fingerprint)
+    if cached:
+        return cached
+    schema = _schema_for_prompt(index, tables, columns, keywords)
+    message = await _agenerate_sql(_generation_prompt(user_question, schema.text, tables, index), index)
+    return _generated(message, fingerprint, tables or index.tables, schema)
+
 def execute_and_store_query(state: State):
     sql_query = state.get("last_sql", "")
     if not sql_query:
-        db_result = "Error: No SQL query found."
+        db_result = QueryResult.from_error("Error: No SQL query found.")
     else:
-        db_result = query_to_database.invoke(sql_query)
-    print(f"[SQL_QUERY]: {sql_query}")
-    print(f"[DB_RESULT]: {db_result}")
+        db_result = execute_sql(sql_query, use_cache=not state.get("bypass_cache", False))
+    preview = db_result.preview(ANSWER_SAMPLE_ROWS)
+    debug_trace.debug("execute", "result", lambda: {"sql": sql_query, "result": preview})
     return {
         "messages": state["messages"] + [
-            AIMessage(content=f"[DB_RESULT]\nQuery: {sql_query}\nResult: {db_result}")
+            AIMessage(content=f"[DB_RESULT]\nQuery: {sql_query}\nResult: {preview}")
         ],
         "last_query_result": db_result,
         "last_sql": sql_query
         # DO NOT return user_input
     }
 
-def submit_answer_from_result(state: State):
-    db_result = state.get("last_query_result")
-    if not db_result or (isinstance(db_result, str) and db_result.startswith("Error")):
-        return {"messages": [AIMessage(content="No data found or an error occurred. Unable to answer the question from the database.")]}
-    prompt = (
+def _answer_prompt(db_result):
+    if is_db_error(db_result) or not db_result.row_count:
+        return None
+    # Bounded sample plus the exact row count, never the whole result
+    return (
         "You are a database assistant. ONLY use the following data to answer the user's question. "
         "If you cannot answer from the data, say you do not have enough information. "
-        f"Database result: {db_result}\nFormat it for the user."
+        f"Database result: {db_result.preview(ANSWER_SAMPLE_ROWS)}\nFormat it for the user."
     )
-    message = llm_with_final_answer.invoke([HumanMessage(content=prompt)])
+
+NO_ANSWER = "No data found or an error occurred. Unable to answer the question from the database."
+
+def submit_answer_from_result(state: State):
+    prompt = _answer_prompt(state.get("last_query_result"))
+    if prompt is None:
+        return {"messages": [AIMessage(content=NO_ANSWER)]}
+    message = chains().llm_with_final_answer.invoke([HumanMessage(content=prompt)])
     return {"messages": [message]}
     # DO NOT return user_input
 
+async def asubmit_answer_from_result(state: State):
+    prompt = _answer_prompt(state.get("last_query_result"))
+    if prompt is None:
+        return {"messages": [AIMessage(content=NO_ANSWER)]}
+    message = await chains().llm_with_final_answer.ainvoke([HumanMessage(content=prompt)])
+    return {"messages": [message]}
+
 def should_continue(state: State):
     last_message = state["messages"][-1]
     if getattr(last_message, "tool_calls", None):
@@ -195,34 +388,74 @@ def should_continue(state: State):
         return END
     return "correct_query"
 
+def route_after_generation(state: State):
+    # One branch only: fanning out to both would run execute_query (and the answer) twice.
+    # Cached SQL already ran successfully once: go straight to execution
+    if state.get("sql_cache_hit"):
+        return "execute_query"
+    return "correct_query"
+
 def llm_get_schema(state: State):
-    response = llm.bind_tools([get_schema_tool]).invoke(state["messages"])
+    response = get_llm().bind_tools([sql_tool("sql_db_schema")]).invoke(state["messages"])
     return {"messages": [response]}
     # DO NOT return user_input
 
+async def allm_get_schema(state: State):
+    response = await get_llm().bind_tools([sql_tool("sql_db_schema")]).ainvoke(state["messages"])
+    return {"messages": [response]}
+
+def _node(func, afunc):
+    # Sync and async implementation of one node: app.invoke runs `func`,
+    # app.ainvoke / app.astream await `afunc` on the running event loop.
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
 # --- WORKFLOW ---
-workflow = StateGraph(State)
-workflow.add_node("first_tool_call", first_tool_call)
-workflow.add_node("list_tables_tool", list_tables)
-workflow.add_node("get_schema_tool", get_schema)
-workflow.add_node("model_get_schema", llm_get_schema)
-workflow.add_node("query_gen", generation_query)
-workflow.add_node("correct_query", check_the_given_query)
-workflow.add_node("execute_query", execute_with_correction)
-workflow.add_node("submit_final_answer", submit_answer_from_result)
-
-workflow.add_edge(START, "first_tool_call")
-workflow.add_edge("first_tool_call", "list_tables_tool")
-workflow.add_edge("list_tables_tool", "model_get_schema")
-workflow.add_edge("model_get_schema", "get_schema_tool")
-workflow.add_edge("get_schema_tool", "query_gen")
-workflow.add_edge("query_gen", "correct_query")
-workflow.add_edge("correct_query", "execute_query")
-workflow.add_conditional_edges(
-    "query_gen",
-    lambda state: "execute_query",  # Always execute SQL, do not allow END or correct_query here!
-    {"execute_query": "execute_query"}
-)
-workflow.add_edge("execute_query", "submit_final_answer")
-
-app = workflow.compile()
\ No newline at end of file
+def build_workflow(fast_path=True):
+    """
+    Build the graph; every node that talks to the LLM or the database has an
+    async twin, so `app.ainvoke` never blocks the event loop. The fast path goes START -> start_fast_path -> query_gen;
+    the full path keeps the original first_tool_call -> list_tables_tool ->
+    model_get_schema -> get_schema_tool chain (one extra LLM call) before query_gen.
+    """
+    workflow = StateGraph(State)
+    workflow.add_node("query_gen", _node(generation_query, agenerate_query))
+    workflow.add_node("correct_query", check_the_given_query)
+    workflow.add_node("execute_query", _node(execute_with_correction, aexecute_with_correction))
+    workflow.add_node("submit_final_answer", _node(submit_answer_from_result, asubmit_answer_from_result))
+
+    if fast_path:
+        workflow.add_node("start_fast_path", start_fast_path)
+        workflow.add_edge(START, "start_fast_path")
+        workflow.add_edge("start_fast_path", "query_gen")
+    else:
+        workflow.add_node("first_tool_call", first_tool_call)
+        workflow.add_node("list_tables_tool", create_node_from_tool_with_fallback([sql_tool("sql_db_list_tables")]))
+        workflow.add_node("get_schema_tool", create_node_from_tool_with_fallback([sql_tool("sql_db_schema")]))
+        workflow.add_node("model_get_schema", _node(llm_get_schema, allm_get_schema))
+        workflow.add_edge(START, "first_tool_call")
+        workflow.add_edge("first_tool_call", "list_tables_tool")
+        workflow.add_edge("list_tables_tool", "model_get_schema")
+        workflow.add_edge("model_get_schema", "get_schema_tool")
+        workflow.add_edge("get_schema_tool", "query_gen")
+
+    workflow.add_conditional_edges(
+        "query_gen",
+        route_after_generation,  # Always execute SQL, do not allow END here!
+        ["correct_query", "execute_query"]
+    )
+    workflow.add_edge("correct_query", "execute_query")
+    workflow.add_edge("execute_query", "submit_final_answer")
+    return workflow
+
+# Compiled on first use; the schema index is built (or reloaded from disk) by the first request
+_app = Lazy(lambda: build_workflow(fast_path=WORKFLOW_FAST_PATH).compile())
+
+def get_app():
+    """The compiled graph for WORKFLOW_FAST_PATH, shared process-wide."""
+    return _app.get()
+
+def __getattr__(name):
+    # `from workflow import app` keeps working, compiling the graph at that point
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")